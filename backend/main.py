@@ -4,10 +4,12 @@ Modern REST API with authentication and resume analysis
 """
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from contextlib import asynccontextmanager
+import asyncio
 import jwt
 import os
 import re
@@ -25,18 +27,32 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from modules.models import load_models
-from modules.database import init_postgresql, save_to_db
+from modules.models import load_models, get_fast_embedder, get_embedder_info, get_embedding_bank
+from modules.embedding_cascade import get_cascade_metrics
+from modules.embedding_service import EMBEDDING_MICROBATCH, MODEL_WORK_CONCURRENCY
+from modules.database import init_postgresql, save_to_db, get_analysis_jd
+from modules.candidate_index import index_resume, rank_candidates
 from modules.auth import init_auth_tables, register_user, login_user, get_user_analyses
-from modules.text_processing import normalize_text, parse_contacts, build_index, chunk_text, semantic_chunk_text
+from modules.text_processing import normalize_text, parse_contacts, chunk_text, token_chunk_text, ChunkIndex
+from modules.text_processing import semantic_chunk_with_embeddings, build_embedding_lookup, encode_with_lookup
+from modules.text_processing import RESUME_CHUNK_MAX_CHARS
 from modules.llm_operations import llm_json, jd_plan_prompt, resume_profile_prompt, atomicize_requirements_prompt, analysis_prompt
-from modules.scoring import compute_global_semantic, evaluate_requirement_coverage
+from modules.prompt_enrichment import enrichment_context, seed_enrichment_context, resume_enrichment_contexts
+from modules.prompt_enrichment import RESUME_PREVIEW_CHARS
+from modules.requirement_extraction import extract_requirements_local, local_requirement_plan, requirement_mode
+from modules.experience_estimator import estimate_experience, is_confident, resolve_experience_years
+from modules.scoring import compute_global_semantic, evaluate_requirement_coverage, segment_resume
+from modules.segment_index import SegmentIndex
+from modules.resume_artifacts import RESUME_ARTIFACTS, content_hash, artifact_key, embedder_signature, processing_signature
+from modules.resume_artifacts import load_resume_artifact, save_resume_artifact
 from modules.resume_parser import parse_resume_pdf, parse_resume_text
+from modules.nlp_context import DocumentContext
 from modules.validation import (
     validate_resume_data, validate_jd_data, validate_analysis_results,
     sanitize_resume_data, sanitize_analysis_data, validate_text_quality
 )
 from modules.scoring_optimization import calibrator, skill_taxonomy
+from modules.skill_taxonomy import get_taxonomy, reload_taxonomy, start_taxonomy_watcher
 from modules.abbreviation_mapping import (
     match_requirements_to_resume, extract_skills_from_text, 
     deduplicate_requirements, terms_match
@@ -78,6 +94,9 @@ async def lifespan(app: FastAPI):
     else:
         print("❌ Failed to connect to database")
     
+    get_taxonomy()
+    start_taxonomy_watcher()
+    
     yield
     
     # Shutdown
@@ -116,8 +135,33 @@ JWT_SECRET = os.getenv("JWT_SECRET", "your-super-secret-key-change-in-production
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Users allowed to call /api/admin/* (comma-separated emails; empty disables the admin API)
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
 security = HTTPBearer()
 
+# Caps concurrent spaCy/embedder steps when encodes are not funneled through the micro-batching service
+_model_work_slots = asyncio.Semaphore(MODEL_WORK_CONCURRENCY)
+
+
+async def run_model_work(func, *args, **kwargs):
+    """
+    run_in_threadpool for model-heavy steps. With EMBEDDING_MICROBATCH the encodes
+    already queue on the batching worker; otherwise at most MODEL_WORK_CONCURRENCY
+    steps run at once, so concurrent analyses do not contend for torch/spaCy threads.
+    """
+    if EMBEDDING_MICROBATCH:
+        return await run_in_threadpool(func, *args, **kwargs)
+    async with _model_work_slots:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+
+def model_work_from_thread(loop):
+    """run_model_work for background threads: each call waits for a slot on the event loop."""
+    def run(func, *args, **kwargs):
+        return asyncio.run_coroutine_threadsafe(run_model_work(func, *args, **kwargs), loop).result()
+    return run
+
 # ============================================================================
 # MODELS
 # ============================================================================
@@ -131,6 +175,12 @@ class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
+class CandidateSearchRequest(BaseModel):
+    jd_text: Optional[str] = None
+    analysis_id: Optional[int] = None
+    top_n: int = 10
+    evidence_per_candidate: int = 3
+
 class AnalyzeRequest(BaseModel):
     jd_text: str
 
@@ -158,6 +208,12 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def verify_admin(user_data: dict = Depends(verify_token)) -> dict:
+    """Verify the token belongs to a configured admin"""
+    if (user_data.get('email') or '').lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user_data
+
 # ============================================================================
 # ROUTES
 # ============================================================================
@@ -180,7 +236,9 @@ async def health():
         "version": "2.0.0",
         "models": {
             "loaded": models_ok,
-            "mode": "hybrid" if model else "local"
+            "mode": "hybrid" if model else "local",
+            "embedder": get_embedder_info(),
+            "cascade": get_cascade_metrics()
         },
         "database": {
             "connected": db_ok
@@ -264,6 +322,7 @@ async def analyze_resume(
     file: Optional[UploadFile] = File(None),
     resume_text: str = Form(""),
     jd_text: str = Form(...),
+    requirements_mode: str = Form(""),
     user_data: dict = Depends(verify_token)
 ):
     """Analyze resume against job description with enterprise-grade error handling and monitoring"""
@@ -294,6 +353,11 @@ async def analyze_resume(
         if len(jd_text.strip()) > 50000:
             raise HTTPException(status_code=400, detail="Job description too long (maximum 50,000 characters)")
         
+        try:
+            req_mode = requirement_mode(requirements_mode)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Determine input type for logging
         if file:
             input_type = "pdf" if (file.filename and file.filename.endswith('.pdf')) else "text_file"
@@ -313,6 +377,25 @@ async def analyze_resume(
         # Resume parsing with timeout checks
         check_timeout()
         
+        # Sentence/chunk vectors from chunking, reused by segment scoring and global similarity
+        segment_vectors = {}
+        resume_vectors = None
+        resume_sentences = []
+        chunk_vectors = None
+        chunk_index = None  # chunks + embeddings (encoded once) + lazily built FAISS index
+        
+        # OPTIMIZATION: processed-resume artifacts keyed by user + content hash skip parsing and encoding on repeats
+        artifact = None
+        resume_hash = None
+        artifact_fields = {}
+        embedder_sig = embedder_signature(get_embedder_info().get("backend"), embedder)
+        # Chunking/segmentation, spaCy model and skill vocabulary are part of the signature:
+        # artifacts built with other settings are re-processed
+        artifact_signature = f"{embedder_sig}|{processing_signature(embedder, nlp)}"
+        
+        # OPTIMIZATION: each distinct text is parsed by spaCy once for this request
+        doc_context = DocumentContext(nlp) if nlp else None
+        
         # Parse resume based on input type
         if file:
             # Read uploaded file
@@ -322,24 +405,43 @@ async def analyze_resume(
             if not file.filename:
                 raise HTTPException(status_code=400, detail="Filename is required")
             
+            resume_hash = content_hash(contents)
+            artifact = await run_in_threadpool(load_resume_artifact, artifact_key(resume_hash, user_data['user_id']),
+                                               artifact_signature)
+            
             # Parse resume
             if file.filename and file.filename.endswith('.pdf'):
                 import io
-                resume_data = parse_resume_pdf(io.BytesIO(contents), nlp, embedder)
-                if not resume_data:
-                    raise HTTPException(status_code=400, detail="Failed to parse PDF resume")
-                
-                # ENTERPRISE VALIDATION: Validate parsed resume quality
-                is_valid, validation_issues = validate_resume_data(resume_data)
-                if not is_valid:
-                    logger.error(f"Resume validation failed: {validation_issues}")
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Resume quality check failed: {'; '.join(validation_issues[:3])}"
-                    )
+                if artifact is not None:
+                    resume_data = artifact.resume_data()
+                    logger.info(f"✅ Loaded processed resume artifact {resume_hash[:12]} (no PDF parsing)")
+                else:
+                    # OPTIMIZATION: embedding-heavy steps run in the threadpool so concurrent analyses can share encode batches
+                    resume_data = await run_model_work(parse_resume_pdf, io.BytesIO(contents), nlp, embedder,
+                                                       doc_context=doc_context)
+                    if not resume_data:
+                        raise HTTPException(status_code=400, detail="Failed to parse PDF resume")
+                    
+                    # ENTERPRISE VALIDATION: Validate parsed resume quality
+                    is_valid, validation_issues = validate_resume_data(resume_data)
+                    if not is_valid:
+                        logger.error(f"Resume validation failed: {validation_issues}")
+                        raise HTTPException(
+                            status_code=400, 
+                            detail=f"Resume quality check failed: {'; '.join(validation_issues[:3])}"
+                        )
+                    
+                    resume_sentences = resume_data.get('sentences') or []
+                    chunk_index = resume_data.get('chunk_index')
+                    segment_vectors = build_embedding_lookup(resume_sentences, resume_data.get('sentence_embeddings'))
+                    if chunk_index is not None:
+                        segment_vectors.update(build_embedding_lookup(chunk_index.chunks, chunk_index.embeddings))
+                    resume_vectors = resume_data.get('sentence_embeddings')
                 
                 # SANITIZATION: Clean data before processing
                 resume_data = sanitize_resume_data(resume_data)
+                artifact_fields = {k: resume_data.get(k) for k in
+                                   ('name', 'email', 'phone', 'entities', 'technical_skills', 'extraction_method')}
                 
                 resume_text = resume_data.get('text', '')
                 contacts = {
@@ -350,7 +452,7 @@ async def analyze_resume(
                 skills = resume_data.get('technical_skills', [])
                 
                 # OPTIMIZATION: Normalize skills using taxonomy
-                skills = skill_taxonomy.normalize_skill_list(skills)
+                skills = skill_taxonomy.normalize_skill_list(skills, nlp)
                 logger.info(f"✅ Normalized {len(skills)} unique skills")
                 
                 chunks = resume_data.get('chunks', [])
@@ -373,6 +475,9 @@ async def analyze_resume(
             resume_text = resume_text.strip()
             if len(resume_text) < 50:
                 raise HTTPException(status_code=400, detail="Resume text too short (minimum 50 characters)")
+            resume_hash = content_hash(resume_text)
+            artifact = await run_in_threadpool(load_resume_artifact, artifact_key(resume_hash, user_data['user_id']),
+                                               artifact_signature)
             
             # ENTERPRISE VALIDATION: Validate text quality
             text_valid, text_error = validate_text_quality(resume_text, min_length=50)
@@ -385,12 +490,32 @@ async def analyze_resume(
             chunks = []
             input_type = "text_input"
         
+        if artifact is not None:
+            chunks = artifact.chunks
+            chunk_vectors = artifact.chunk_embeddings
+            resume_sentences = artifact.sentences
+            resume_vectors = artifact.sentence_embeddings
+            segment_vectors = artifact.embedding_lookup()
+        
         # Normalize texts
         logger.info("🔄 Normalizing job description and resume text...")
         jd_normalized = normalize_text(jd_text)
         resume_normalized = normalize_text(resume_text)
+        if doc_context is not None:
+            if artifact is not None:
+                artifact.restore_docs(doc_context)
+            # OPTIMIZATION: one spaCy parse per request. The normalized text's sentences come from
+            # the resume text's Doc (already parsed for PDFs), declared before its first parse
+            doc_context.prepare(resume_text, ("sents",))
+            doc_context.derive(resume_normalized, resume_text, normalize_text)
         logger.info("✅ Text normalization completed")
         
+        # OPTIMIZATION: prompt enrichment signals computed once per JD / resume prefix (content-hash cached)
+        if artifact is not None:
+            seed_enrichment_context(artifact.enrichment)
+        jd_enrichment = enrichment_context(jd_normalized, "jd")
+        profile_enrichment, preview_enrichment = resume_enrichment_contexts(resume_normalized)
+        
         check_timeout()
         
         # Initialize resume_data for later use
@@ -408,37 +533,79 @@ async def analyze_resume(
         if not chunks:
             # Create chunks from resume text
             try:
-                chunks = semantic_chunk_text(resume_normalized, nlp, embedder, max_chars=800, overlap=200)
+                semantic = await run_model_work(semantic_chunk_with_embeddings, resume_normalized, nlp, embedder,
+                                                doc_context=doc_context)
+                chunks = semantic["chunks"]
+                chunk_vectors = semantic["chunk_embeddings"]
+                resume_vectors = semantic["sentence_embeddings"]
+                resume_sentences = semantic["sentences"]
+                segment_vectors = build_embedding_lookup(resume_sentences, resume_vectors)
+                segment_vectors.update(build_embedding_lookup(chunks, chunk_vectors))
                 logger.info(f"✅ Created {len(chunks)} semantic chunks")
             except Exception as e:
                 logger.warning(f"Semantic chunking failed, using basic chunking: {e}")
-                chunks = chunk_text(resume_normalized, max_chars=800, nlp=nlp)
+                chunks = token_chunk_text(resume_normalized, embedder) if embedder else \
+                    chunk_text(resume_normalized, max_chars=RESUME_CHUNK_MAX_CHARS, nlp=nlp)
                 logger.info(f"✅ Created {len(chunks)} basic chunks")
-            index, _ = build_index(embedder, chunks)
-            logger.info("✅ Search index built successfully")
+            chunk_index = ChunkIndex(chunks, embedder, chunk_vectors)
         else:
-            # Use chunks from PDF parsing and build index
-            index, _ = build_index(embedder, chunks)
-            logger.info(f"✅ Using {len(chunks)} pre-processed chunks from PDF")
+            # Use chunks (and their vectors) from PDF parsing or a stored artifact
+            if chunk_index is None or chunk_index.chunks != chunks:
+                # Sanitized chunks may differ in whitespace only: take their vectors from the lookup
+                if chunk_vectors is None and embedder and segment_vectors:
+                    chunk_vectors = encode_with_lookup(embedder, chunks, segment_vectors)
+                chunk_index = ChunkIndex(chunks, embedder, chunk_vectors)
+            logger.info(f"✅ Using {len(chunks)} pre-processed chunks from {'artifact' if artifact else 'PDF'}")
+        
+        # OPTIMIZATION: each chunk is encoded at most once per request; the FAISS index is only
+        # built if a consumer actually searches it
+        index = chunk_index
+        chunk_vectors = chunk_index.embeddings if embedder else None
+        logger.info("✅ Search index ready (built on first search)")
+        
+        # Evidence segments + token index: restored from the artifact, or built once and persisted
+        segment_index = None
+        if artifact is not None:
+            segment_index = artifact.segment_index()
+        elif RESUME_ARTIFACTS and embedder and resume_hash:
+            segment_index = SegmentIndex(segment_resume(resume_normalized, chunks, nlp, doc_context), resume_normalized)
+            if not artifact_fields:
+                artifact_fields = {'name': contacts.get('name'), 'email': contacts.get('email'),
+                                   'phone': contacts.get('phone')}
+            await run_in_threadpool(
+                save_resume_artifact, artifact_key(resume_hash, user_data['user_id']), artifact_signature, embedder, resume_normalized,
+                segment_index.segments, segment_index, source_text=resume_text, sentences=resume_sentences,
+                sentence_embeddings=resume_vectors, chunks=chunks, chunk_embeddings=chunk_vectors,
+                segment_vectors=segment_vectors, resume_data=artifact_fields, doc_context=doc_context,
+                enrichment=[profile_enrichment.to_dict(), preview_enrichment.to_dict()]
+            )
         
         # Get JD requirements
+        # OPTIMIZATION: local extraction (cached per JD) without Gemini or in "local" mode;
+        # the LLM plan/atomicize prompts refine requirements when enabled
         logger.info("🔄 Analyzing job description requirements...")
-        if model:
-            jd_plan = llm_json(model, jd_plan_prompt, {"jd": jd_normalized, "preview": resume_normalized[:1000]})
+        use_llm_requirements = bool(model) and req_mode == "llm"
+        local_requirements = None
+        nice_reqs = []
+        if use_llm_requirements:
+            jd_plan = llm_json(model, jd_plan_prompt, {"jd": jd_normalized,
+                                                       "preview": resume_normalized[:RESUME_PREVIEW_CHARS],
+                                                       "jd_context": jd_enrichment, "resume_context": preview_enrichment})
             raw_reqs = jd_plan.get("requirements", []) if jd_plan else []
             logger.info(f"✅ Extracted {len(raw_reqs)} job requirements")
         else:
-            # Fallback when LLM not available - extract basic requirements from JD text
-            logger.warning("LLM not available, using basic requirement extraction")
-            jd_plan = {"requirements": ["basic technical skills"], "role_title": "Software Developer"}
-            raw_reqs = ["Python", "JavaScript", "SQL", "Git", "problem solving", "communication"]
-            logger.info("✅ Using fallback requirements extraction")
+            if not model:
+                logger.warning("LLM not available, using local requirement extraction")
+            local_requirements = await run_model_work(extract_requirements_local, jd_text, nlp)
+            jd_plan = local_requirement_plan(local_requirements)
+            raw_reqs = jd_plan["requirements"]
+            logger.info(f"✅ Extracted {len(raw_reqs)} job requirements locally")
         
         check_timeout()
         
         # Atomicize requirements - extract from structured response
         logger.info("🔄 Breaking down requirements into atomic components...")
-        if model:
+        if use_llm_requirements:
             atoms_result = llm_json(model, atomicize_requirements_prompt, {"jd": jd_normalized, "resume_preview": resume_normalized[:1000]})
             
             # Extract requirements from structured response (hard_skills, fundamentals, experience, qualifications)
@@ -478,37 +645,52 @@ async def analyze_resume(
                 logger.info(f"✅ Extracted {len(all_must_reqs)} must-have and {len(all_nice_reqs)} nice-to-have requirements")
                 logger.info(f"   Hard skills (must): {len(hard_skills_must)}, Fundamentals (must): {len(fundamentals_must)}")
             else:
-                atomic_reqs = []
-                logger.warning("⚠️ Failed to extract atomic requirements from LLM response")
+                # ROBUSTNESS: fall back to the local extractor instead of scoring no requirements
+                logger.warning("⚠️ Failed to extract atomic requirements from LLM response, using local extraction")
+                local_requirements = await run_model_work(extract_requirements_local, jd_text, nlp)
+                atoms_result = local_requirements
+                atomic_reqs, nice_reqs = local_requirements["must"], local_requirements["nice"]
         else:
-            # Fallback - use raw requirements as atomic requirements
-            atomic_reqs = [{"requirement": req, "req_type": "hard_skill", "priority": "must"} for req in raw_reqs]
+            atoms_result = local_requirements
+            atomic_reqs, nice_reqs = local_requirements["must"], local_requirements["nice"]
+            logger.info(f"✅ {len(atomic_reqs)} must-have and {len(nice_reqs)} nice-to-have requirements")
+        
+        # OPTIMIZATION: Estimate experience locally from date ranges / DATE entities;
+        # the LLM is only asked for experience when the estimate is not confident
+        experience_estimate = await run_in_threadpool(
+            estimate_experience, resume_text, (artifact_fields.get('entities') or {}).get('dates'))
         
         # Get resume profile (skip if we already have skills from PDF parsing)
         if not skills:
             if model:
-                profile_result = llm_json(model, resume_profile_prompt, {"full_resume_text": resume_normalized})
+                profile_result = llm_json(model, resume_profile_prompt, {"full_resume_text": resume_normalized,
+                                                                        "resume_context": profile_enrichment})
                 skills = profile_result.get("skills", []) if profile_result else []
-                experience_years = profile_result.get("experience_years", 0) if profile_result else 0
+                experience_years = resolve_experience_years(profile_result, experience_estimate, default=0)
             else:
                 # Fallback - extract basic skills from resume text
                 logger.warning("LLM not available, using basic skill extraction")
                 basic_skills = ["Python", "JavaScript", "HTML", "CSS", "SQL"]  # Common fallback skills
                 skills = [skill for skill in basic_skills if skill.lower() in resume_normalized.lower()]
-                experience_years = 2  # Default fallback
+                experience_years = resolve_experience_years(None, experience_estimate)
                 profile_result = {"skills": skills, "experience_years": experience_years}
         else:
             # We have skills from PDF parsing, just get experience years
-            if model:
-                profile_result = llm_json(model, resume_profile_prompt, {"full_resume_text": resume_normalized})
-                experience_years = profile_result.get("experience_years", 0) if profile_result else 0
+            if model and not is_confident(experience_estimate):
+                profile_result = llm_json(model, resume_profile_prompt, {"full_resume_text": resume_normalized,
+                                                                        "resume_context": profile_enrichment})
+                experience_years = resolve_experience_years(profile_result, experience_estimate, default=0)
             else:
-                experience_years = 2  # Default fallback
+                if model:
+                    logger.info(f"✅ Experience estimated locally ({experience_estimate['confidence']:.2f} confidence), "
+                                f"skipping LLM profile call")
+                experience_years = resolve_experience_years(None, experience_estimate)
                 profile_result = {"skills": skills, "experience_years": experience_years}
         
         # Compute scores
         logger.info("🔄 Computing semantic similarity scores...")
-        global_score = compute_global_semantic(jd_normalized, resume_normalized, embedder)
+        global_score = await run_model_work(compute_global_semantic, jd_normalized, resume_normalized, embedder,
+                                            resume_embeddings=resume_vectors)
         logger.info(f"✅ Global semantic score: {global_score:.3f}")
         
         # Extract requirement strings - atomic_reqs is already a list of strings
@@ -521,8 +703,10 @@ async def analyze_resume(
             
         # evaluate_requirement_coverage new signature: (atomic_reqs, resume_text, resume_chunks, embedder, model, faiss_index, nlp, jd_text)
         logger.info("🔄 Evaluating requirement coverage...")
-        coverage_result = evaluate_requirement_coverage(
-            req_strings, resume_normalized, chunks, embedder, model, index, nlp, jd_normalized
+        coverage_result = await run_model_work(
+            evaluate_requirement_coverage, req_strings, resume_normalized, chunks, embedder, model, index, nlp, jd_normalized,
+            doc_context=doc_context, segment_vectors=segment_vectors, fast_embedder=get_fast_embedder(),
+            segment_index=segment_index, requirement_vectors=get_embedding_bank(), nice_reqs=nice_reqs
         )
         coverage_score = coverage_result.get("overall", 0.0)
         coverage_details = coverage_result
@@ -750,7 +934,8 @@ async def analyze_resume(
                 'entities': resume_data.get('entities', {}),
                 'technical_skills': skills,
                 'experience': [{"years": experience_years}],
-                'projects': []
+                'projects': [],
+                'content_hash': resume_hash
             }
         else:
             # For text resumes (file upload or direct input), create basic structure
@@ -763,7 +948,8 @@ async def analyze_resume(
                 'entities': {},
                 'technical_skills': skills,
                 'experience': [{"years": experience_years}],
-                'projects': []
+                'projects': [],
+                'content_hash': resume_hash
             }
         
         analysis_data = {
@@ -804,6 +990,12 @@ async def analyze_resume(
         )
         logger.info(f"✅ Analysis saved - Resume ID: {resume_id}, Analysis ID: {analysis_id}")
         
+        # OPTIMIZATION: incremental update of the user's cross-candidate index. The stored chunks are
+        # encoded as the back-fill encodes them, so every indexed resume shares one representation
+        if resume_id and embedder:
+            await run_model_work(index_resume, user_data['user_id'], resume_id, parsed_resume.get('chunks'),
+                                 embedder, embedder_sig, text=(parsed_resume.get('text', '') or '')[:10000])
+        
         # Calculate total processing time
         total_time = time.time() - start_time
         logger.info(f"🎉 Analysis completed successfully in {total_time:.2f}s for request {request_id}")
@@ -837,6 +1029,7 @@ async def analyze_resume(
                 "recommendation": recommendation,
                 "skills": skills,
                 "experience_years": experience_years,
+                "experience_estimate": experience_estimate,
                 "must_have_coverage": coverage_summary["must_percent"],
                 "nice_to_have_coverage": coverage_summary["nice_percent"],
                 "final_score_percent": score_breakdown["final_score_percent"],
@@ -877,6 +1070,60 @@ async def get_analyses(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/candidates/search")
+async def search_candidates(
+    request: CandidateSearchRequest,
+    user_data: dict = Depends(verify_token)
+):
+    """
+    Rank all of the user's stored resumes against a job description (jd_text, or the
+    JD of an existing analysis_id) using the persistent candidate index.
+    Returns the top candidates with their best-matching evidence chunks.
+    """
+    if not db_ok:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    if embedder is None:
+        raise HTTPException(status_code=503, detail="Embedding model unavailable")
+    
+    jd_text = (request.jd_text or "").strip()
+    if not jd_text and request.analysis_id is not None:
+        jd_text = (get_analysis_jd(db_conn, db_ok, user_data['user_id'], request.analysis_id) or "").strip()
+        if not jd_text:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+    if len(jd_text) < 50:
+        raise HTTPException(status_code=400, detail="Provide jd_text (minimum 50 characters) or analysis_id")
+    
+    top_n = max(1, min(request.top_n, 100))
+    evidence = max(1, min(request.evidence_per_candidate, 10))
+    start = time.time()
+    try:
+        signature = embedder_signature(get_embedder_info().get("backend"), embedder)
+        result = await run_model_work(rank_candidates, db_conn, db_ok, user_data['user_id'],
+                                      normalize_text(jd_text), embedder, signature, top_n, evidence,
+                                      model_work=model_work_from_thread(asyncio.get_running_loop()))
+    except Exception as e:
+        logger.error(f"❌ Candidate search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Candidate search failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "processing_time_seconds": round(time.time() - start, 3),
+        **result
+    }
+
+@app.post("/api/admin/taxonomy/reload")
+async def reload_skill_taxonomy(user_data: dict = Depends(verify_admin)):
+    """
+    Recompile the skill taxonomy file and swap it in without a restart.
+    Applies to the worker serving the request; set SKILL_TAXONOMY_WATCH_SECONDS
+    to have every worker pick up file changes on its own.
+    """
+    snapshot, error = await run_in_threadpool(reload_taxonomy)
+    if error:
+        raise HTTPException(status_code=422, detail=f"Taxonomy reload failed, previous taxonomy kept: {error}")
+    logger.info(f"✅ Skill taxonomy reloaded by {user_data.get('email')}")
+    return {"success": True, "taxonomy": snapshot.stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=False)
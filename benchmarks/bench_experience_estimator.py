@@ -0,0 +1,83 @@
+"""
+Experience Estimator Benchmark
+Runs the local (no-LLM) years-of-experience estimate over resume layouts with known answers.
+
+Usage: python -m benchmarks.bench_experience_estimator [--repeat N]
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import date
+
+from modules.experience_estimator import estimate_experience, is_confident
+
+TODAY = date(2026, 3, 1)
+
+# (name, resume text, expected years, expected method)
+LAYOUTS = [
+    ("title_case_roles_under_headings", """Jane Doe
+EXPERIENCE
+Senior Engineer
+Jan 2019 – Present
+Software Engineer
+Jun 2016 – Dec 2018
+EDUCATION
+BS Computer Science
+2012 – 2016
+""", 9.7, "experience_sections"),
+    ("colon_headings_inline_dates", """John Smith
+Work Experience:
+Acme Corp | Backend Engineer | 03/2020 - 02/2024
+Globex | Intern | 06/2019 - 08/2019
+Education:
+B.Tech Computer Science, XYZ University, 2015 - 2019
+""", 4.1, "experience_sections"),
+    ("overlapping_roles", """PROFESSIONAL EXPERIENCE
+Staff Engineer
+Initech, March 2018 to Present
+Freelance Consultant
+Self-employed, 2020 - 2022
+Skills
+Python, Go, Kubernetes
+""", 8.0, "experience_sections"),
+    ("projects_only", """Summary
+Recent graduate with 1 year of experience in web development.
+Projects
+Chat application (2024 - 2025)
+Education
+MSc Software Engineering
+2022 - 2024
+""", 1.0, "date_ranges"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+
+    report = []
+    for name, text, expected_years, expected_method in LAYOUTS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            estimate = estimate_experience(text, today=TODAY)
+        elapsed_ms = (time.perf_counter() - start) / repeat * 1000.0
+        report.append({
+            "layout": name,
+            "years": estimate["years"],
+            "expected_years": expected_years,
+            "method": estimate["method"],
+            "confidence": estimate["confidence"],
+            "skips_llm": is_confident(estimate),
+            "ms": round(elapsed_ms, 3),
+            "ok": abs(estimate["years"] - expected_years) <= 0.1 and estimate["method"] == expected_method,
+        })
+    print(json.dumps(report, indent=2))
+    if not all(row["ok"] for row in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
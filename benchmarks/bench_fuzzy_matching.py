@@ -0,0 +1,52 @@
+"""
+Fuzzy Matching Benchmark
+Compares SegmentFuzzyIndex modes against the legacy SequenceMatcher scores.
+
+Usage: python -m benchmarks.bench_fuzzy_matching [resume.txt]
+"""
+import sys
+import json
+
+from modules.fuzzy_matching import compare_with_sequence_matcher, FUZZY_MODES
+
+SAMPLE_RESUME = """
+Senior Software Engineer with 7 years of experience building backend services in Python and Java.
+Designed and deployed microservices on Kubernetes with Docker, Helm and GitHub Actions CI/CD pipelines.
+Built REST APIs with FastAPI and Django REST Framework serving 2M requests per day.
+Led migration of a monolithic Spring Boot application to event-driven architecture using Kafka.
+Implemented data pipelines in Apache Airflow and Spark processing 5TB of logs daily.
+Trained and deployed machine learning models with PyTorch and scikit-learn for fraud detection.
+Optimized PostgreSQL queries and Redis caching, reducing p95 latency by 40%.
+Mentored a team of 5 engineers and ran agile sprint planning with Jira.
+Provisioned AWS infrastructure (EC2, S3, Lambda, RDS) with Terraform and Ansible.
+Wrote unit and integration tests with pytest and JUnit, reaching 90% coverage.
+Built React and TypeScript dashboards for internal analytics with Redux state management.
+Monitored production systems with Prometheus, Grafana and the ELK stack.
+"""
+
+SAMPLE_REQUIREMENTS = [
+    "Python", "Java", "Kubernetes", "Docker", "CI/CD pipelines", "REST API design",
+    "Kafka", "Apache Spark", "machine learning", "PyTorch", "PostgreSQL", "Redis",
+    "AWS", "Terraform", "unit testing", "React", "TypeScript", "monitoring with Prometheus",
+    "team leadership", "agile methodology",
+]
+
+
+def _segments(text):
+    return [" ".join(line.split()) for line in text.splitlines() if len(line.strip()) >= 18]
+
+
+def main():
+    text = SAMPLE_RESUME
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as fh:
+            text = fh.read()
+    segments = _segments(text)
+    for mode in FUZZY_MODES:
+        if mode == "sequence":
+            continue
+        print(json.dumps(compare_with_sequence_matcher(SAMPLE_REQUIREMENTS, segments, mode=mode), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Technical Keyword Matcher Benchmark
+Compares the compiled keyword TermSet against the legacy per-keyword regex scan.
+
+Usage: python -m benchmarks.bench_keyword_matcher [resume.txt] [--repeat N]
+"""
+import re
+import json
+import time
+import argparse
+
+from modules.text_processing import TECHNICAL_KEYWORDS, TECHNICAL_KEYWORD_MATCHER
+from benchmarks.bench_fuzzy_matching import SAMPLE_RESUME
+
+
+def legacy_keyword_scan(text_lower):
+    """Previous extract_technical_skills strategy 1: one regex search per keyword."""
+    found = set()
+    for keyword in TECHNICAL_KEYWORDS:
+        pattern = r'\b' + re.escape(keyword) + r'\b'
+        if re.search(pattern, text_lower, re.IGNORECASE):
+            found.add(keyword)
+    return found
+
+
+def _time(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(text)
+    return (time.perf_counter() - start) / repeat * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("resume", nargs="?", help="plain-text resume (defaults to a built-in sample)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+    text = SAMPLE_RESUME
+    if args.resume:
+        with open(args.resume, encoding="utf-8") as fh:
+            text = fh.read()
+
+    report = []
+    for scale in (1, 4, 16):
+        sample = (text * scale).lower()
+        legacy_ms, legacy_hits = _time(legacy_keyword_scan, sample, repeat)
+        matcher_ms, matcher_hits = _time(TECHNICAL_KEYWORD_MATCHER.matched, sample, repeat)
+        report.append({
+            "chars": len(sample),
+            "keywords": len(TECHNICAL_KEYWORDS),
+            "legacy_ms": round(legacy_ms, 3),
+            "matcher_ms": round(matcher_ms, 3),
+            "speedup": round(legacy_ms / matcher_ms, 2) if matcher_ms else None,
+            "hits": len(matcher_hits),
+            "identical": legacy_hits == matcher_hits,
+            "only_legacy": sorted(legacy_hits - matcher_hits),
+            "only_matcher": sorted(matcher_hits - legacy_hits),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,154 +5,9 @@ Maps common technical abbreviations to their full forms and vice versa
 import re
 from typing import Set, List, Dict
 
-# Comprehensive abbreviation dictionary
-ABBREVIATION_MAP = {
-    # Computer Science Fundamentals
-    "os": ["operating systems", "operating system"],
-    "operating systems": ["os"],
-    "operating system": ["os"],
-    
-    "dbms": ["database management systems", "database management system"],
-    "database management systems": ["dbms"],
-    "database management system": ["dbms"],
-    
-    "cn": ["computer networks", "computer networking"],
-    "computer networks": ["cn"],
-    "computer networking": ["cn"],
-    
-    "ds": ["data structures"],
-    "data structures": ["ds"],
-    
-    "algo": ["algorithms"],
-    "algorithms": ["algo"],
-    
-    "oops": ["object oriented programming", "oop"],
-    "oop": ["object oriented programming", "oops"],
-    "object oriented programming": ["oop", "oops"],
-    
-    # Programming Languages
-    "js": ["javascript"],
-    "javascript": ["js"],
-    
-    "ts": ["typescript"],
-    "typescript": ["ts"],
-    
-    "py": ["python"],
-    "python": ["py"],
-    
-    # Frameworks & Libraries
-    "react.js": ["react", "reactjs"],
-    "reactjs": ["react", "react.js"],
-    "react": ["reactjs", "react.js"],
-    
-    "node.js": ["node", "nodejs"],
-    "nodejs": ["node", "node.js"],
-    "node": ["nodejs", "node.js"],
-    
-    "next.js": ["nextjs"],
-    "nextjs": ["next.js"],
-    
-    "vue.js": ["vue", "vuejs"],
-    "vuejs": ["vue", "vue.js"],
-    "vue": ["vuejs", "vue.js"],
-    
-    # Databases
-    "postgres": ["postgresql"],
-    "postgresql": ["postgres"],
-    
-    "mongo": ["mongodb"],
-    "mongodb": ["mongo"],
-    
-    "db": ["database"],
-    "database": ["db"],
-    
-    "sql": ["structured query language"],
-    "structured query language": ["sql"],
-    
-    "nosql": ["no-sql", "no sql"],
-    
-    # Cloud & DevOps
-    "aws": ["amazon web services"],
-    "amazon web services": ["aws"],
-    
-    "gcp": ["google cloud platform"],
-    "google cloud platform": ["gcp"],
-    
-    "k8s": ["kubernetes"],
-    "kubernetes": ["k8s"],
-    
-    "ci/cd": ["continuous integration continuous deployment", "ci cd", "cicd"],
-    "cicd": ["ci/cd", "ci cd"],
-    
-    # Machine Learning & AI
-    "ml": ["machine learning"],
-    "machine learning": ["ml"],
-    
-    "ai": ["artificial intelligence"],
-    "artificial intelligence": ["ai"],
-    
-    "dl": ["deep learning"],
-    "deep learning": ["dl"],
-    
-    "nlp": ["natural language processing"],
-    "natural language processing": ["nlp"],
-    
-    "cv": ["computer vision"],
-    "computer vision": ["cv"],
-    
-    # API & Architecture
-    "rest": ["restful", "rest api", "restful api"],
-    "restful": ["rest", "rest api"],
-    "rest api": ["rest", "restful"],
-    
-    "api": ["application programming interface"],
-    "application programming interface": ["api"],
-    
-    # Testing
-    "tdd": ["test driven development"],
-    "test driven development": ["tdd"],
-    
-    "bdd": ["behavior driven development"],
-    "behavior driven development": ["bdd"],
-    
-    # Version Control
-    "vcs": ["version control system"],
-    "version control system": ["vcs"],
-    
-    # Mobile
-    "ios": ["iphone os"],
-    "iphone os": ["ios"],
-    
-    # Web Technologies
-    "html": ["hypertext markup language"],
-    "hypertext markup language": ["html"],
-    
-    "css": ["cascading style sheets"],
-    "cascading style sheets": ["css"],
-    
-    "http": ["hypertext transfer protocol"],
-    "hypertext transfer protocol": ["http"],
-    
-    "https": ["hypertext transfer protocol secure"],
-    "hypertext transfer protocol secure": ["https"],
-}
+from modules.skill_taxonomy import get_taxonomy
 
-# Skill synonyms and variations
-SKILL_SYNONYMS = {
-    "react": ["react.js", "reactjs", "react 18", "react 17", "react 16"],
-    "node": ["node.js", "nodejs"],
-    "python": ["python 3", "python 3.x", "python 2", "py"],
-    "java": ["java 8", "java 11", "java 17", "jdk"],
-    "docker": ["docker container", "docker compose"],
-    "kubernetes": ["k8s", "k8s cluster"],
-    "postgresql": ["postgres", "postgres db"],
-    "mongodb": ["mongo", "mongo db"],
-    "aws": ["amazon web services", "aws cloud"],
-    "azure": ["microsoft azure", "azure cloud"],
-    "spring": ["spring boot", "spring framework", "spring mvc"],
-    "django": ["django rest", "django rest framework"],
-    "flask": ["flask api"],
-}
+WORD_EDGE = re.compile(r"^\w(?:.*\w)?$")
 
 
 def normalize_term(term: str) -> str:
@@ -167,27 +22,53 @@ def normalize_term(term: str) -> str:
     return term
 
 
+def _lookup_keys(term: str):
+    """Keys a term is looked up under: its normalized form and its raw lowercase form."""
+    return {k for k in (normalize_term(term), term.lower().strip()) if k}
+
+
+def term_classes(term: str) -> frozenset:
+    """
+    Equivalence class ids of a term. Terms outside the skill taxonomy form their own
+    class (the id is the lookup key itself), so two terms match iff their ids intersect.
+    """
+    if not term:
+        return frozenset()
+    term_class = get_taxonomy().term_class
+    return frozenset(term_class.get(key, key) for key in _lookup_keys(term))
+
+
 def get_all_forms(term: str) -> Set[str]:
     """
     Get all equivalent forms of a term (abbreviations and full forms).
     Returns a set including the original term and all its mappings.
     """
-    normalized = normalize_term(term)
-    forms = {normalized, term.lower()}
-    
-    # Check abbreviation map
-    if normalized in ABBREVIATION_MAP:
-        forms.update([f.lower() for f in ABBREVIATION_MAP[normalized]])
-    
-    # Check skill synonyms
-    for base_skill, variations in SKILL_SYNONYMS.items():
-        if normalized == base_skill or normalized in [v.lower() for v in variations]:
-            forms.add(base_skill)
-            forms.update([v.lower() for v in variations])
-    
+    if not term:
+        return set()
+    forms = {normalize_term(term), term.lower()}
+    class_forms = get_taxonomy().class_forms
+    for class_id in term_classes(term):
+        forms.update(class_forms.get(class_id, ()))
     return forms
 
 
+def forms_in_text(forms, text: str) -> bool:
+    """
+    True when any form occurs in (lowercase) `text`. Word-edged forms must match whole
+    words ("go" not in "good", "kube" not in "kubelet"); forms starting or ending with a
+    symbol ("c++", ".net") keep substring semantics (\\b needs a word character beside them).
+    """
+    from modules.text_processing import compile_terms
+
+    if not text:
+        return False
+    forms = [f for f in forms if f]
+    worded = tuple(sorted(f for f in forms if WORD_EDGE.match(f)))
+    symbolic = tuple(sorted(f for f in forms if not WORD_EDGE.match(f)))
+    return compile_terms(worded, word_boundaries=True).search(text) or \
+        compile_terms(symbolic, word_boundaries=False).search(text)
+
+
 def terms_match(term1: str, term2: str) -> bool:
     """
     Check if two terms match, considering abbreviations and synonyms.
@@ -195,42 +76,30 @@ def terms_match(term1: str, term2: str) -> bool:
     """
     if not term1 or not term2:
         return False
-    
-    # Direct match
-    if normalize_term(term1) == normalize_term(term2):
-        return True
-    
-    # Check if they share any equivalent forms
-    forms1 = get_all_forms(term1)
-    forms2 = get_all_forms(term2)
-    
-    return bool(forms1 & forms2)
+    return bool(term_classes(term1) & term_classes(term2))
 
 
-def deduplicate_requirements(requirements: List[str]) -> List[str]:
+def deduplicate_requirements(requirements: List[str], nlp=None) -> List[str]:
     """
     Remove duplicate requirements considering abbreviations and synonyms.
-    Keep the most specific/complete form.
+    Keeps the first requirement of each equivalence class (single pass).
+    Canonical atom forms (memoized, batch-lemmatized with `nlp`) also count as a
+    class, so inflections like "data structures" / "data structure" collapse too.
     """
     if not requirements:
         return []
+    from modules.text_processing import canonical_atoms
     
     unique = []
-    seen_forms = set()
+    seen_classes = set()
+    canonicals = canonical_atoms(requirements, nlp)
     
-    for req in requirements:
-        req_normalized = normalize_term(req)
-        
-        # Get all equivalent forms
-        req_forms = get_all_forms(req)
-        
-        # Check if any form has been seen
-        if any(form in seen_forms for form in req_forms):
+    for req, canonical in zip(requirements, canonicals):
+        req_classes = term_classes(req) | ({canonical} if canonical else set())
+        if not req_classes or not seen_classes.isdisjoint(req_classes):
             continue
-        
-        # Add to unique list
         unique.append(req)
-        seen_forms.update(req_forms)
+        seen_classes.update(req_classes)
     
     return unique
 
@@ -303,47 +172,34 @@ def match_requirements_to_resume(
     matched = []
     missing = []
     
-    # Normalize inputs
-    jd_reqs_normalized = [normalize_term(r) for r in jd_requirements]
-    resume_skills_normalized = [normalize_term(s) for s in resume_skills]
+    # OPTIMIZATION: each side reduced to equivalence class ids once; matching is set intersection
+    resume_classes = set()
+    for skill in resume_skills:
+        resume_classes.update(term_classes(skill))
+    jd_classes = set()
     
     # Build resume text for fuzzy matching
-    resume_text_normalized = resume_text.lower() if resume_text else " ".join(resume_skills_normalized)
+    resume_text_normalized = resume_text.lower() if resume_text else ""
     
     # Match each JD requirement
     for jd_req in jd_requirements:
-        jd_req_norm = normalize_term(jd_req)
-        is_matched = False
+        req_classes = term_classes(jd_req)
+        jd_classes.update(req_classes)
         
         # Check direct match or abbreviation match
-        for resume_skill in resume_skills:
-            if terms_match(jd_req, resume_skill):
-                matched.append(jd_req)
-                is_matched = True
-                break
+        is_matched = not resume_classes.isdisjoint(req_classes)
         
         # If not matched, check in full resume text
-        if not is_matched and resume_text:
-            jd_forms = get_all_forms(jd_req)
-            for form in jd_forms:
-                if form in resume_text_normalized:
-                    matched.append(jd_req)
-                    is_matched = True
-                    break
+        if not is_matched and resume_text_normalized:
+            is_matched = forms_in_text(get_all_forms(jd_req), resume_text_normalized)
         
-        if not is_matched:
+        if is_matched:
+            matched.append(jd_req)
+        else:
             missing.append(jd_req)
     
     # Find additional skills in resume not in JD
-    additional = []
-    for resume_skill in resume_skills:
-        is_in_jd = False
-        for jd_req in jd_requirements:
-            if terms_match(resume_skill, jd_req):
-                is_in_jd = True
-                break
-        if not is_in_jd:
-            additional.append(resume_skill)
+    additional = [skill for skill in resume_skills if jd_classes.isdisjoint(term_classes(skill))]
     
     return {
         "matched": deduplicate_requirements(matched),
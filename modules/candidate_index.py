@@ -0,0 +1,493 @@
+"""
+Persistent Cross-Candidate Vector Index
+Per-user inverted-file (IVF) index over the chunk embeddings of every stored resume,
+searched directly on the int8 memory-mapped VectorStore, for ranking a whole pool against one JD
+"""
+import os
+import math
+import logging
+import tempfile
+import threading
+import numpy as np
+
+from modules.database import get_user_resume_ids, get_resume_chunks, acquire_connection, release_connection
+from modules.vector_store import VectorStore
+from modules.text_processing import token_chunk_text
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR",
+                                os.path.join(tempfile.gettempdir(), "resume_screener_candidates"))
+CANDIDATE_IVF_MIN_ROWS = int(os.getenv("CANDIDATE_IVF_MIN_ROWS", "20000"))  # smaller stores are scanned exactly
+CANDIDATE_IVF_NLIST = int(os.getenv("CANDIDATE_IVF_NLIST", "0"))  # 0 = about 4 * sqrt(rows) at training time
+CANDIDATE_IVF_NPROBE = int(os.getenv("CANDIDATE_IVF_NPROBE", "16"))
+KMEANS_ITERATIONS = 12
+KMEANS_SAMPLE_ROWS = 50000
+SCAN_BLOCK_ROWS = 8192
+MAX_QUERY_WINDOWS = 16
+SYNC_ENCODE_BATCH = 256  # resumes fetched/encoded per step when back-filling from the database
+
+
+def chunk_spans(chunks, text):
+    """(start, end) char offsets of each chunk in `text`, (-1, -1) when not found verbatim."""
+    spans = []
+    cursor = 0
+    for chunk in chunks or []:
+        start = text.find(chunk, cursor) if text and chunk else -1
+        if start < 0 and text and chunk:
+            start = text.find(chunk)
+        if start < 0:
+            spans.append((-1, -1))
+        else:
+            spans.append((start, start + len(chunk)))
+            cursor = start + 1
+    return spans
+
+
+def _nearest(vectors, centroids):
+    """Index of the most similar centroid for each row (inner product), in blocks."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for lo in range(0, len(vectors), SCAN_BLOCK_ROWS):
+        block = np.asarray(vectors[lo:lo + SCAN_BLOCK_ROWS], dtype=np.float32)
+        assign[lo:lo + len(block)] = (block @ centroids.T).argmax(axis=1)
+    return assign
+
+
+def train_centroids(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means over unit vectors: the coarse quantizer of the IVF index."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = _nearest(vectors, centroids)
+        counts = np.bincount(assign, minlength=nlist)
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        sums[counts > 0] = np.add.reduceat(vectors[order], starts[counts > 0], axis=0)
+        # Empty lists are re-seeded from random rows instead of staying dead
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class CandidateIndex:
+    """
+    IVF index over one user's resume chunks, layered on a VectorStore.
+
+    The int8 vectors stay in the store's memory maps, shared read-only by every worker;
+    the index adds two small files per store generation next to them:
+      ivf-<gen>.centroids.npy   (nlist, dim) float32 coarse centroids, trained once the store
+                                holds CANDIDATE_IVF_MIN_ROWS rows (and again after compaction)
+      ivf-<gen>.lists.log       int32 list id of every vector id, appended as rows arrive
+    A query probes the nearest lists and scores their rows exactly on the int8 codes; rows
+    not assigned to a list yet, and stores below the training threshold, are scanned in
+    full. Per-worker memory is the centroids plus mapped list ids, never a vector copy.
+    Deleted resumes are tombstoned in the store and filtered at query time.
+    """
+
+    def __init__(self, key, signature):
+        self.key = key
+        self.signature = signature
+        self.directory = os.path.join(CANDIDATE_INDEX_DIR, key)
+        self.store = VectorStore.open_existing(self.directory, signature)
+        self.centroids = None
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._ivf_generation = None
+        self.unindexable = set()  # stored resumes without usable chunks, skipped by back-fill
+        self.lock = threading.RLock()
+        if self.store is not None:
+            self.refresh()
+            logger.info(f"✅ Loaded candidate index {self.key} ({len(self.store)} vectors, "
+                        f"{self.live_resume_count} resumes)")
+
+    @classmethod
+    def load(cls, key, signature):
+        return cls(key, signature)
+
+    # ---- persistence -------------------------------------------------------
+
+    def _ivf_path(self, generation, name):
+        return os.path.join(self.directory, f"ivf-{generation}.{name}")
+
+    def refresh(self):
+        """Remap the store, centroids and list ids (other workers append and compact)."""
+        self.store.refresh()
+        generation = self.store.generation
+        if generation != self._ivf_generation or self.centroids is None:
+            try:
+                self.centroids = np.load(self._ivf_path(generation, "centroids.npy"))
+            except (OSError, ValueError):
+                self.centroids = None
+            self._ivf_generation = generation
+            self._lists = np.zeros(0, dtype=np.int32)
+        lists_path = self._ivf_path(generation, "lists.log")
+        rows = min(os.path.getsize(lists_path) // 4, len(self.store)) if os.path.exists(lists_path) else 0
+        if self.centroids is None:
+            rows = 0
+        if rows != len(self._lists):
+            self._lists = np.memmap(lists_path, dtype="<i4", mode="r", shape=(rows,)) \
+                if rows else np.zeros(0, dtype=np.int32)
+
+    def _drop_stale_centroids(self):
+        for name in os.listdir(self.directory):
+            if name.startswith("ivf-") and name.endswith(".npy") \
+                    and not name.startswith(f"ivf-{self.store.generation}."):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _assign_pending(self):
+        """Append list ids for rows added since the last assignment (caller holds the store lock)."""
+        self.refresh()
+        if self.centroids is None or len(self._lists) >= len(self.store):
+            return 0
+        start, rows = len(self._lists), len(self.store)
+        assign = np.concatenate([
+            _nearest(self.store.vectors(np.arange(lo, min(lo + SCAN_BLOCK_ROWS, rows))), self.centroids)
+            for lo in range(start, rows, SCAN_BLOCK_ROWS)])
+        with open(self._ivf_path(self.store.generation, "lists.log"), "ab") as f:
+            f.truncate(start * 4)  # ROBUSTNESS: drop ids past the last complete assignment
+            f.write(assign.astype("<i4").tobytes())
+        self.refresh()
+        return len(assign)
+
+    def train(self):
+        """
+        Train the coarse centroids once the store is large enough (no-op otherwise, or when
+        this generation already has them) and assign every row. Returns True if trained.
+        """
+        with self.lock:
+            if not self.needs_training:
+                return False
+            rows, generation = len(self.store), self.store.generation
+            live = np.flatnonzero(self.store.live_mask())
+            sample = np.random.default_rng(0).choice(live, min(len(live), KMEANS_SAMPLE_ROWS), replace=False)
+            sample_vectors = self.store.vectors(np.sort(sample))
+        # k-means runs outside both locks: searches and other workers' appends carry on meanwhile
+        nlist = CANDIDATE_IVF_NLIST or int(4 * math.sqrt(rows))
+        nlist = max(1, min(nlist, len(sample) // 39 or 1))  # ~39 training rows per list at least
+        centroids = train_centroids(sample_vectors, nlist)
+
+        with self.lock:
+            with self.store.locked():
+                self.refresh()
+                if self.store.generation != generation or self.centroids is not None:
+                    return False  # compacted or trained by another worker meanwhile
+                open(self._ivf_path(generation, "lists.log"), "wb").close()
+                tmp_path = self._ivf_path(generation, f"centroids.{os.getpid()}.tmp.npy")
+                np.save(tmp_path, centroids)
+                os.replace(tmp_path, self._ivf_path(generation, "centroids.npy"))
+                self._drop_stale_centroids()
+                self._ivf_generation = None
+                assigned = self._assign_pending()
+        logger.info(f"✅ Trained candidate index {self.key}: {nlist} lists over {assigned} vectors")
+        return True
+
+    # ---- updates -----------------------------------------------------------
+
+    @property
+    def needs_training(self):
+        if self.store is None:
+            return False
+        self.refresh()
+        return self.centroids is None and len(self.store) >= max(CANDIDATE_IVF_MIN_ROWS, 1)
+
+    @property
+    def indexed(self):
+        if self.store is None:
+            return frozenset()
+        return self.store.resume_ids
+
+    @property
+    def tombstones(self):
+        return set(self.store.tombstones) if self.store is not None else set()
+
+    @property
+    def live_resume_count(self):
+        return len(self.indexed - self.tombstones)
+
+    def add_resume(self, resume_id, chunk_vectors, spans=None):
+        """
+        Add one resume's chunk vectors (rows aligned with resumes.chunks). Only the new
+        rows and their list ids are written. Returns rows added.
+        """
+        if chunk_vectors is None or len(chunk_vectors) == 0:
+            return 0
+        vectors = np.asarray(chunk_vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        with self.lock:
+            if self.store is None:
+                self.store = VectorStore(self.directory, vectors.shape[1], self.signature)
+            with self.store.locked():
+                self.refresh()
+                if len(self.store.resume_rows(resume_id)):
+                    return 0
+                self.store.append(resume_id, vectors, spans)
+                self._assign_pending()
+        return len(vectors)
+
+    def remove_resumes(self, resume_ids):
+        """Tombstone resumes (deleted rows); they are dropped physically by maintain()."""
+        with self.lock:
+            if self.store is None:
+                return 0
+            return self.store.delete(set(resume_ids) & self.indexed)
+
+    def needs_maintenance(self):
+        return self.store is not None and (self.store.needs_compaction() or self.needs_training)
+
+    def maintain(self):
+        """Compact once enough rows are dead, train centroids at the size threshold (background work)."""
+        if self.store is None:
+            return
+        if self.store.needs_compaction():
+            self.compact()
+        else:
+            self.train()
+
+    def compact(self):
+        """Drop tombstoned vectors from the store; the new generation gets fresh centroids."""
+        with self.lock:
+            if self.store is not None and self.store.compact(force=True):
+                self.refresh()
+                self._drop_stale_centroids()
+                self.train()
+
+    # ---- queries -----------------------------------------------------------
+
+    def _candidate_rows(self, queries):
+        """Vector ids in the probed lists plus every unassigned row (all rows before training)."""
+        rows = len(self.store)
+        assigned = len(self._lists)
+        if self.centroids is None or assigned == 0:
+            return np.arange(rows)
+        nprobe = max(1, min(CANDIDATE_IVF_NPROBE, len(self.centroids)))
+        probed = np.unique(np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe])
+        return np.concatenate([np.flatnonzero(np.isin(self._lists, probed)), np.arange(assigned, rows)])
+
+    def search(self, query_vectors, top_n=10, evidence_per_candidate=3):
+        """
+        Rank resumes by their best chunk similarity to any query vector.
+        Returns [{"resume_id", "score", "evidence": [(chunk_no, similarity), ...]}], best first.
+        """
+        queries = np.ascontiguousarray(np.asarray(query_vectors, dtype=np.float32))
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        with self.lock:
+            if self.store is None:
+                return []
+            self.refresh()
+            if len(self.store) == 0:
+                return []
+            rows = self._candidate_rows(queries)
+            meta = self.store.meta[rows]
+            if self.store.tombstones:
+                live = ~np.isin(meta["resume_id"], np.fromiter(self.store.tombstones, dtype=np.int64))
+                rows, meta = rows[live], meta[live]
+            if len(rows) == 0:
+                return []
+            # Exact scores on the shared int8 codes, one block of rows at a time
+            sims = np.concatenate([self.store.similarities(queries, rows[lo:lo + SCAN_BLOCK_ROWS]).max(axis=0)
+                                   for lo in range(0, len(rows), SCAN_BLOCK_ROWS)])
+
+        # Several chunks per resume still leave top_n candidates
+        k = min(len(rows), max(64, top_n * (evidence_per_candidate + 1) * 4))
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        best_chunks = {}
+        for rid, chunk_no, sim in zip(meta["resume_id"][top].tolist(), meta["chunk_no"][top].tolist(),
+                                      sims[top].tolist()):
+            chunks = best_chunks.setdefault(rid, {})
+            if sim > chunks.get(chunk_no, -1.0):
+                chunks[chunk_no] = sim
+
+        ranked = []
+        for rid, chunks in best_chunks.items():
+            evidence = sorted(chunks.items(), key=lambda item: item[1], reverse=True)[:evidence_per_candidate]
+            ranked.append({"resume_id": rid, "score": evidence[0][1], "evidence": evidence})
+        ranked.sort(key=lambda c: c["score"], reverse=True)
+        return ranked
+
+
+_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_candidate_index(user_id, signature):
+    """Process-wide CandidateIndex for a user (loaded from disk on first use)."""
+    key = f"user_{user_id}"
+    with _registry_lock:
+        index = _indexes.get(key)
+        if index is None or index.signature != signature:
+            index = CandidateIndex.load(key, signature)
+            _indexes[key] = index
+        return index
+
+
+def _run_directly(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def encode_chunks(chunks, embedder):
+    """
+    The one representation the index stores: each chunk text encoded on its own
+    (normalized), the same as the JD windows it is searched with.
+    """
+    vectors = embedder.encode(list(chunks), batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+    return vectors.reshape(1, -1) if vectors.ndim == 1 else vectors
+
+
+def index_resume(user_id, resume_id, chunks, embedder, signature, text=None):
+    """
+    Incremental update after save_to_db: encode the stored chunks of the new resume
+    and append them (with their char offsets in the stored text, when given) and their list ids.
+    """
+    if user_id is None or resume_id is None or not chunks or embedder is None:
+        return 0
+    if not all(isinstance(c, str) for c in chunks):
+        return 0  # the back-fill marks these unindexable as well
+    try:
+        index = get_candidate_index(user_id, signature)
+        if resume_id in index.indexed:
+            return 0  # add_resume re-checks under the store lock
+        spans = chunk_spans(chunks, text) if text else None
+        added = index.add_resume(resume_id, encode_chunks(chunks, embedder), spans)
+        if added:
+            logger.info(f"✅ Indexed resume {resume_id} for candidate search ({added} chunks)")
+        return added
+    except Exception as e:
+        logger.warning(f"⚠️ Candidate index update failed for resume {resume_id}: {e}")
+        return 0
+
+
+def pending_resumes(index, live_ids):
+    """Stored resumes the index has not covered yet."""
+    return set(live_ids) - (index.indexed - index.tombstones) - index.unindexable
+
+
+def backfill_candidate_index(index, conn, db_ok, user_id, embedder, resume_ids, model_work=_run_directly):
+    """
+    Encode the stored chunks of resumes that were never indexed and add them. Returns resumes added.
+    `model_work(func, *args)` runs each encode (the caller's model throttle).
+    """
+    resume_ids = sorted(resume_ids)
+    added = 0
+    for start in range(0, len(resume_ids), SYNC_ENCODE_BATCH):
+        rows = get_resume_chunks(conn, db_ok, user_id, resume_ids[start:start + SYNC_ENCODE_BATCH])
+        texts, owners = [], []
+        for rid, row in rows.items():
+            chunks = [c for c in row.get("chunks") or [] if isinstance(c, str)]
+            if not chunks or len(chunks) != len(row.get("chunks") or []):
+                index.unindexable.add(rid)  # non-text entries would break chunk_no alignment
+                continue
+            texts.extend(chunks)
+            owners.extend([rid] * len(chunks))
+        if not texts:
+            continue
+        vectors = model_work(encode_chunks, texts, embedder)
+        owners = np.asarray(owners)
+        for rid in rows:
+            rid_rows = np.flatnonzero(owners == rid)
+            if len(rid_rows):
+                added += index.add_resume(rid, vectors[rid_rows]) > 0
+        logger.info(f"Back-filled {len(rows)} resumes into candidate index {index.key}")
+    return added
+
+
+_maintenance = {}  # index key -> running background thread
+_maintenance_lock = threading.Lock()
+
+
+def _run_maintenance(index, user_id, embedder, model_work):
+    # ROBUSTNESS: the thread never touches the request handlers' connection
+    conn, db_ok = acquire_connection()
+    try:
+        if not db_ok:
+            logger.warning(f"⚠️ Candidate index maintenance for {index.key} skipped: no database connection")
+            return
+        live_ids = get_user_resume_ids(conn, db_ok, user_id)
+        if live_ids is not None:
+            backfill_candidate_index(index, conn, db_ok, user_id, embedder, pending_resumes(index, live_ids),
+                                     model_work)
+        index.maintain()
+    except Exception as e:
+        logger.warning(f"⚠️ Candidate index maintenance failed for {index.key}: {e}")
+    finally:
+        release_connection(conn)
+        with _maintenance_lock:
+            _maintenance.pop(index.key, None)
+
+
+def schedule_maintenance(index, user_id, embedder, model_work=_run_directly):
+    """
+    Back-fill un-indexed resumes, compact and train the index on a background thread,
+    at most one per index at a time. The thread opens its own database connection and
+    runs its encodes through `model_work(func, *args)`. Returns False when one is already running.
+    """
+    with _maintenance_lock:
+        running = _maintenance.get(index.key)
+        if running is not None and running.is_alive():
+            return False
+        thread = threading.Thread(target=_run_maintenance, args=(index, user_id, embedder, model_work),
+                                  name=f"candidate-index-{index.key}", daemon=True)
+        _maintenance[index.key] = thread
+        thread.start()
+    return True
+
+
+def jd_query_vectors(jd_text, embedder):
+    """JD token windows as query vectors (each window can match a different part of a resume)."""
+    windows = token_chunk_text(jd_text, embedder)[:MAX_QUERY_WINDOWS] or [jd_text[:5000]]
+    vectors = embedder.encode(windows, batch_size=16, convert_to_numpy=True, normalize_embeddings=True)
+    return vectors.reshape(1, -1) if vectors.ndim == 1 else vectors
+
+
+def rank_candidates(conn, db_ok, user_id, jd_text, embedder, signature, top_n=10, evidence_per_candidate=3,
+                    model_work=_run_directly):
+    """
+    Rank every stored resume of `user_id` against a job description without the
+    per-resume pipeline: one encode of the JD windows, one IVF search, one
+    database read for the evidence chunks of the returned candidates.
+    `model_work` is handed to the background maintenance for its encodes.
+    """
+    index = get_candidate_index(user_id, signature)
+    live_ids = get_user_resume_ids(conn, db_ok, user_id)
+    if live_ids is None:
+        raise RuntimeError("Database unavailable")
+    # OPTIMIZATION: only tombstoning happens inline; back-fill, compaction and training run
+    # in the background, so resumes that are still pending are ranked by a later search
+    index.remove_resumes(index.indexed - set(live_ids))
+    pending = pending_resumes(index, live_ids)
+    if pending or index.needs_maintenance():
+        schedule_maintenance(index, user_id, embedder, model_work)
+
+    ranked = index.search(jd_query_vectors(jd_text, embedder), top_n, evidence_per_candidate)
+    details = get_resume_chunks(conn, db_ok, user_id, [c["resume_id"] for c in ranked[:top_n * 2]])
+    # ROBUSTNESS: ids missing from the database were deleted since the last sync
+    stale = [c["resume_id"] for c in ranked[:top_n * 2] if c["resume_id"] not in details]
+    if stale:
+        index.remove_resumes(stale)
+
+    candidates = []
+    for cand in ranked:
+        row = details.get(cand["resume_id"])
+        if row is None:
+            continue
+        chunks = row.get("chunks") or []
+        candidates.append({
+            "resume_id": cand["resume_id"],
+            "name": row.get("name"),
+            "email": row.get("email"),
+            "score": round(cand["score"], 4),
+            "evidence": [{"chunk": chunks[no], "similarity": round(sim, 4)}
+                         for no, sim in cand["evidence"] if 0 <= no < len(chunks)],
+        })
+        if len(candidates) >= top_n:
+            break
+    return {"candidates": candidates, "indexed_resumes": index.live_resume_count, "pending_resumes": len(pending),
+            "store": index.store.stats() if index.store is not None else None}
@@ -96,6 +96,29 @@ def _return_connection(conn):
             pass
 
 
+def acquire_connection():
+    """
+    Dedicated pooled connection for work outside the request handlers (background
+    threads must not share the request connection). Returns (conn, success_flag);
+    hand it back with release_connection.
+    """
+    db_url = os.getenv("DATABASE_URL", "")
+    if not db_url.strip():
+        return None, False
+    return _get_pooled_connection(db_url)
+
+
+def release_connection(conn):
+    """Roll back anything left open and return a connection from acquire_connection."""
+    if conn is None:
+        return
+    try:
+        conn.rollback()
+    except Exception:
+        pass
+    _return_connection(conn)
+
+
 def init_postgresql():
     """
     Initialize PostgreSQL connection with Supabase-specific handling.
@@ -157,6 +180,10 @@ def init_postgresql():
                 CREATE INDEX IF NOT EXISTS idx_resumes_name ON resumes(name);
                 CREATE INDEX IF NOT EXISTS idx_resumes_email ON resumes(email);
                 CREATE INDEX IF NOT EXISTS idx_resumes_created_at ON resumes(created_at DESC);
+                
+                -- Content hash of the uploaded resume (keys the processed-resume artifact)
+                ALTER TABLE resumes ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+                CREATE INDEX IF NOT EXISTS idx_resumes_content_hash ON resumes(content_hash);
                 """)
                 
                 # Analyses table - stores matching results
@@ -285,9 +312,10 @@ def save_to_db(parsed_resume, jd_text, analysis, conn, db_ok, user_id=None):
             # Insert resume with enhanced fields + user_id
             cursor.execute("""
             INSERT INTO resumes (
-                name, email, phone, text, chunks, entities, technical_skills, experience, projects, user_id
+                name, email, phone, text, chunks, entities, technical_skills, experience, projects, user_id,
+                content_hash
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id
             """, (
                 parsed_resume.get('name', 'Unknown'),
@@ -299,7 +327,8 @@ def save_to_db(parsed_resume, jd_text, analysis, conn, db_ok, user_id=None):
                 Json(_sanitize_for_postgres(parsed_resume.get('technical_skills', []))),
                 Json(_sanitize_for_postgres(parsed_resume.get('experience', []))),
                 Json(_sanitize_for_postgres(parsed_resume.get('projects', []))),
-                user_id  # Add user_id for data isolation
+                user_id,  # Add user_id for data isolation
+                parsed_resume.get('content_hash')
             ))
             resume_id = cursor.fetchone()[0]
             logger.info(f"Resume saved with ID: {resume_id} for user: {user_id}")
@@ -621,3 +650,90 @@ def search_analyses(conn, db_ok, search_term, limit=20):
         logger.error(f"Search failed: {str(e)[:200]}")
         return []
         return []
+
+
+def get_user_resume_ids(conn, db_ok, user_id):
+    """Ids of all stored resumes owned by `user_id` (used to keep candidate indexes in sync)."""
+    if not db_ok or not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id FROM resumes WHERE user_id = %s", (user_id,))
+            return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"❌ Error listing resumes for user {user_id}: {str(e)[:200]}")
+        return None
+
+
+def get_resume_chunks(conn, db_ok, user_id, resume_ids):
+    """
+    Name, email and stored chunks for the given resumes of `user_id`.
+    Returns {resume_id: {'name', 'email', 'chunks'}}; ids not owned by the user are omitted.
+    """
+    if not db_ok or not conn or not resume_ids:
+        return {}
+    
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+            SELECT id, name, email, chunks
+            FROM resumes
+            WHERE user_id = %s AND id = ANY(%s)
+            """, (user_id, list(resume_ids)))
+            rows = cursor.fetchall()
+        
+        results = {}
+        for row in rows:
+            chunks = row.get('chunks') or []
+            if isinstance(chunks, str):
+                try:
+                    chunks = json.loads(chunks)
+                except:
+                    chunks = []
+            results[row['id']] = {'name': row.get('name'), 'email': row.get('email'), 'chunks': chunks}
+        return results
+    except Exception as e:
+        logger.error(f"❌ Error retrieving resume chunks: {str(e)[:200]}")
+        return {}
+
+
+def get_analysis_jd(conn, db_ok, user_id, analysis_id):
+    """Job description text of one of the user's analyses (None if not found)."""
+    if not db_ok or not conn:
+        return None
+    
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT jd_text FROM analyses WHERE id = %s AND user_id = %s", (analysis_id, user_id))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        logger.error(f"❌ Error retrieving analysis {analysis_id}: {str(e)[:200]}")
+        return None
+
+
+def get_technical_skill_counts(conn, db_ok, min_count=1):
+    """
+    Every distinct technical skill stored across resumes, lowercased, with the number
+    of resumes listing it. Returns {skill: count} ({} when unavailable).
+    """
+    if not db_ok or not conn:
+        return {}
+    
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+            SELECT lower(btrim(skill)) AS skill, COUNT(DISTINCT r.id) AS resumes
+            FROM resumes r
+            CROSS JOIN LATERAL jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(r.technical_skills) = 'array' THEN r.technical_skills ELSE '[]'::jsonb END
+            ) AS skill
+            WHERE btrim(skill) <> ''
+            GROUP BY 1
+            HAVING COUNT(DISTINCT r.id) >= %s
+            """, (max(1, int(min_count)),))
+            return {row['skill']: int(row['resumes']) for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error(f"❌ Error mining technical skills: {str(e)[:200]}")
+        return {}
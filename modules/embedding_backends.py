@@ -0,0 +1,262 @@
+"""
+Pluggable Sentence Embedder Backends
+PyTorch (default), ONNX Runtime fp32 and dynamically quantized int8, selected by EMBEDDER_BACKEND
+"""
+import os
+import re
+import time
+import logging
+import tempfile
+import numpy as np
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name, default, cast):
+    """Numeric env setting; a malformed value is logged and `default` used instead of failing startup."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        logger.error(f"❌ Invalid {name}={raw!r}, using {default!r}")
+        return default
+
+
+# CONFIGURATION
+EMBEDDER_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "torch").strip().lower()
+EMBEDDER_ONNX_DIR = os.getenv("EMBEDDER_ONNX_DIR", os.path.join(tempfile.gettempdir(), "resume_screener_onnx"))
+EMBEDDER_ONNX_THREADS = _env_number("EMBEDDER_ONNX_THREADS", 0, int)  # 0 = let ONNX Runtime decide
+# Minimum per-sentence cosine against the fp32 PyTorch model for a backend to be accepted
+DEFAULT_PARITY_TOLERANCE = {"onnx": 0.999, "onnx-int8": 0.98}
+EMBEDDER_PARITY_TOLERANCE = _env_number("EMBEDDER_PARITY_TOLERANCE", None, float)
+
+PARITY_SENTENCES = [
+    "Senior Python developer with 6 years of experience building REST APIs in Django and FastAPI.",
+    "Deployed containerized microservices to Kubernetes using Helm and GitHub Actions.",
+    "Machine learning engineer: PyTorch, scikit-learn, feature engineering and model monitoring.",
+    "Bachelor of Science in Computer Science",
+    "Strong communication skills and experience mentoring junior engineers.",
+    "SQL",
+    "Designed data pipelines in Apache Airflow and Spark processing terabytes of event logs daily.",
+    "Built responsive React and TypeScript dashboards backed by GraphQL services.",
+]
+
+
+class OnnxSentenceEmbedder:
+    """
+    SentenceTransformer-compatible encoder that runs the transformer through ONNX Runtime.
+    Tokenization, pooling and normalization mirror the source SentenceTransformer so
+    callers keep the same encode(..., normalize_embeddings=True) contract.
+    """
+
+    def __init__(self, reference, model_path, backend):
+        self.backend = backend
+        self.model_path = model_path
+        self.tokenizer = reference.tokenizer
+        self.max_seq_length = reference.max_seq_length
+        self._dim = reference.get_sentence_embedding_dimension()
+        self._pooling_mode = _pooling_mode(reference)
+        self._always_normalize = any(type(m).__name__ == "Normalize" for m in reference)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if EMBEDDER_ONNX_THREADS > 0:
+            options.intra_op_num_threads = EMBEDDER_ONNX_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self._dim
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=None, convert_to_numpy=True,
+               convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        sentences = list(sentences)
+        out = np.zeros((len(sentences), self._dim), dtype=np.float32)
+        if sentences:
+            # Length-sorted batches minimize padding (same strategy as SentenceTransformer)
+            order = np.argsort([-len(s) for s in sentences], kind="stable")
+            for start in range(0, len(sentences), batch_size):
+                idx = order[start:start + batch_size]
+                out[idx] = self._encode_batch([sentences[i] for i in idx], normalize_embeddings)
+
+        if convert_to_tensor:
+            import torch
+            out = torch.from_numpy(out)
+        return out[0] if single else out
+
+    def _encode_batch(self, batch, normalize):
+        enc = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_seq_length,
+                             return_tensors="np")
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in enc.items() if k in self._input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = np.asarray(enc["attention_mask"], dtype=np.float32)[..., None]
+
+        if self._pooling_mode == "cls":
+            pooled = token_embeddings[:, 0]
+        elif self._pooling_mode == "max":
+            pooled = np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        else:
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if normalize or self._always_normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+        return pooled.astype(np.float32)
+
+
+def _pooling_mode(reference):
+    for module in reference:
+        if type(module).__name__ == "Pooling":
+            config = module.get_config_dict()
+            if config.get("pooling_mode_cls_token"):
+                return "cls"
+            if config.get("pooling_mode_max_tokens"):
+                return "max"
+            return "mean"
+    return "mean"
+
+
+def _model_dir(model_name):
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_") or "model"
+    path = os.path.join(EMBEDDER_ONNX_DIR, safe)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def export_onnx(reference, model_name):
+    """Export the SentenceTransformer's transformer to ONNX (cached on disk). Returns the fp32 path."""
+    import torch
+
+    path = os.path.join(_model_dir(model_name), "model.onnx")
+    if os.path.exists(path):
+        return path
+
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    auto_model = reference[0].auto_model
+    auto_model.eval()
+    dummy = reference.tokenizer(["export sample"], return_tensors="pt")
+    tmp_path = path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            _TokenEmbeddings(auto_model),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_embeddings": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+    os.replace(tmp_path, path)
+    logger.info(f"✅ Exported ONNX embedder: {path}")
+    return path
+
+
+def quantize_onnx(fp32_path):
+    """Dynamic int8 weight quantization of an exported model (cached on disk)."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    path = fp32_path.replace(".onnx", ".int8.onnx")
+    if os.path.exists(path):
+        return path
+    tmp_path = path + ".tmp"
+    quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, path)
+    logger.info(f"✅ Quantized ONNX embedder (int8): {path}")
+    return path
+
+
+def check_parity(candidate, reference, sentences=None, tolerance=0.99):
+    """
+    Compare normalized embeddings of `candidate` against the fp32 `reference`.
+    Returns (passed, min_cosine, mean_cosine).
+    """
+    sentences = sentences or PARITY_SENTENCES
+    ref = reference.encode(sentences, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    got = candidate.encode(sentences, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    cosines = np.einsum("ij,ij->i", np.asarray(ref, dtype=np.float32), np.asarray(got, dtype=np.float32))
+    min_cos, mean_cos = float(cosines.min()), float(cosines.mean())
+    return min_cos >= tolerance, min_cos, mean_cos
+
+
+def _time_encode(embedder, sentences, repeats=3):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        embedder.encode(sentences, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    return (time.perf_counter() - start) / repeats
+
+
+def load_embedder(model_name, backend=None, device="cpu"):
+    """
+    Load the sentence embedder for the configured backend.
+    ONNX backends are verified against the fp32 PyTorch model at load time and
+    fall back to PyTorch when ONNX Runtime is missing, export fails or parity
+    is outside tolerance.
+    Returns (embedder, info) where info describes the backend actually in use.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = (backend or EMBEDDER_BACKEND or "torch").lower()
+    if backend not in EMBEDDER_BACKENDS:
+        logger.warning(f"Unknown EMBEDDER_BACKEND '{backend}', using torch")
+        backend = "torch"
+
+    reference = SentenceTransformer(model_name, device=device)
+    info = {"backend": "torch", "requested_backend": backend, "model": model_name}
+    if backend == "torch":
+        return reference, info
+
+    if not ONNXRUNTIME_AVAILABLE:
+        logger.warning("onnxruntime not installed, using PyTorch embedder")
+        info["fallback_reason"] = "onnxruntime not installed"
+        return reference, info
+
+    tolerance = EMBEDDER_PARITY_TOLERANCE or DEFAULT_PARITY_TOLERANCE[backend]
+    try:
+        model_path = export_onnx(reference, model_name)
+        if backend == "onnx-int8":
+            model_path = quantize_onnx(model_path)
+        candidate = OnnxSentenceEmbedder(reference, model_path, backend)
+
+        passed, min_cos, mean_cos = check_parity(candidate, reference, tolerance=tolerance)
+        info.update({"parity_min_cosine": round(min_cos, 5), "parity_mean_cosine": round(mean_cos, 5),
+                     "parity_tolerance": tolerance})
+        if not passed:
+            logger.warning(f"⚠️ {backend} embedder failed parity check (min cosine {min_cos:.4f} < {tolerance}), "
+                           f"using PyTorch")
+            info["fallback_reason"] = "parity check failed"
+            return reference, info
+
+        torch_seconds = _time_encode(reference, PARITY_SENTENCES)
+        onnx_seconds = _time_encode(candidate, PARITY_SENTENCES)
+        info.update({"backend": backend,
+                     "speedup_vs_torch": round(torch_seconds / onnx_seconds, 2) if onnx_seconds > 0 else None})
+        logger.info(f"✅ {backend} embedder active (min cosine {min_cos:.4f}, "
+                    f"{info['speedup_vs_torch']}x vs PyTorch on parity set)")
+        return candidate, info
+    except Exception as e:
+        logger.warning(f"⚠️ {backend} embedder unavailable ({e}), using PyTorch")
+        info["fallback_reason"] = str(e)
+        return reference, info
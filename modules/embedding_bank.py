@@ -0,0 +1,164 @@
+"""
+Precomputed Embedding Bank
+Build-time embeddings of skill taxonomy forms and technical keywords,
+memory-mapped at startup so common requirement strings skip the encoder
+
+Build:  python -m modules.embedding_bank [--model all-mpnet-base-v2] [--backend torch]
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+from collections.abc import Mapping
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+EMBEDDING_BANK = os.getenv("EMBEDDING_BANK", "1").strip().lower() in ("1", "true", "yes", "on")
+EMBEDDING_BANK_DIR = os.getenv("EMBEDDING_BANK_DIR",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "embedding_bank"))
+BANK_VERSION = 1
+
+
+def bank_terms():
+    """Every skill taxonomy form and technical keyword, deduplicated in first-seen order."""
+    from modules.skill_taxonomy import get_taxonomy
+    from modules.text_processing import TECHNICAL_KEYWORDS
+
+    terms = [form for skill in get_taxonomy().skills.values() for form in skill.forms]
+    terms.extend(sorted(TECHNICAL_KEYWORDS))
+    return list(dict.fromkeys(" ".join(t.split()) for t in terms if isinstance(t, str) and t.strip()))
+
+
+def _surface_forms(term, lowercase):
+    """Spellings a JD is likely to use; with a lowercasing tokenizer they all share one vector."""
+    if lowercase:
+        return [term.lower()]
+    forms = [term, term.lower(), term.title()]
+    if len(term) <= 5:
+        forms.append(term.upper())  # sql -> SQL, aws -> AWS
+    return list(dict.fromkeys(forms))
+
+
+def bank_path(signature, directory=None):
+    digest = hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory or EMBEDDING_BANK_DIR, f"bank-{digest}")
+
+
+def tokenizer_lowercases(embedder):
+    tokenizer = getattr(embedder, "tokenizer", None)
+    return bool(getattr(tokenizer, "do_lower_case", False))
+
+
+class EmbeddingBank(Mapping):
+    """
+    Read-only mapping of whitespace-normalized term -> normalized embedding row.
+
+    Rows live in a memory-mapped (n, dim) float32 .npy file shared by all workers; the
+    term -> row table is a JSON sidecar. Lookups are case-insensitive when the embedder's
+    tokenizer lowercases its input (identical vectors either way). A bank can be passed
+    anywhere an embedding lookup is accepted (encode_with_lookup, segment_vectors).
+    """
+
+    def __init__(self, vectors, rows, signature, lowercase=False):
+        self.vectors = vectors
+        self.rows = rows
+        self.signature = signature
+        self.lowercase = lowercase
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text):
+        key = " ".join(text.split()) if isinstance(text, str) else text
+        return key.lower() if self.lowercase and isinstance(key, str) else key
+
+    def __getitem__(self, text):
+        return self.vectors[self.rows[self._key(text)]]
+
+    def __contains__(self, text):
+        found = isinstance(text, str) and self._key(text) in self.rows
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"terms": len(self.rows), "dim": int(self.vectors.shape[1]) if len(self.vectors) else 0,
+                "lowercase": self.lowercase, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+def build_embedding_bank(embedder, signature, directory=None, terms=None, batch_size=64):
+    """Encode every bank term (and its surface forms) and write <path>.npy + <path>.json atomically."""
+    lowercase = tokenizer_lowercases(embedder)
+    forms = list(dict.fromkeys(f for t in (terms or bank_terms()) for f in _surface_forms(t, lowercase)))
+    vectors = embedder.encode(forms, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(forms), -1)
+
+    path = bank_path(signature, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(f"{path}.tmp.npy", vectors)
+    os.replace(f"{path}.tmp.npy", f"{path}.npy")
+    sidecar = {"version": BANK_VERSION, "signature": signature, "lowercase": lowercase,
+               "terms": {form: row for row, form in enumerate(forms)}}
+    with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(sidecar, f)
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+    logger.info(f"✅ Embedding bank written: {len(forms)} terms -> {path}.npy")
+    return EmbeddingBank(vectors, sidecar["terms"], signature, lowercase)
+
+
+def load_embedding_bank(signature, directory=None):
+    """Memory-map the bank built for `signature` (None when disabled, missing or stale)."""
+    if not EMBEDDING_BANK:
+        return None
+    path = bank_path(signature, directory)
+    try:
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") != BANK_VERSION or sidecar.get("signature") != signature:
+            logger.warning(f"⚠️ Embedding bank {path} is stale, ignoring")
+            return None
+        vectors = np.load(f"{path}.npy", mmap_mode="r")
+        if len(vectors) != len(sidecar["terms"]):
+            logger.warning(f"⚠️ Embedding bank {path} is incomplete, ignoring")
+            return None
+    except FileNotFoundError:
+        logger.info("Embedding bank not built for this embedder (python -m modules.embedding_bank)")
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"⚠️ Failed to load embedding bank {path}: {e}")
+        return None
+    logger.info(f"✅ Embedding bank loaded: {len(vectors)} terms")
+    return EmbeddingBank(vectors, sidecar["terms"], signature, bool(sidecar.get("lowercase")))
+
+
+def main():
+    from modules.embedding_backends import load_embedder
+    from modules.resume_artifacts import embedder_signature
+
+    parser = argparse.ArgumentParser(description="Precompute the skill term embedding bank")
+    parser.add_argument("--model", default=os.getenv("SENTENCE_MODEL_NAME", "all-mpnet-base-v2"))
+    parser.add_argument("--backend", default=None, help="overrides EMBEDDER_BACKEND")
+    parser.add_argument("--output-dir", default=EMBEDDING_BANK_DIR)
+    args = parser.parse_args()
+
+    embedder, backend_info = load_embedder(args.model, backend=args.backend, device="cpu")
+    signature = embedder_signature(backend_info, embedder)
+    bank = build_embedding_bank(embedder, signature, args.output_dir)
+    print(f"{len(bank)} terms embedded for {signature} -> {bank_path(signature, args.output_dir)}.npy")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
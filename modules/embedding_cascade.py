@@ -0,0 +1,147 @@
+"""
+Two-Stage Embedding Cascade
+A small fast model screens every requirement/segment pair; the full model re-scores only top candidates
+"""
+import os
+import logging
+import threading
+import numpy as np
+
+from modules.text_processing import encode_with_lookup
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+CASCADE_FAST_MODEL = os.getenv("CASCADE_FAST_MODEL", "").strip()  # e.g. all-MiniLM-L6-v2; empty disables
+CASCADE_TOP_K = int(os.getenv("CASCADE_TOP_K", "8"))  # segments per requirement re-scored by the full model
+CASCADE_LOW = float(os.getenv("CASCADE_LOW", "0.25"))  # stage-1 best below this: clearly absent, not re-scored
+CASCADE_HIGH = float(os.getenv("CASCADE_HIGH", "0.75"))  # stage-1 best at/above this: clearly present
+CASCADE_HIGH_TOP_K = int(os.getenv("CASCADE_HIGH_TOP_K", "2"))  # segments re-scored for clearly present requirements
+
+_metrics_lock = threading.Lock()
+_metrics_totals = {
+    "runs": 0,
+    "requirements": 0,
+    "requirements_stage2": 0,
+    "segments": 0,
+    "segments_stage2": 0,
+    "pairs": 0,
+    "pairs_stage2": 0,
+}
+
+
+def _record(metrics):
+    with _metrics_lock:
+        _metrics_totals["runs"] += 1
+        for key in ("requirements", "requirements_stage2", "segments", "segments_stage2", "pairs", "pairs_stage2"):
+            _metrics_totals[key] += int(metrics.get(key, 0))
+
+
+def get_cascade_metrics():
+    """Cumulative cascade counters, stage-two fractions and active thresholds (process-wide)."""
+    with _metrics_lock:
+        totals = dict(_metrics_totals)
+
+    def _fraction(part, whole):
+        return round(totals[part] / totals[whole], 4) if totals[whole] else 0.0
+
+    return {
+        "enabled": bool(CASCADE_FAST_MODEL),
+        "fast_model": CASCADE_FAST_MODEL or None,
+        "thresholds": {"top_k": CASCADE_TOP_K, "low": CASCADE_LOW, "high": CASCADE_HIGH,
+                       "high_top_k": CASCADE_HIGH_TOP_K},
+        "totals": totals,
+        "stage2_requirement_fraction": _fraction("requirements_stage2", "requirements"),
+        "stage2_segment_fraction": _fraction("segments_stage2", "segments"),
+        "stage2_pair_fraction": _fraction("pairs_stage2", "pairs"),
+    }
+
+
+def _encode(embedder, texts):
+    embs = embedder.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    if embs.ndim == 1:
+        embs = embs.reshape(1, -1)
+    return np.asarray(embs, dtype=np.float32)
+
+
+class EmbeddingCascade:
+    """
+    Requirement x segment similarity with a fast/full model cascade.
+
+    Stage 1: the fast model embeds all requirements and segments.
+    Stage 2: every requirement whose best stage-1 similarity reaches `low` gets its
+    top stage-1 segments re-scored by the full model: top_k of them when the best lies
+    in [low, high), only high_top_k when it is clearly present (>= high). The
+    coverage thresholds are calibrated on the full model, so every score they can
+    accept comes from it. Segment vectors already known from chunking (segment_vectors)
+    are reused, so stage 2 only encodes misses. Non-candidate similarities are capped
+    at the lowest re-scored value so a stage-1 score never outranks a full-model score
+    for the same requirement. Clearly absent rows (best < low) keep their stage-1
+    scores, which are below every coverage threshold.
+    """
+
+    def __init__(self, fast_embedder, embedder, top_k=CASCADE_TOP_K, low=CASCADE_LOW, high=CASCADE_HIGH,
+                 high_top_k=CASCADE_HIGH_TOP_K):
+        self.fast_embedder = fast_embedder
+        self.embedder = embedder
+        self.top_k = max(1, int(top_k))
+        self.high_top_k = max(1, min(int(high_top_k), self.top_k))
+        self.low = low
+        self.high = high
+
+    def full_similarity(self, requirements, segments, segment_vectors=None, requirement_vectors=None):
+        seg_vecs = encode_with_lookup(self.embedder, segments, segment_vectors)
+        req_vecs = encode_with_lookup(self.embedder, requirements, requirement_vectors)
+        return np.clip(req_vecs @ seg_vecs.T, 0.0, 1.0)
+
+    def similarity_matrix(self, requirements, segments, segment_vectors=None, requirement_vectors=None):
+        """
+        Returns (similarities (R, S) in [0, 1], metrics dict for this call).
+        `requirement_vectors` is a full-model lookup (e.g. the embedding bank) for stage 2.
+        """
+        n_reqs, n_segs = len(requirements), len(segments)
+        metrics = {"requirements": n_reqs, "segments": n_segs, "pairs": n_reqs * n_segs,
+                   "top_k": self.top_k, "high_top_k": self.high_top_k, "low": self.low, "high": self.high}
+
+        lookup = segment_vectors or {}
+        missing = sum(1 for s in segments if " ".join(s.split()) not in lookup)
+        if missing == 0:
+            # Every segment already has a full-model vector: stage 1 would only add work
+            metrics.update({"requirements_stage2": n_reqs, "segments_stage2": n_segs,
+                            "pairs_stage2": n_reqs * n_segs, "skipped_stage1": True})
+            _record(metrics)
+            return self.full_similarity(requirements, segments, segment_vectors, requirement_vectors), metrics
+
+        fast_sims = np.clip(_encode(self.fast_embedder, requirements) @ _encode(self.fast_embedder, segments).T,
+                            0.0, 1.0)
+        best = fast_sims.max(axis=1)
+        selected = [r for r in range(n_reqs) if best[r] >= self.low]
+        candidates = {}
+        for r in selected:
+            k = min(self.high_top_k if best[r] >= self.high else self.top_k, n_segs)
+            candidates[r] = np.argpartition(-fast_sims[r], k - 1)[:k]
+        stage2_segments = sorted({int(i) for cand in candidates.values() for i in cand})
+
+        sims = fast_sims.copy()
+        if selected:
+            seg_vecs = encode_with_lookup(self.embedder, [segments[i] for i in stage2_segments], segment_vectors)
+            req_vecs = encode_with_lookup(self.embedder, [requirements[r] for r in selected], requirement_vectors)
+            position = {seg: j for j, seg in enumerate(stage2_segments)}
+            for row, r in enumerate(selected):
+                cand = candidates[r]
+                full = np.clip(seg_vecs[[position[int(c)] for c in cand]] @ req_vecs[row], 0.0, 1.0)
+                sims[r] = np.minimum(sims[r], float(full.min()))
+                sims[r, cand] = full
+
+        metrics.update({
+            "requirements_stage2": len(selected),
+            "segments_stage2": len(stage2_segments),
+            "pairs_stage2": sum(len(cand) for cand in candidates.values()),
+            "requirements_present": int(sum(1 for r in selected if best[r] >= self.high)),
+            "stage2_requirement_fraction": round(len(selected) / n_reqs, 4) if n_reqs else 0.0,
+            "stage2_segment_fraction": round(len(stage2_segments) / n_segs, 4) if n_segs else 0.0,
+        })
+        _record(metrics)
+        logger.info(f"Embedding cascade: {len(selected)}/{n_reqs} requirements and "
+                    f"{len(stage2_segments)}/{n_segs} segments sent to stage 2")
+        return sims, metrics
@@ -0,0 +1,149 @@
+"""
+Dynamic Micro-Batching Embedding Service
+Coalesces encode() calls from concurrent analyses into length-sorted batches on one worker thread
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+EMBEDDING_MICROBATCH = os.getenv("EMBEDDING_MICROBATCH", "0").strip().lower() in ("1", "true", "yes", "on")
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "10"))
+MICROBATCH_MAX_TEXTS = int(os.getenv("MICROBATCH_MAX_TEXTS", "256"))
+MICROBATCH_INNER_BATCH = int(os.getenv("MICROBATCH_INNER_BATCH", "64"))
+# Model-heavy request steps (spaCy parse, encode) allowed to run at once per worker when micro-batching is off
+try:
+    MODEL_WORK_CONCURRENCY = max(1, int(os.getenv("MODEL_WORK_CONCURRENCY", "1")))
+except ValueError:
+    logger.error(f"❌ Invalid MODEL_WORK_CONCURRENCY={os.getenv('MODEL_WORK_CONCURRENCY')!r}, using 1")
+    MODEL_WORK_CONCURRENCY = 1
+
+
+class _EncodeRequest:
+    __slots__ = ("texts", "normalize", "future")
+
+    def __init__(self, texts, normalize):
+        self.texts = texts
+        self.normalize = normalize
+        self.future = Future()
+
+
+class BatchingEmbedder:
+    """
+    Drop-in wrapper around a sentence embedder.
+
+    encode() enqueues the caller's texts and blocks on a future. A single worker
+    thread drains the queue, waiting at most max_wait_ms for more requests (up to
+    max_texts), sorts the merged texts by length to minimize padding, runs one
+    encode per normalization flag and hands each caller its own rows. All model
+    work happens on the worker thread, so concurrent analyses no longer compete
+    with separate torch thread pools.
+    """
+
+    def __init__(self, embedder, max_wait_ms=MICROBATCH_MAX_WAIT_MS, max_texts=MICROBATCH_MAX_TEXTS,
+                 inner_batch_size=MICROBATCH_INNER_BATCH):
+        self.embedder = embedder
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_texts = max(1, max_texts)
+        self.inner_batch_size = max(1, inner_batch_size)
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "passthrough": 0}
+        self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name):
+        # tokenizer, max_seq_length, get_sentence_embedding_dimension, ... come from the wrapped model
+        if name == "embedder":
+            raise AttributeError(name)
+        return getattr(self.embedder, name)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=None, convert_to_numpy=True,
+               convert_to_tensor=False, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if convert_to_tensor or not convert_to_numpy or kwargs or not texts \
+                or threading.current_thread() is self._worker or not self._worker.is_alive():
+            with self._stats_lock:
+                self._stats["passthrough"] += 1
+            return self.embedder.encode(sentences, batch_size=batch_size, show_progress_bar=show_progress_bar,
+                                        convert_to_numpy=convert_to_numpy, convert_to_tensor=convert_to_tensor,
+                                        normalize_embeddings=normalize_embeddings, **kwargs)
+
+        request = _EncodeRequest(texts, bool(normalize_embeddings))
+        self._queue.put(request)
+        vectors = request.future.result()
+        return vectors[0] if single else vectors
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_texts_per_batch"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["avg_requests_per_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            total = len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while total < self.max_texts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                pending.append(nxt)
+                total += len(nxt.texts)
+            self._dispatch(pending)
+            if stop:
+                return
+
+    def _dispatch(self, pending):
+        for normalize in (False, True):
+            group = [r for r in pending if r.normalize == normalize]
+            if not group:
+                continue
+            texts = [t for r in group for t in r.texts]
+            order = np.argsort([len(t) for t in texts], kind="stable")
+            try:
+                encoded = self.embedder.encode([texts[i] for i in order], batch_size=self.inner_batch_size,
+                                               convert_to_numpy=True, normalize_embeddings=normalize,
+                                               show_progress_bar=False)
+                encoded = np.asarray(encoded, dtype=np.float32)
+                if encoded.ndim == 1:
+                    encoded = encoded.reshape(1, -1)
+                vectors = np.empty_like(encoded)
+                vectors[order] = encoded
+            except Exception as e:
+                for r in group:
+                    r.future.set_exception(e)
+                continue
+
+            offset = 0
+            for r in group:
+                r.future.set_result(vectors[offset:offset + len(r.texts)])
+                offset += len(r.texts)
+            with self._stats_lock:
+                self._stats["requests"] += len(group)
+                self._stats["texts"] += len(texts)
+                self._stats["batches"] += 1
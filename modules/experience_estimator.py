@@ -0,0 +1,212 @@
+"""
+Local Experience Estimator
+Total and per-role years of experience from date ranges in the experience sections and
+spaCy DATE entities, with a confidence score that decides whether the LLM is still needed
+"""
+import os
+import re
+import logging
+from datetime import date
+
+from modules.text_processing import extract_sections
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+EXPERIENCE_CONFIDENCE_THRESHOLD = float(os.getenv("EXPERIENCE_CONFIDENCE_THRESHOLD", "0.6"))
+MAX_EXPERIENCE_YEARS = 50
+
+EXPERIENCE_SECTION_WORDS = ("experience", "employment", "work history", "career", "professional background")
+NON_EXPERIENCE_SECTION_WORDS = ("education", "academic", "certification", "course", "award", "publication")
+OTHER_SECTION_WORDS = ("summary", "objective", "profile", "skill", "project", "interest", "hobbies", "language",
+                       "reference", "volunteer", "achievement", "contact", "leadership", "activities")
+
+_MONTHS = {name: idx for idx, names in enumerate(
+    (("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+     ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"),
+     ("nov", "november"), ("dec", "december")), start=1) for name in names}
+
+_DATE = (r"(?:(?P<{p}month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+         r"sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?,?\s+|(?P<{p}num>0?[1-9]|1[0-2])\s*[/.-]\s*)?"
+         r"(?P<{p}year>(?:19|20)\d{{2}})")
+DATE_RANGE_PATTERN = re.compile(
+    _DATE.format(p="s_") + r"\s*(?:-|–|—|to|until|till)\s*(?:" + _DATE.format(p="e_") +
+    r"|(?P<ongoing>present|current(?:ly)?|now|today|till date|to date|ongoing))",
+    re.IGNORECASE)
+CLAIMED_YEARS_PATTERN = re.compile(
+    r"(\d{1,2}(?:\.\d)?)\+?\s*(?:years?|yrs?)\s+(?:of\s+)?(?:professional\s+|industry\s+|work\s+|hands-on\s+)?"
+    r"experience", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def _month_index(match, prefix, today):
+    """Months since year 0 for one side of a range (year-only dates count from January)."""
+    if prefix == "e_" and match.group("ongoing"):
+        return today.year * 12 + today.month - 1
+    year = int(match.group(f"{prefix}year"))
+    month_name = match.group(f"{prefix}month")
+    if month_name:
+        month = _MONTHS.get(month_name.lower()[:3], 1)
+    elif match.group(f"{prefix}num"):
+        month = int(match.group(f"{prefix}num"))
+    else:
+        month = 1
+    return year * 12 + month - 1
+
+
+def _format_month(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def find_date_ranges(text, today=None, section="content"):
+    """Employment-like date ranges in `text` as role dicts (start, end, months, section, context)."""
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    roles = []
+    for match in DATE_RANGE_PATTERN.finditer(text or ""):
+        start, end = _month_index(match, "s_", today), _month_index(match, "e_", today)
+        # ROBUSTNESS: skip reversed, future and implausibly old ranges
+        if end < start or start > now or start < now - MAX_EXPERIENCE_YEARS * 12:
+            continue
+        end = min(end, now)
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        roles.append({
+            "start": _format_month(start),
+            "end": "present" if match.group("ongoing") else _format_month(end),
+            "months": max(1, end - start),
+            "section": section,
+            "context": text[line_start:line_end if line_end >= 0 else len(text)].strip()[:120],
+            "_span": (start, max(start + 1, end)),
+        })
+    return roles
+
+
+def _merged_months(spans):
+    """Total months covered by possibly overlapping (start, end) spans."""
+    total, current = 0, None
+    for start, end in sorted(spans):
+        if current is None or start > current[1]:
+            if current is not None:
+                total += current[1] - current[0]
+            current = [start, end]
+        else:
+            current[1] = max(current[1], end)
+    if current is not None:
+        total += current[1] - current[0]
+    return total
+
+
+def _section_kinds(sections):
+    """
+    "experience" / "non_experience" / "other" per extract_sections block. The splitter also
+    cuts at Title Case lines such as "Senior Engineer" or "BS Computer Science"; a block
+    whose title names no known section inherits the last real heading's kind.
+    """
+    kinds, current = [], "other"
+    for title, _ in sections:
+        title_lower = title.lower()
+        if any(word in title_lower for word in NON_EXPERIENCE_SECTION_WORDS):
+            current = "non_experience"
+        elif any(word in title_lower for word in EXPERIENCE_SECTION_WORDS):
+            current = "experience"
+        elif any(word in title_lower for word in OTHER_SECTION_WORDS):
+            current = "other"
+        kinds.append(current)
+    return kinds
+
+
+def estimate_experience(text, date_entities=None, today=None):
+    """
+    Estimate professional experience locally.
+
+    Date ranges inside experience sections (extract_sections) are the primary signal;
+    without such a section, ranges anywhere outside education-like sections are used
+    with lower confidence, then the span of DATE entities. Overlapping roles are merged
+    so concurrent jobs are not double counted. A stated "N+ years of experience" that
+    agrees with the computed total raises confidence, a disagreement lowers it.
+
+    Returns: dict with years, months, roles, claimed_years, confidence (0-1), method
+    """
+    today = today or date.today()
+    text = text or ""
+    # Empty blocks kept: "EXPERIENCE" directly followed by a job title line is still a heading
+    sections = extract_sections(text, keep_empty=True)
+
+    experience_roles, other_roles = [], []
+    for (title, body), kind in zip(sections, _section_kinds(sections)):
+        if kind == "non_experience":
+            continue
+        target = experience_roles if kind == "experience" else other_roles
+        target.extend(find_date_ranges(body, today, title.lower()))
+
+    claims = [float(m.group(1)) for m in CLAIMED_YEARS_PATTERN.finditer(text[:5000])]
+    claimed_years = max(claims) if claims else None
+
+    if experience_roles:
+        roles, method, confidence = experience_roles, "experience_sections", 0.55 + 0.1 * min(len(experience_roles) - 1, 3)
+    elif other_roles:
+        roles, method, confidence = other_roles, "date_ranges", 0.4 + 0.05 * min(len(other_roles) - 1, 3)
+    else:
+        roles, method, confidence = [], "none", 0.0
+        for entity in date_entities or []:
+            roles.extend(find_date_ranges(entity, today, "date_entities"))
+        if roles:
+            method, confidence = "date_entities", 0.4
+        else:
+            years = sorted(int(y) for entity in date_entities or [] for y in YEAR_PATTERN.findall(entity)
+                           if today.year - MAX_EXPERIENCE_YEARS <= int(y) <= today.year)
+            if len(years) >= 2:
+                # Earliest to latest mentioned year: a coarse upper bound (may include education)
+                roles = [{"start": f"{years[0]:04d}-01", "end": f"{years[-1]:04d}-01",
+                          "months": (years[-1] - years[0]) * 12, "section": "date_entities",
+                          "context": "", "_span": (years[0] * 12, years[-1] * 12)}]
+                method, confidence = "date_entity_span", 0.25
+
+    months = _merged_months([role["_span"] for role in roles])
+    years = round(months / 12.0, 1)
+
+    if claimed_years is not None:
+        if not roles:
+            years, months, method, confidence = claimed_years, int(claimed_years * 12), "stated", 0.5
+        elif abs(claimed_years - years) <= 1.5:
+            confidence += 0.15
+        else:
+            confidence -= 0.2
+    if years > MAX_EXPERIENCE_YEARS:
+        confidence = min(confidence, 0.2)
+
+    for role in roles:
+        role.pop("_span", None)
+    result = {
+        "years": years,
+        "months": months,
+        "roles": roles[:20],
+        "claimed_years": claimed_years,
+        "confidence": round(max(0.0, min(confidence, 0.95)), 2),
+        "method": method,
+    }
+    logger.info(f"Experience estimate: {years} years from {len(roles)} ranges "
+                f"(method={method}, confidence={result['confidence']})")
+    return result
+
+
+def is_confident(estimate, threshold=EXPERIENCE_CONFIDENCE_THRESHOLD):
+    return bool(estimate) and estimate.get("confidence", 0.0) >= threshold
+
+
+def resolve_experience_years(profile=None, estimate=None, default=2):
+    """
+    Whole years of experience: the LLM profile's answer when it has one (the prompt asks for
+    years_of_experience, older callers read experience_years), else the local estimate, else `default`.
+    """
+    for key in ("years_of_experience", "experience_years"):
+        value = (profile or {}).get(key)
+        try:
+            if value is not None and float(value) > 0:
+                return int(round(float(value)))
+        except (TypeError, ValueError):
+            continue
+    if estimate and estimate.get("method") != "none" and estimate.get("years", 0) > 0:
+        return int(round(estimate["years"]))
+    return default
@@ -0,0 +1,214 @@
+"""
+Fast Fuzzy Matching for Requirement Coverage
+Per-resume difflib matchers (exact SequenceMatcher ratios, scored only for candidate
+segments) with a character-count signature matrix that bounds them for exact top-k lookups
+"""
+import os
+import time
+import logging
+from difflib import SequenceMatcher
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+FUZZY_MODES = ("difflib", "sequence")
+DEFAULT_FUZZY_MODE = os.getenv("FUZZY_MATCH_MODE", "difflib").strip().lower()
+
+
+def sequence_ratio(a, b):
+    """Legacy difflib ratio, kept for parity checks and the 'sequence' mode."""
+    if not a or not b:
+        return 0.0
+    return float(SequenceMatcher(None, a.lower(), b.lower()).ratio())
+
+
+class SegmentFuzzyIndex:
+    """
+    Per-resume fuzzy index over evidence segments, built once.
+
+    "difflib" (default) returns exactly SequenceMatcher(None, requirement, segment).ratio():
+    each segment's matcher is built once, so its b2j table is reused for every
+    requirement, and callers score only their candidate segments. Each segment also
+    gets a row of character counts; one vectorized pass over that matrix gives
+    quick_ratio() for every segment, an upper bound on ratio(), so top_matches()
+    runs difflib only on the segments whose bound can still reach the exact top-k.
+    "sequence" is the legacy brute-force scorer, kept for parity checks.
+    """
+
+    def __init__(self, segments, mode=None):
+        mode = (mode or DEFAULT_FUZZY_MODE or "difflib").lower()
+        if mode not in FUZZY_MODES:
+            logger.warning(f"Unknown fuzzy mode '{mode}', using 'difflib'")
+            mode = "difflib"
+        self.mode = mode
+        self.segments = [s if isinstance(s, str) else "" for s in (segments or [])]
+
+        self._matchers = []
+        self._alphabet = {}
+        self._char_counts = np.zeros((len(self.segments), 0), dtype=np.int32)
+        self._lengths = np.array([len(s) for s in self.segments], dtype=np.float64)
+        if self.mode == "difflib":
+            lowered = [seg.lower() for seg in self.segments]
+            self._matchers = [SequenceMatcher(None, "", seg) for seg in lowered]
+            for seg in lowered:
+                for ch in seg:
+                    self._alphabet.setdefault(ch, len(self._alphabet))
+            self._char_counts = np.zeros((len(lowered), len(self._alphabet)), dtype=np.int32)
+            for row, seg in enumerate(lowered):
+                if not seg:
+                    continue
+                cols, counts = np.unique([self._alphabet[ch] for ch in seg], return_counts=True)
+                self._char_counts[row, cols] = counts
+
+    def _ratio(self, requirement_lower, idx):
+        if not requirement_lower or not self.segments[idx]:
+            return 0.0
+        matcher = self._matchers[idx]
+        matcher.set_seq1(requirement_lower)
+        return float(matcher.ratio())
+
+    def upper_bounds(self, requirement):
+        """quick_ratio() against every segment: 2 * shared characters / total length (>= ratio())."""
+        if self.mode != "difflib":
+            return np.ones(len(self.segments))
+        requirement_lower = (requirement or "").lower()
+        if not requirement_lower or not len(self.segments):
+            return np.zeros(len(self.segments))
+        chars, counts = np.unique(list(requirement_lower), return_counts=True)
+        known = [(self._alphabet[ch], n) for ch, n in zip(chars.tolist(), counts.tolist()) if ch in self._alphabet]
+        if not known:
+            return np.zeros(len(self.segments))
+        cols, req_counts = (np.array(v) for v in zip(*known))
+        shared = np.minimum(self._char_counts[:, cols], req_counts).sum(axis=1)
+        return 2.0 * shared / (len(requirement_lower) + self._lengths)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def scores(self, requirement, candidates=None):
+        """
+        Fuzzy score of `requirement` against every segment (list aligned with segments).
+        In "difflib" mode only `candidates` (segment ids) are scored when given; the rest stay 0.0.
+        """
+        size = len(self.segments)
+        if not requirement or size == 0:
+            return [0.0] * size
+
+        if self.mode == "sequence":
+            return [sequence_ratio(requirement, seg) for seg in self.segments]
+
+        requirement_lower = requirement.lower()
+        result = [0.0] * size
+        for idx in (range(size) if candidates is None else candidates):
+            result[idx] = self._ratio(requirement_lower, idx)
+        return result
+
+    def top_matches(self, requirement, top_k=5):
+        """Exact best fuzzy matches for a requirement as [(segment_index, score)], highest first."""
+        if not requirement or not self.segments or top_k <= 0:
+            return []
+        if self.mode == "sequence":
+            scored = [(idx, s) for idx, s in enumerate(self.scores(requirement)) if s > 0.0]
+            scored.sort(key=lambda x: (-x[1], x[0]))
+            return scored[:top_k]
+        requirement_lower = requirement.lower()
+        bounds = self.upper_bounds(requirement)
+        best = []
+        for idx in np.lexsort((np.arange(len(bounds)), -bounds)).tolist():
+            # OPTIMIZATION: no remaining segment can beat the current k-th best exact ratio
+            if bounds[idx] <= 0.0 or (len(best) >= top_k and bounds[idx] < best[top_k - 1][1]):
+                break
+            score = self._ratio(requirement_lower, idx)
+            if score > 0.0:
+                best.append((idx, score))
+                best.sort(key=lambda x: (-x[1], x[0]))
+        return best[:top_k]
+
+
+def _ranks(values):
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        avg = (i + j) / 2.0
+        for k in range(i, j + 1):
+            ranks[order[k]] = avg
+        i = j + 1
+    return ranks
+
+
+def _spearman(a, b):
+    if len(a) < 2:
+        return 1.0
+    ra, rb = _ranks(a), _ranks(b)
+    mean_a = sum(ra) / len(ra)
+    mean_b = sum(rb) / len(rb)
+    cov = sum((x - mean_a) * (y - mean_b) for x, y in zip(ra, rb))
+    var_a = sum((x - mean_a) ** 2 for x in ra)
+    var_b = sum((y - mean_b) ** 2 for y in rb)
+    if var_a == 0 or var_b == 0:
+        return 1.0 if var_a == var_b else 0.0
+    return cov / (var_a ** 0.5 * var_b ** 0.5)
+
+
+def compare_with_sequence_matcher(requirements, segments, mode="difflib", top_k=5):
+    """
+    Benchmark a fuzzy mode against the legacy SequenceMatcher scores.
+    Returns timing, mean absolute score difference, mean Spearman rank correlation,
+    top-1 / top-k agreement across requirements, and the timing of top_matches() with
+    the share of requirements whose top-k scores equal difflib's exactly.
+    """
+    requirements = [r for r in (requirements or []) if isinstance(r, str) and r.strip()]
+    segments = [s for s in (segments or []) if isinstance(s, str) and s.strip()]
+    if not requirements or not segments:
+        return {"mode": mode, "requirements": 0, "segments": 0}
+
+    start = time.perf_counter()
+    legacy = [[sequence_ratio(r, s) for s in segments] for r in requirements]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = SegmentFuzzyIndex(segments, mode=mode)
+    fast = [index.scores(r) for r in requirements]
+    fast_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pruned = [index.top_matches(r, top_k) for r in requirements]
+    pruned_seconds = time.perf_counter() - start
+
+    abs_diffs, correlations, top1_hits, topk_overlap = [], [], 0, []
+    topk_exact = 0
+    for old, matches in zip(legacy, pruned):
+        expected = sorted(((i, v) for i, v in enumerate(old) if v > 0.0), key=lambda x: (-x[1], x[0]))[:top_k]
+        if [round(v, 9) for _, v in expected] == [round(v, 9) for _, v in matches]:
+            topk_exact += 1
+    for old, new in zip(legacy, fast):
+        abs_diffs.extend(abs(x - y) for x, y in zip(old, new))
+        correlations.append(_spearman(old, new))
+        old_order = sorted(range(len(old)), key=lambda i: old[i], reverse=True)
+        new_order = sorted(range(len(new)), key=lambda i: new[i], reverse=True)
+        if old_order[0] == new_order[0]:
+            top1_hits += 1
+        k = min(top_k, len(old_order))
+        topk_overlap.append(len(set(old_order[:k]) & set(new_order[:k])) / k)
+
+    return {
+        "mode": mode,
+        "requirements": len(requirements),
+        "segments": len(segments),
+        "legacy_seconds": round(legacy_seconds, 4),
+        "fast_seconds": round(fast_seconds, 4),
+        "speedup": round(legacy_seconds / fast_seconds, 1) if fast_seconds > 0 else None,
+        "mean_abs_diff": round(sum(abs_diffs) / len(abs_diffs), 4),
+        "mean_spearman": round(sum(correlations) / len(correlations), 4),
+        "top1_agreement": round(top1_hits / len(requirements), 4),
+        "topk_overlap": round(sum(topk_overlap) / len(topk_overlap), 4),
+        "top_matches_seconds": round(pruned_seconds, 4),
+        "top_matches_speedup": round(legacy_seconds / pruned_seconds, 1) if pruned_seconds > 0 else None,
+        "top_matches_exact": round(topk_exact / len(requirements), 4),
+    }
@@ -0,0 +1,140 @@
+"""
+Hybrid Lexical + Dense Retrieval
+Per-resume BM25 inverted index fused with dense similarities for evidence candidate generation
+"""
+import os
+import math
+import logging
+from collections import Counter
+import numpy as np
+
+from modules.segment_index import tokenize_requirement
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf").strip().lower()  # "rrf" or "weighted"
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.7"))  # weighted fusion only
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "24"))  # taken from each ranker before fusion
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of segments, built once.
+
+    Postings are stored per term as parallel arrays (segment ids, term frequencies),
+    so scoring a query touches only the segments that contain one of its terms.
+    """
+
+    def __init__(self, segments, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.size = len(segments or [])
+
+        postings = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for idx, seg in enumerate(segments or []):
+            counts = Counter(tokenize_requirement(seg if isinstance(seg, str) else ""))
+            lengths[idx] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(idx)
+                postings[term][1].append(tf)
+
+        avg_len = float(lengths.mean()) if self.size and lengths.sum() > 0 else 1.0
+        # Per-segment length normalization k1 * (1 - b + b * len / avg_len), precomputed
+        self._norm = self.k1 * (1.0 - self.b + self.b * lengths / avg_len)
+        self.postings = {}
+        for term, (ids, tfs) in postings.items():
+            df = len(ids)
+            idf = math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            self.postings[term] = (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32), idf)
+
+    def __len__(self):
+        return self.size
+
+    def score(self, query_tokens):
+        """BM25 scores of segments matching any query token: (segment_ids, scores), unordered."""
+        ids_parts, score_parts = [], []
+        for term, qtf in Counter(query_tokens or []).items():
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            ids, tfs, idf = entry
+            ids_parts.append(ids)
+            score_parts.append(qtf * idf * tfs * (self.k1 + 1.0) / (tfs + self._norm[ids]))
+        if not ids_parts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        ids = np.concatenate(ids_parts)
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        return unique_ids, np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+
+    def top(self, query_tokens, top_k=HYBRID_CANDIDATES):
+        """Best-matching segments as (segment_ids, scores), highest first."""
+        ids, scores = self.score(query_tokens)
+        return _top_k(ids, scores, top_k)
+
+
+def _top_k(ids, scores, top_k):
+    if len(scores) > top_k:
+        keep = np.argpartition(-scores, top_k - 1)[:top_k]
+        ids, scores = ids[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return ids[order], scores[order]
+
+
+class HybridRetriever:
+    """
+    Candidate generation over one resume's evidence segments.
+
+    The lexical ranking comes from BM25; the dense ranking from a row of precomputed
+    requirement x segment similarities. The two top lists are fused by reciprocal
+    rank fusion (or a min-max normalized weighted sum), so downstream scoring only
+    looks at a bounded candidate set instead of every segment.
+    """
+
+    def __init__(self, segments, fusion=None, candidates=HYBRID_CANDIDATES):
+        self.segments = list(segments or [])
+        self.bm25 = BM25Index(self.segments)
+        self.fusion = (fusion or HYBRID_FUSION or "rrf").lower()
+        if self.fusion not in ("rrf", "weighted"):
+            logger.warning(f"⚠️ Unknown hybrid fusion '{self.fusion}', using 'rrf'")
+            self.fusion = "rrf"
+        self.candidates = max(1, int(candidates))
+
+    def __len__(self):
+        return len(self.segments)
+
+    def retrieve(self, query, dense_scores=None, top_k=None):
+        """
+        Fused candidates for `query` (a string or a token list).
+        `dense_scores` is an array aligned with segments (e.g. one similarity-matrix row).
+        Returns [(segment_id, fused_score)], best first.
+        """
+        top_k = top_k or self.candidates
+        tokens = tokenize_requirement(query) if isinstance(query, str) else list(query or [])
+        lexical = self.bm25.top(tokens, top_k)
+
+        dense = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+        if dense_scores is not None and len(dense_scores) == len(self.segments) and self.segments:
+            dense_scores = np.asarray(dense_scores, dtype=np.float32)
+            dense = _top_k(np.arange(len(dense_scores), dtype=np.int32), dense_scores, top_k)
+
+        fused = {}
+        if self.fusion == "rrf":
+            for ids, _ in (lexical, dense):
+                for rank, idx in enumerate(ids.tolist()):
+                    fused[idx] = fused.get(idx, 0.0) + 1.0 / (HYBRID_RRF_K + rank + 1)
+        else:
+            for (ids, scores), weight in ((dense, HYBRID_DENSE_WEIGHT), (lexical, 1.0 - HYBRID_DENSE_WEIGHT)):
+                if len(ids) == 0:
+                    continue
+                span = float(scores.max() - scores.min())
+                normalized = (scores - scores.min()) / span if span > 0 else np.ones_like(scores)
+                for idx, value in zip(ids.tolist(), normalized.tolist()):
+                    fused[idx] = fused.get(idx, 0.0) + weight * value
+
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)
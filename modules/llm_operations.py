@@ -674,7 +674,7 @@ BEGIN SKILL COMPARISON:
         }
 
 
-def jd_plan_prompt(jd, preview):
+def jd_plan_prompt(jd, preview, jd_context=None, resume_context=None):
     base_prompt = f"""
 Return ONLY JSON with:
 role_title, seniority (strings);
@@ -691,7 +691,8 @@ RESUME_PREVIEW:
     
     # Apply dynamic enrichment
     try:
-        enriched = enrich_prompt_with_context(base_prompt, jd, preview)
+        enriched = enrich_prompt_with_context(base_prompt, jd, preview,
+                                              jd_context=jd_context, resume_context=resume_context)
         logger.info("JD plan prompt enriched with dynamic context")
         return enriched
     except Exception as e:
@@ -699,7 +700,7 @@ RESUME_PREVIEW:
         return base_prompt
 
 
-def resume_profile_prompt(full_resume_text):
+def resume_profile_prompt(full_resume_text, resume_context=None):
     base_prompt = f"""
 You are an expert resume analyzer. Extract FACTUAL information ONLY - do not invent or infer.
 
@@ -742,7 +743,8 @@ Return ONLY valid JSON. No markdown, no explanations.
     # Apply dynamic enrichment with resume context
     try:
         # For resume profile, we enrich with the resume itself to extract patterns
-        enriched = enrich_prompt_with_context(base_prompt, full_resume_text[:3000], full_resume_text[:3000])
+        enriched = enrich_prompt_with_context(base_prompt, full_resume_text[:3000], full_resume_text[:3000],
+                                              jd_context=resume_context, resume_context=resume_context)
         logger.info("Resume profile prompt enriched with dynamic context")
         return enriched
     except Exception as e:
@@ -5,11 +5,15 @@ Enterprise-grade with health monitoring, fallback chains, and confidence scoring
 import os
 import logging
 import spacy
-from sentence_transformers import SentenceTransformer
 import google.generativeai as genai
 from datetime import datetime, timedelta
 import threading
 import time
+from modules.embedding_backends import load_embedder
+from modules.embedding_cascade import CASCADE_FAST_MODEL
+from modules.embedding_service import BatchingEmbedder, EMBEDDING_MICROBATCH
+from modules.embedding_bank import load_embedding_bank
+from modules.resume_artifacts import embedder_signature
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -364,12 +368,11 @@ def load_local_models():
         logger.error(f"❌ Failed to load spaCy: {e}")
         return None, None, False
     
-    # Verify all required components are available
-    required_components = ["parser", "tagger", "ner"]
-    missing_components = [comp for comp in required_components if comp not in nlp.pipe_names]
+    # Task views (modules.nlp_context) disable what each caller does not need, so only
+    # noun chunks strictly require the parser; sentences fall back to a rule-based sentencizer
+    missing_components = [comp for comp in ("parser", "tagger", "ner") if comp not in nlp.pipe_names]
     if missing_components:
-        logger.error(f"❌ spaCy missing required components: {missing_components}")
-        return None, None, False
+        logger.warning(f"⚠️ spaCy pipeline lacks {missing_components}; dependent features will be degraded")
     
     logger.info(f"✅ spaCy components verified: {', '.join(nlp.pipe_names)}")
 
@@ -379,22 +382,67 @@ def load_local_models():
         s_name = os.getenv("SENTENCE_MODEL_NAME", "all-mpnet-base-v2")
         logger.info(f"Loading sentence transformer: {s_name}")
         
-        # Try to load with memory optimization
-        embedder = SentenceTransformer(s_name, device='cpu')
+        # Backend (torch / onnx / onnx-int8) chosen by EMBEDDER_BACKEND, parity-checked against fp32
+        embedder, backend_info = load_embedder(s_name, device='cpu')
+        _model_cache["embedder_backend"] = backend_info
         
         # Validate embedder works
         test_embedding = embedder.encode(["test"], show_progress_bar=False)
         if test_embedding is None or len(test_embedding) == 0:
             raise ValueError("Embedder produced no output")
         
-        logger.info(f"✅ Sentence transformer loaded: {s_name} (dim={test_embedding.shape[1]})")
+        logger.info(f"✅ Sentence transformer loaded: {s_name} (dim={test_embedding.shape[1]}, "
+                    f"backend={backend_info.get('backend')})")
+        
+        # OPTIMIZATION: common requirement/skill terms come from the precomputed embedding bank
+        _model_cache["embedding_bank"] = load_embedding_bank(embedder_signature(backend_info, embedder))
+        
+        # OPTIMIZATION: coalesce encode calls from concurrent analyses into shared batches
+        if EMBEDDING_MICROBATCH:
+            embedder = BatchingEmbedder(embedder)
+            _model_cache["embedding_service"] = embedder
+            logger.info("✅ Embedding micro-batching service started")
     except Exception as e:
         logger.error(f"❌ Failed to load sentence transformer: {e}")
         return nlp, None, False
 
+    # Optional stage-one model for the embedding cascade (failure only disables the cascade)
+    if CASCADE_FAST_MODEL and CASCADE_FAST_MODEL != s_name:
+        try:
+            fast_embedder, fast_info = load_embedder(CASCADE_FAST_MODEL, device='cpu')
+            if EMBEDDING_MICROBATCH:
+                fast_embedder = BatchingEmbedder(fast_embedder)
+            _model_cache["fast_embedder"] = fast_embedder
+            _model_cache["fast_embedder_backend"] = fast_info
+            logger.info(f"✅ Cascade fast embedder loaded: {CASCADE_FAST_MODEL} (backend={fast_info.get('backend')})")
+        except Exception as e:
+            logger.warning(f"⚠️ Cascade fast embedder unavailable ({e}), using {s_name} only")
+
     return nlp, embedder, True
 
 
+def get_fast_embedder():
+    """Stage-one embedder for the cascade, or None when the cascade is disabled."""
+    return _model_cache.get("fast_embedder")
+
+
+def get_embedding_bank():
+    """Precomputed term embeddings for the loaded embedder, or None when not built."""
+    return _model_cache.get("embedding_bank")
+
+
+def get_embedder_info():
+    """Backend details of the loaded embedders (for health reporting)."""
+    service = _model_cache.get("embedding_service")
+    bank = _model_cache.get("embedding_bank")
+    return {
+        "backend": _model_cache.get("embedder_backend"),
+        "fast_backend": _model_cache.get("fast_embedder_backend"),
+        "microbatch": service.stats() if service is not None else None,
+        "embedding_bank": bank.stats() if bank is not None else None,
+    }
+
+
 def get_model_mode():
     """Get current operation mode (hybrid/local/unknown)."""
     return _model_cache.get("model_mode", "unknown")
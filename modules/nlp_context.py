@@ -0,0 +1,214 @@
+"""
+Request-Scoped spaCy Document Context
+Per-task component selection over the shared spaCy pipeline (never mutated)
+and a per-request Doc cache that parses each distinct text once
+"""
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+# "parser": sentence views use the dependency parser (most accurate, the default)
+# "rule": sentence-only views disable the parser and use a private rule-based sentencizer
+NLP_SENTENCE_MODE = os.getenv("NLP_SENTENCE_MODE", "parser").strip().lower()
+NLP_PIPE_BATCH_SIZE = int(os.getenv("NLP_PIPE_BATCH_SIZE", "32"))
+
+# Components each consumer actually needs; everything else is disabled per call.
+# tok2vec feeds tagger/parser/ner in the small English pipelines, so it always runs.
+TASK_COMPONENTS = {
+    "tokens": (),
+    "sents": ("parser", "senter", "sentencizer"),
+    "ents": ("ner", "entity_ruler"),
+    "noun_chunks": ("tagger", "attribute_ruler", "parser"),
+    "lemmas": ("tagger", "attribute_ruler", "lemmatizer"),
+}
+TASK_ALIASES = {"sentences": "sents", "entities": "ents"}
+SHARED_COMPONENTS = ("tok2vec", "transformer")
+SENTENCE_COMPONENTS = ("parser", "senter", "sentencizer")
+
+
+def _task_names(tasks):
+    return frozenset(TASK_ALIASES.get(task, task) for task in tasks)
+
+
+def components_for(tasks):
+    """Union of pipeline components required by the given tasks."""
+    needed = set(SHARED_COMPONENTS)
+    for task in _task_names(tasks):
+        if task not in TASK_COMPONENTS:
+            raise ValueError(f"Unknown spaCy task '{task}'")
+        needed.update(TASK_COMPONENTS[task])
+    return needed
+
+
+class PipelineManager:
+    """
+    Named task views over one shared spaCy pipeline.
+
+    Every call passes `disable=` for the components a task does not need instead of
+    changing the pipeline, so the same `nlp` is safe to share across threads. When no
+    enabled component sets sentence boundaries (a pipeline without a parser, or
+    NLP_SENTENCE_MODE=rule), a private Sentencizer is applied to the parsed Docs.
+    """
+
+    def __init__(self, nlp, sentence_mode=None):
+        self.nlp = nlp
+        self.sentence_mode = (sentence_mode or NLP_SENTENCE_MODE or "parser").lower()
+        self._disabled = {}
+        self._sentencizer = None
+        self._lock = threading.Lock()
+
+    def disabled(self, tasks):
+        """Pipeline components to disable for `tasks` (cached per task set)."""
+        tasks = _task_names(tasks)
+        cached = self._disabled.get(tasks)
+        if cached is None:
+            needed = components_for(tasks)
+            if self.sentence_mode == "rule" and tasks == {"sents"}:
+                needed -= {"parser"}
+            cached = (tuple(name for name in self.nlp.pipe_names if name not in needed),
+                      "sents" in tasks and not any(name in needed and name in self.nlp.pipe_names
+                                                   for name in SENTENCE_COMPONENTS))
+            self._disabled[tasks] = cached
+        return cached
+
+    def _sentence_fallback(self):
+        with self._lock:
+            if self._sentencizer is None:
+                from spacy.pipeline import Sentencizer
+                self._sentencizer = Sentencizer()
+        return self._sentencizer
+
+    def parse(self, text, tasks=("sents",)):
+        """One Doc for `text` with only the components `tasks` need."""
+        disable, needs_sentencizer = self.disabled(tasks)
+        doc = self.nlp(text, disable=list(disable))
+        return self._sentence_fallback()(doc) if needs_sentencizer else doc
+
+    def pipe(self, texts, tasks=("sents",), batch_size=NLP_PIPE_BATCH_SIZE, n_process=1):
+        """Docs for many texts in one nlp.pipe stream (e.g. batched atom lemmatization), in input order."""
+        disable, needs_sentencizer = self.disabled(tasks)
+        sentencizer = self._sentence_fallback() if needs_sentencizer else None
+        for doc in self.nlp.pipe(texts, disable=list(disable), batch_size=batch_size, n_process=n_process):
+            yield sentencizer(doc) if sentencizer is not None else doc
+
+    def sentences(self, text):
+        return [s.text.strip() for s in self.parse(text, ("sents",)).sents if s.text.strip()]
+
+    def entities(self, text):
+        return list(self.parse(text, ("ents",)).ents)
+
+    def noun_chunks(self, text):
+        doc = self.parse(text, ("noun_chunks",))
+        return list(doc.noun_chunks) if doc.has_annotation("DEP") else []  # needs the parser
+
+    def lemmas(self, text):
+        return [t.lemma_ for t in self.parse(text, ("lemmas",))]
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def pipeline_manager(nlp):
+    """The shared PipelineManager for `nlp` (None when spaCy is unavailable)."""
+    if nlp is None:
+        return None
+    manager = _managers.get(id(nlp))
+    if manager is None or manager.nlp is not nlp:
+        with _managers_lock:
+            manager = _managers.get(id(nlp))
+            if manager is None or manager.nlp is not nlp:
+                manager = PipelineManager(nlp)
+                _managers[id(nlp)] = manager
+    return manager
+
+
+class DocumentContext:
+    """
+    Per-request cache of parsed spaCy Docs keyed by text.
+
+    Consumers ask for a task ("sents", "ents", "noun_chunks"); the first request for a
+    text parses it with the components for every task registered so far via prepare(),
+    later requests reuse that Doc. Prefix-limited consumers (e.g. entities over the
+    first 5k chars) filter spans by character offset instead of re-parsing a slice.
+    A text registered with derive() (e.g. the normalized resume) takes its sentences
+    from the Doc of its source text, so the request parses one text, not two.
+    """
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self.pipelines = pipeline_manager(nlp)
+        self._docs = {}
+        self._tasks = {}
+        self._planned = {}
+        self._derived = {}
+        self.parse_count = 0
+
+    def prepare(self, text, tasks):
+        """Declare tasks that will be requested for `text` so a single parse covers them all."""
+        if text in self._derived:
+            text = self._derived[text][0]
+        if text:
+            self._planned.setdefault(text, set()).update(_task_names(tasks))
+
+    def derive(self, text, source, transform):
+        """
+        Serve sents() for `text` from the Doc of `source`, where text == transform(source)
+        and transform maps each sentence on its own (e.g. normalize_text).
+        """
+        if text and source and text != source:
+            self._derived[text] = (source, transform)
+            self.prepare(source, ("sents",))
+
+    def doc(self, text, tasks=("sents",)):
+        """Parsed Doc for `text` covering at least `tasks` (None if spaCy is unavailable)."""
+        if self.nlp is None or not text:
+            return None
+        tasks = set(_task_names(tasks))
+        cached_tasks = self._tasks.get(text)
+        if cached_tasks is not None and tasks.issubset(cached_tasks):
+            return self._docs[text]
+
+        wanted = tasks | self._planned.get(text, set()) | (cached_tasks or set())
+        if cached_tasks is not None:
+            logger.warning(f"⚠️ Re-parsing text for undeclared tasks {sorted(tasks - cached_tasks)} "
+                           f"(declare them with prepare())")
+        doc = self.pipelines.parse(text, wanted)
+        self.parse_count += 1
+        self._docs[text] = doc
+        self._tasks[text] = wanted
+        return doc
+
+    def seed(self, text, doc, tasks):
+        """Register an already-parsed Doc (e.g. restored from a resume artifact) for `text`."""
+        if text and doc is not None:
+            self._docs[text] = doc
+            self._tasks[text] = set(tasks)
+
+    def export(self, texts):
+        """[(Doc, tasks)] for the given texts that have been parsed in this context."""
+        return [(self._docs[t], set(self._tasks[t])) for t in dict.fromkeys(texts) if t in self._docs]
+
+    def sents(self, text):
+        if text in self._derived:
+            source, transform = self._derived[text]
+            return [s for s in (transform(sent).strip() for sent in self.sents(source)) if s]
+        doc = self.doc(text, ("sents",))
+        if doc is None:
+            return []
+        return [s.text.strip() for s in getattr(doc, "sents", []) if s.text.strip()]
+
+    def ents(self, text, limit=None):
+        doc = self.doc(text, ("ents",))
+        if doc is None:
+            return []
+        return [e for e in doc.ents if limit is None or e.end_char <= limit]
+
+    def noun_chunks(self, text, limit=None):
+        doc = self.doc(text, ("noun_chunks",))
+        if doc is None or not doc.has_annotation("DEP"):
+            return []
+        return [c for c in doc.noun_chunks if limit is None or c.end_char <= limit]
@@ -3,32 +3,40 @@ Dynamic Prompt Enrichment with AI-Powered Context Learning
 Uses NLP and machine learning to extract and learn context from JD/Resume dynamically
 Enterprise-grade with caching, validation, and ReDoS protection
 """
+import os
 import re
 import logging
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict
 import hashlib
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 # ENTERPRISE CONFIGURATION
 MAX_TEXT_FOR_ENRICHMENT = 20000  # characters
 MAX_REGEX_INPUT = 15000  # characters (ReDoS protection)
-CACHE_SIZE = 128  # LRU cache entries
+CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "256"))  # EnrichmentContext LRU entries
+RESUME_PROFILE_CONTEXT_CHARS = 3000  # resume prefix behind the profile prompt's context
+RESUME_PREVIEW_CHARS = 1000  # resume preview behind the JD plan prompt's context
 
 # ============================================================================
 # DYNAMIC CONTEXT EXTRACTION
 # ============================================================================
 
 def _hash_text(text):
-    """Generate hash for caching purposes."""
-    return hashlib.md5(text.encode('utf-8', errors='ignore')).hexdigest()[:16]
+    """SHA-256 content hash (same digest as resume artifact keys for text input)."""
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
 
 
-@lru_cache(maxsize=CACHE_SIZE)
-def _extract_technical_entities_cached(text_hash, text):
-    """Cached version of technical entity extraction."""
-    return _extract_technical_entities_impl(text)
+def _empty_entities():
+    return {
+        "technologies": [],
+        "frameworks": [],
+        "tools": [],
+        "domains": [],
+        "experience_requirements": [],
+        "version_specific": []
+    }
 
 
 def extract_technical_entities(text, nlp_model=None):
@@ -38,27 +46,11 @@ def extract_technical_entities(text, nlp_model=None):
     """
     if not text or not isinstance(text, str):
         logger.warning("Invalid text input to extract_technical_entities")
-        return {
-            "technologies": [],
-            "frameworks": [],
-            "tools": [],
-            "domains": [],
-            "experience_requirements": [],
-            "version_specific": []
-        }
-    
-    # Truncate if too long
-    if len(text) > MAX_TEXT_FOR_ENRICHMENT:
-        logger.warning(f"Text truncated for enrichment: {len(text)} → {MAX_TEXT_FOR_ENRICHMENT}")
-        text = text[:MAX_TEXT_FOR_ENRICHMENT]
-    
-    # Use cache
-    text_hash = _hash_text(text)
-    try:
-        return _extract_technical_entities_cached(text_hash, text)
-    except Exception as e:
-        logger.error(f"Cached extraction failed: {e}, falling back to direct call")
-        return _extract_technical_entities_impl(text)
+        return _empty_entities()
+    
+    # Served from the content-hash keyed EnrichmentContext cache (copied: callers may mutate)
+    entities = enrichment_context(text, "jd").entities
+    return {key: list(values) for key, values in entities.items()}
 
 
 def _extract_technical_entities_impl(text):
@@ -284,19 +276,111 @@ def extract_leadership_indicators(text):
     }
 
 
-def enrich_prompt_with_context(base_prompt, jd_text, resume_preview="", nlp_model=None):
+# ============================================================================
+# REQUEST-SCOPED ENRICHMENT CONTEXT
+# ============================================================================
+
+class EnrichmentContext:
+    """
+    Every enrichment signal of one JD or resume, computed once and injected into
+    each prompt builder. Holds the content hash and extracted signals, never the text.
+    `strengths` is only computed for resumes.
+    """
+
+    __slots__ = ("content_hash", "kind", "entities", "domain", "strengths")
+
+    def __init__(self, content_hash, kind, entities, domain, strengths=None):
+        self.content_hash = content_hash
+        self.kind = kind
+        self.entities = entities
+        self.domain = domain
+        self.strengths = strengths
+
+    @classmethod
+    def build(cls, text, kind="jd"):
+        text = (text or "")[:MAX_TEXT_FOR_ENRICHMENT]
+        return cls(_hash_text(text), kind,
+                   _extract_technical_entities_impl(text) if text else _empty_entities(),
+                   extract_domain_context(text),
+                   extract_resume_strengths(text) if kind == "resume" else None)
+
+    def to_dict(self):
+        return {"content_hash": self.content_hash, "kind": self.kind, "entities": self.entities,
+                "domain": self.domain, "strengths": self.strengths}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a stored context (None when the payload is unusable)."""
+        try:
+            return cls(data["content_hash"], data["kind"], data["entities"], data["domain"], data.get("strengths"))
+        except (KeyError, TypeError):
+            return None
+
+
+_contexts = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def _cache_context(context):
+    with _contexts_lock:
+        _contexts[(context.content_hash, context.kind)] = context
+        _contexts.move_to_end((context.content_hash, context.kind))
+        while len(_contexts) > CACHE_SIZE:
+            _contexts.popitem(last=False)
+    return context
+
+
+def enrichment_context(text, kind="jd"):
+    """EnrichmentContext for `text` ("jd" or "resume"), cached by content hash."""
+    if len(text or "") > MAX_TEXT_FOR_ENRICHMENT:
+        logger.info(f"Text truncated for enrichment: {len(text)} → {MAX_TEXT_FOR_ENRICHMENT}")
+    key = (_hash_text((text or "")[:MAX_TEXT_FOR_ENRICHMENT]), kind)
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is not None:
+            _contexts.move_to_end(key)
+            return context
+    return _cache_context(EnrichmentContext.build(text, kind))
+
+
+def resume_enrichment_contexts(resume_text):
+    """
+    (profile, preview) contexts of a resume, over the same prefixes the resume profile
+    prompt (RESUME_PROFILE_CONTEXT_CHARS) and the JD plan preview (RESUME_PREVIEW_CHARS) use.
+    """
+    resume_text = resume_text or ""
+    return (enrichment_context(resume_text[:RESUME_PROFILE_CONTEXT_CHARS], "resume"),
+            enrichment_context(resume_text[:RESUME_PREVIEW_CHARS], "resume"))
+
+
+def seed_enrichment_context(data):
+    """Register contexts restored from a stored artifact (EnrichmentContext.to_dict payloads, one or a list)."""
+    contexts = [EnrichmentContext.from_dict(item) for item in (data if isinstance(data, list) else [data])
+                if isinstance(item, dict)]
+    for context in contexts:
+        if context is not None:
+            _cache_context(context)
+    return len([c for c in contexts if c is not None])
+
+
+def enrich_prompt_with_context(base_prompt, jd_text, resume_preview="", nlp_model=None,
+                               jd_context=None, resume_context=None):
     """
     Dynamically enrich prompt with AI-extracted context from JD and resume.
     NO static lexicons - learns from actual content.
+    Pass precomputed EnrichmentContexts to skip extraction entirely.
     """
     # Extract dynamic context from JD
-    jd_entities = extract_technical_entities(jd_text, nlp_model)
-    domain_context = extract_domain_context(jd_text)
+    jd_context = jd_context or enrichment_context(jd_text, "jd")
+    jd_entities = jd_context.entities
+    domain_context = jd_context.domain
     
     # Extract dynamic context from resume (if provided)
     resume_strengths = None
-    if resume_preview:
-        resume_strengths = extract_resume_strengths(resume_preview, nlp_model)
+    if resume_context is not None:
+        resume_strengths = resume_context.strengths
+    elif resume_preview:
+        resume_strengths = enrichment_context(resume_preview, "resume").strengths
     
     # Build dynamic context injection
     context_lines = []
@@ -374,5 +458,8 @@ __all__ = [
     'extract_complexity_indicators',
     'extract_resume_strengths',
     'extract_leadership_indicators',
-    'enrich_prompt_with_context'
+    'enrich_prompt_with_context',
+    'EnrichmentContext',
+    'enrichment_context',
+    'seed_enrichment_context'
 ]
@@ -0,0 +1,192 @@
+"""
+Local Requirement Extraction
+JD requirements without the LLM: taxonomy/keyword hits plus spaCy atom candidates,
+validated and deduplicated, classified must/nice from cue words, cached per JD
+"""
+import os
+import re
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from modules.skill_taxonomy import get_taxonomy
+from modules.text_processing import (
+    normalize_text, compile_terms, extract_atoms_from_text, refine_atom_list,
+    TECHNICAL_KEYWORD_MATCHER,
+)
+from modules.abbreviation_mapping import deduplicate_requirements
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+REQUIREMENT_EXTRACTION_MODE = os.getenv("REQUIREMENT_EXTRACTION_MODE", "llm").strip().lower()  # llm | local
+REQUIREMENT_MODES = ("llm", "local")
+LOCAL_REQUIREMENTS_MAX = int(os.getenv("LOCAL_REQUIREMENTS_MAX", "30"))
+LOCAL_REQUIREMENT_CACHE_SIZE = int(os.getenv("LOCAL_REQUIREMENT_CACHE_SIZE", "128"))
+MAX_JD_CHARS = 20000
+
+NICE_CUES = re.compile(
+    r"\b(?:nice[- ]to[- ]haves?|good[- ]to[- ]have|preferred|preferably|prefer|bonus|(?:a|big|huge) plus|"
+    r"plus points?|desirable|desired|ideally|optional|advantage(?:ous)?|not required|would be great)\b",
+    re.IGNORECASE)
+MUST_CUES = re.compile(
+    r"\b(?:must|required|requirements?|mandatory|essential|minimum|at least|qualifications|you have|"
+    r"what you(?:'ll)? need|need to have|expected)\b",
+    re.IGNORECASE)
+HEADER_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9 \-&/'()]{1,50}:$")
+SMALL_WORDS = {"a", "an", "and", "or", "of", "to", "the", "for", "in", "with", "we", "you"}
+
+# Skill names that are also everyday words: kept only in technical context (see _in_context)
+COMMON_WORD_FORMS = frozenset({
+    "go", "r", "c", "rust", "swift", "shell", "dart", "ruby", "julia", "elixir", "groovy", "react", "ember",
+    "backbone", "bootstrap", "less", "next", "express", "nest", "spring", "rails", "flask", "node", "lambda",
+    "spark", "hive", "helm", "chef", "puppet", "oracle", "rest", "soap", "apache", "windows", "ionic", "mocha",
+    "chai", "jasmine", "travis", "parcel", "rollup", "babel", "transformers", "insomnia", "torch", "networking",
+    "os", "cn", "ai", "iam",
+})
+CONTEXT_CHARS = 40  # max gap between a common-word hit and an unambiguous skill on the same line
+CONTEXT_LINE_WORDS = 4  # lines this short are skill-list items ("- Spring", "Experience with React")
+
+
+def requirement_mode(requested=None):
+    """Effective extraction mode for a request (ValueError on an unknown mode)."""
+    mode = (requested or REQUIREMENT_EXTRACTION_MODE or "llm").strip().lower()
+    if mode not in REQUIREMENT_MODES:
+        raise ValueError(f"requirement mode must be one of {', '.join(REQUIREMENT_MODES)}")
+    return mode
+
+
+def _is_header(line):
+    """A colon-terminated short line, or a short Title Case / UPPERCASE one."""
+    words = line.rstrip(":").split()
+    if not words or len(words) > 6:
+        return False
+    if HEADER_PATTERN.match(line):
+        return True
+    return len(words) <= 4 and (line.isupper() or all(w[0].isupper() for w in words if w.lower() not in SMALL_WORDS))
+
+
+def _line_priorities(text):
+    """(normalized line, 'must'|'nice') for every non-empty line; headers set the default for their section."""
+    section, lines = "must", []
+    for raw in text.splitlines():
+        line = raw.strip(" \t-•*·|")
+        if not line:
+            continue
+        nice_cue, must_cue = NICE_CUES.search(line), MUST_CUES.search(line)
+        if _is_header(line):
+            # Section header: "Nice to have:", "Requirements", "Preferred Qualifications" ...
+            if nice_cue:
+                section = "nice"
+            elif must_cue or line.endswith(":"):
+                section = "must"
+            if line.endswith(":"):
+                continue
+        priority = "nice" if nice_cue else "must" if must_cue else section
+        lines.append((normalize_text(line), priority))
+    return lines
+
+
+def _known_skill_terms():
+    """Taxonomy forms worth matching as phrases (1-2 letter forms like 'r' or 'ts' are too ambiguous)."""
+    return tuple(sorted(form for form in get_taxonomy().term_class if len(form) > 2))
+
+
+def _in_context(hit, anchors, line):
+    """A common-word hit counts on a short list-like line or next to an unambiguous skill."""
+    if len(line.split()) <= CONTEXT_LINE_WORDS:
+        return True
+    start, end, _ = hit
+    return any(max(a_start - end, start - a_end) <= CONTEXT_CHARS for a_start, a_end, _ in anchors)
+
+
+def _extract(jd_text, nlp, max_requirements):
+    text = jd_text[:MAX_JD_CHARS]
+    lines = _line_priorities(text)
+
+    # High-precision signals first: taxonomy forms and technical keywords, in JD order
+    taxonomy_terms = compile_terms(_known_skill_terms(), word_boundaries=True)
+    known, priority = [], {}
+    for line, line_priority in lines:
+        hits = list(taxonomy_terms.finditer(line)) + list(TECHNICAL_KEYWORD_MATCHER.finditer(line))
+        covered, kept = 0, []
+        # Longest match wins: "rest api" is one requirement, not "rest api" + "rest" + "api"
+        for hit in sorted(hits, key=lambda hit: (hit[0], -hit[1])):
+            if hit[1] > covered:
+                kept.append(hit)
+                covered = hit[1]
+        # "spring" in "plan the spring release" is not Spring: common words need a skill nearby
+        anchors = [hit for hit in kept if hit[2] not in COMMON_WORD_FORMS]
+        for hit in kept:
+            term = hit[2]
+            if term in COMMON_WORD_FORMS and not _in_context(hit, anchors, line):
+                continue
+            if term not in priority:
+                known.append(term)
+            if priority.get(term) != "must":
+                priority[term] = line_priority
+
+    # Dynamic candidates (noun chunks, list items, compact phrases), validated and canonicalized in one batch
+    atoms = []
+    if nlp is not None:
+        try:
+            candidates = [a for a in extract_atoms_from_text(text, nlp, max_atoms=80) if len(a.split()) <= 4]
+            atoms, _ = refine_atom_list(candidates, nlp, limit=max_requirements * 2)
+        except Exception as e:
+            logger.warning(f"⚠️ Local atom extraction failed, using taxonomy matches only: {e}")
+    for atom in atoms:
+        for line, line_priority in lines:
+            if atom in line and priority.get(atom) != "must":
+                priority[atom] = line_priority
+    atoms = [a for a in atoms if a in priority]
+
+    requirements = deduplicate_requirements(known + atoms, nlp)[:max_requirements]
+    known_set = set(known)
+    result = {category: {"must": [], "nice": []}
+              for category in ("hard_skills", "fundamentals", "experience", "qualifications")}
+    for req in requirements:
+        category = "hard_skills" if req in known_set else "fundamentals"
+        result[category][priority.get(req, "must")].append(req)
+    result["must"] = [r for r in requirements if priority.get(r, "must") == "must"]
+    result["nice"] = [r for r in requirements if priority.get(r) == "nice"]
+    result["source"] = "local"
+    return result
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def extract_requirements_local(jd_text, nlp=None, max_requirements=LOCAL_REQUIREMENTS_MAX):
+    """
+    Local must/nice requirement extraction, shaped like the atomicize prompt's response
+    (hard_skills/fundamentals/experience/qualifications -> must/nice) plus flat must/nice lists.
+    Results are cached per JD content hash and taxonomy snapshot; callers get a copy.
+    """
+    jd_text = jd_text or ""
+    taxonomy = get_taxonomy()
+    key = (hashlib.sha256(jd_text.strip().encode("utf-8")).hexdigest(), max_requirements, nlp is not None)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] is taxonomy:
+            _cache.move_to_end(key)
+            return copy.deepcopy(cached[1])
+
+    result = _extract(jd_text, nlp, max_requirements)
+    logger.info(f"✅ Local requirements: {len(result['must'])} must-have, {len(result['nice'])} nice-to-have")
+    if LOCAL_REQUIREMENT_CACHE_SIZE > 0:
+        with _cache_lock:
+            _cache[key] = (taxonomy, result)
+            _cache.move_to_end(key)
+            while len(_cache) > LOCAL_REQUIREMENT_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return copy.deepcopy(result)
+
+
+def local_requirement_plan(requirements):
+    """jd_plan stand-in for the LLM plan prompt, built from extract_requirements_local output."""
+    return {"requirements": requirements["must"] + requirements["nice"],
+            "must_have": list(requirements["must"]), "nice_to_have": list(requirements["nice"]),
+            "source": "local"}
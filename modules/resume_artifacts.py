@@ -0,0 +1,422 @@
+"""
+Processed Resume Artifacts
+Versioned binary bundle of a parsed resume (text, offsets, spaCy DocBin, fp16 vectors,
+token index, skills and entities) keyed by content hash and loaded zero-copy via mmap
+"""
+import os
+import json
+import mmap
+import struct
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+try:
+    from spacy.tokens import DocBin
+    SPACY_AVAILABLE = True
+except ImportError:
+    DocBin = None
+    SPACY_AVAILABLE = False
+
+from modules.text_processing import build_embedding_lookup, encode_with_lookup
+from modules.segment_index import SegmentIndex
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+RESUME_ARTIFACTS = os.getenv("RESUME_ARTIFACTS", "1").strip().lower() in ("1", "true", "yes", "on")
+RESUME_ARTIFACT_DIR = os.getenv("RESUME_ARTIFACT_DIR",
+                                os.path.join(tempfile.gettempdir(), "resume_screener_artifacts"))
+ARTIFACT_VERSION = 1
+ARTIFACT_MAGIC = b"RSMART\x00\x01"
+_ALIGNMENT = 64  # every array section starts on a 64-byte boundary
+_PREFIX = struct.Struct("<8sQ")  # magic, header length
+
+
+def content_hash(data):
+    """SHA-256 hex digest of raw resume bytes (PDF upload) or text."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data or b"").hexdigest()
+
+
+def artifact_key(resume_hash, user_id):
+    """
+    Artifact key for one user's copy of a resume. Artifacts carry the resume text and contact
+    fields, so two users uploading the same file never share one.
+    """
+    if not resume_hash:
+        return None
+    return hashlib.sha256(f"{user_id}:{resume_hash}".encode("utf-8")).hexdigest()
+
+
+def artifact_path(key):
+    return os.path.join(RESUME_ARTIFACT_DIR, key[:2], f"{key}.rsa")
+
+
+def embedder_signature(embedder_info, embedder=None):
+    """Identifies the vectors stored in an artifact; artifacts from another model are ignored."""
+    info = embedder_info or {}
+    dim = None
+    if embedder is not None and hasattr(embedder, "get_sentence_embedding_dimension"):
+        try:
+            dim = embedder.get_sentence_embedding_dimension()
+        except Exception:
+            dim = None
+    return f"{info.get('model', 'unknown')}|{info.get('backend', 'torch')}|{dim}"
+
+
+def processing_signature(embedder=None, nlp=None):
+    """
+    Settings baked into an artifact: chunking and segmentation (chunks, segments, vectors),
+    the spaCy pipeline (stored Docs, entities) and the skill vocabulary (technical_skills).
+    """
+    from modules import text_processing as tp
+    from modules.scoring import MAX_EVIDENCE_SEGMENTS, MIN_SEGMENT_CHARS
+    from modules.skill_taxonomy import get_taxonomy
+
+    window = getattr(embedder, "max_seq_length", None) if embedder is not None else None
+    meta = getattr(nlp, "meta", None) or {}
+    spacy_model = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}" if nlp is not None else None
+    taxonomy = get_taxonomy()
+    return (f"chunks:{tp.RESUME_CHUNK_MAX_CHARS}/{tp.RESUME_CHUNK_OVERLAP}/{tp.MAX_CHUNK_COUNT}|"
+            f"tokens:{window}/{tp.TOKEN_CHUNK_OVERLAP}|"
+            f"semantic:{tp.SEMANTIC_BOUNDARY_THRESHOLD}/{tp.SEMANTIC_MIN_CHUNK_CHARS}|"
+            f"segments:{MAX_EVIDENCE_SEGMENTS}/{MIN_SEGMENT_CHARS}|"
+            f"spacy:{spacy_model}|"
+            f"keywords:{_keyword_digest(tp.TECHNICAL_KEYWORDS)}|"
+            f"taxonomy:{len(taxonomy)}/{taxonomy.mtime}")
+
+
+@lru_cache(maxsize=4)
+def _keyword_digest(keywords):
+    """Short digest of the technical keyword set (a frozenset, so computed once per set)."""
+    return hashlib.sha256("\n".join(sorted(keywords)).encode("utf-8")).hexdigest()[:12]
+
+
+def _spans_in(buffer_parts, text, segments):
+    """
+    Character spans of `segments` inside `text`, searched left to right.
+    Segments not found verbatim (whitespace-normalized chunks) are appended to
+    buffer_parts so every span points into the stored text buffer.
+    """
+    spans = np.zeros((len(segments), 2), dtype=np.int32)
+    cursor = 0
+    for i, seg in enumerate(segments):
+        start = text.find(seg, cursor)
+        if start < 0:
+            start = text.find(seg)
+        if start < 0:
+            start = sum(len(p) for p in buffer_parts)
+            buffer_parts.append(seg)
+        else:
+            cursor = start + 1
+        spans[i] = (start, start + len(seg))
+    return spans
+
+
+def _fp16(vectors, count):
+    if vectors is None or len(vectors) != count or count == 0:
+        return None
+    return np.ascontiguousarray(np.asarray(vectors, dtype=np.float32).astype(np.float16))
+
+
+class ResumeArtifact:
+    """
+    Read-only view over a stored artifact.
+
+    Array sections (spans, fp16 embeddings, CSR token index) are numpy views into
+    the memory-mapped file, so loading costs one header parse; nothing is copied
+    until a consumer needs float32 (FAISS) or Python strings.
+    """
+
+    def __init__(self, header, buffer, mapped=None):
+        self.header = header
+        self._buffer = buffer
+        self._mmap = mapped
+        self._arrays = {}
+        text_buffer = self._section("text")
+        self._text_buffer = bytes(text_buffer).decode("utf-8") if text_buffer is not None else ""
+
+    def _section(self, name):
+        if name in self._arrays:
+            return self._arrays[name]
+        spec = self.header["sections"].get(name)
+        if spec is None:
+            return None
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        if count == 0:
+            arr = np.zeros(spec["shape"], dtype=dtype)
+        else:
+            arr = np.frombuffer(self._buffer, dtype=dtype, count=count,
+                                offset=self.header["data_start"] + spec["offset"]).reshape(spec["shape"])
+        self._arrays[name] = arr
+        return arr
+
+    def _strings(self, name):
+        spans = self._section(name)
+        if spans is None:
+            return []
+        return [self._text_buffer[a:b] for a, b in spans.tolist()]
+
+    @property
+    def key(self):
+        return self.header["content_hash"]
+
+    @property
+    def text(self):
+        """Normalized resume text."""
+        return self._text_buffer[:self.header["text_length"]]
+
+    @property
+    def source_text(self):
+        raw = self._section("source_text")
+        return bytes(raw).decode("utf-8") if raw is not None else self.text
+
+    @property
+    def sentences(self):
+        return self._strings("sentence_spans")
+
+    @property
+    def chunks(self):
+        return self._strings("chunk_spans")
+
+    @property
+    def segments(self):
+        return self._strings("segment_spans")
+
+    @property
+    def sentence_embeddings(self):
+        return self._section("sentence_embeddings")
+
+    @property
+    def chunk_embeddings(self):
+        return self._section("chunk_embeddings")
+
+    @property
+    def segment_embeddings(self):
+        return self._section("segment_embeddings")
+
+    @property
+    def technical_skills(self):
+        return list(self.header.get("technical_skills", []))
+
+    @property
+    def entities(self):
+        return dict(self.header.get("entities", {}))
+
+    @property
+    def enrichment(self):
+        """Stored prompt EnrichmentContext payloads of the resume prefixes (None for older artifacts)."""
+        return self.header.get("enrichment")
+
+    def embedding_lookup(self):
+        """Text -> fp16 vector view for sentences, chunks and evidence segments."""
+        lookup = build_embedding_lookup(self.sentences, self.sentence_embeddings)
+        lookup.update(build_embedding_lookup(self.chunks, self.chunk_embeddings))
+        lookup.update(build_embedding_lookup(self.segments, self.segment_embeddings))
+        return lookup
+
+    def segment_index(self):
+        """SegmentIndex over the stored evidence segments, rebuilt from the stored CSR arrays."""
+        indptr = self._section("token_indptr")
+        if indptr is None:
+            return None
+        return SegmentIndex.from_csr(self.segments, self.header.get("vocabulary", []), indptr,
+                                     self._section("token_indices"), self.text)
+
+    def resume_data(self):
+        """Parser-shaped dict (same keys as parse_resume_pdf) without index or vectors."""
+        meta = self.header.get("meta", {})
+        return {
+            "name": meta.get("name", "Unknown"),
+            "email": meta.get("email", "Not found"),
+            "phone": meta.get("phone", "Not found"),
+            "text": self.source_text,
+            "chunks": self.chunks,
+            "sentences": self.sentences,
+            "entities": self.entities,
+            "technical_skills": self.technical_skills,
+            "extraction_method": meta.get("extraction_method", "artifact"),
+            "content_hash": self.key,
+        }
+
+    def restore_docs(self, doc_context):
+        """Seed a DocumentContext with the stored spaCy Docs so no text is re-parsed."""
+        blob = self._section("docbin")
+        if blob is None or doc_context is None or doc_context.nlp is None or not SPACY_AVAILABLE:
+            return 0
+        try:
+            docs = list(DocBin().from_bytes(bytes(blob)).get_docs(doc_context.nlp.vocab))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not restore spaCy docs from artifact: {e}")
+            return 0
+        for doc, tasks in zip(docs, self.header.get("doc_tasks", [])):
+            doc_context.seed(doc.text, doc, tasks)
+        return len(docs)
+
+    def close(self):
+        self._arrays.clear()
+        self._buffer = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # numpy views still alive; the map is released with them
+            self._mmap = None
+
+
+def _data_start(header_len):
+    return (_PREFIX.size + header_len + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_artifact(path, header, sections):
+    """
+    Serialize header + named arrays to `path` atomically.
+    Layout: magic | header length | JSON header | padding | 64-byte aligned array sections.
+    Section offsets in the header are relative to the (aligned) end of the header.
+    """
+    layout = {}
+    offset = 0
+    blobs = []
+    for name, arr in sections.items():
+        if arr is None:
+            continue
+        arr = np.ascontiguousarray(arr)
+        offset = (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+        layout[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        blobs.append((offset, arr))
+        offset += arr.nbytes
+
+    header_bytes = json.dumps(dict(header, sections=layout), ensure_ascii=False, default=str).encode("utf-8")
+    data_start = _data_start(len(header_bytes))
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)  # resume text and contacts: owner-only
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(ARTIFACT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for rel_offset, arr in blobs:
+            f.seek(data_start + rel_offset)
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path):
+    """Memory-map an artifact file. Returns ResumeArtifact or None when missing/invalid."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(mapped, 0)
+        if magic != ARTIFACT_MAGIC:
+            mapped.close()
+            logger.warning(f"⚠️ Not a resume artifact: {path}")
+            return None
+        header = json.loads(bytes(mapped[_PREFIX.size:_PREFIX.size + header_len]).decode("utf-8"))
+        header["data_start"] = _data_start(header_len)
+        if header.get("version") != ARTIFACT_VERSION:
+            mapped.close()
+            logger.info(f"Ignoring artifact with version {header.get('version')} (expected {ARTIFACT_VERSION})")
+            return None
+        return ResumeArtifact(header, mapped, mapped)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to read resume artifact {path}: {e}")
+        return None
+
+
+def load_resume_artifact(key, signature):
+    """Artifact for `key` produced with `signature` (embedder + processing_signature), or None."""
+    if not RESUME_ARTIFACTS or not key:
+        return None
+    artifact = read_artifact(artifact_path(key))
+    if artifact is None:
+        return None
+    if artifact.header.get("embedder") != signature:
+        logger.info(f"Artifact {key[:12]} built with {artifact.header.get('embedder')}, re-processing")
+        artifact.close()
+        return None
+    return artifact
+
+
+def save_resume_artifact(key, signature, embedder, text, segments, segment_index, source_text=None,
+                         sentences=None, sentence_embeddings=None, chunks=None, chunk_embeddings=None,
+                         segment_vectors=None, resume_data=None, doc_context=None, enrichment=None):
+    """
+    Build and persist the artifact for a processed resume.
+
+    Evidence segment vectors missing from `segment_vectors` are encoded here (once)
+    and added to the lookup, so the current analysis reuses them as well.
+    Returns the artifact path, or None when disabled or on failure.
+    """
+    if not RESUME_ARTIFACTS or not key or embedder is None:
+        return None
+    try:
+        sentences = list(sentences or [])
+        chunks = list(chunks or [])
+        segments = list(segments or [])
+
+        segment_embeddings = None
+        if segments:
+            segment_embeddings = encode_with_lookup(embedder, segments, segment_vectors)
+            if segment_vectors is not None:
+                for seg, vec in build_embedding_lookup(segments, segment_embeddings).items():
+                    segment_vectors.setdefault(seg, vec)
+
+        buffer_parts = [text]
+        sections = {
+            "sentence_spans": _spans_in(buffer_parts, text, sentences),
+            "chunk_spans": _spans_in(buffer_parts, text, chunks),
+            "segment_spans": _spans_in(buffer_parts, text, segments),
+            "sentence_embeddings": _fp16(sentence_embeddings, len(sentences)),
+            "chunk_embeddings": _fp16(chunk_embeddings, len(chunks)),
+            "segment_embeddings": _fp16(segment_embeddings, len(segments)),
+        }
+        sections["text"] = np.frombuffer("".join(buffer_parts).encode("utf-8"), dtype=np.uint8)
+        if source_text and source_text != text:
+            sections["source_text"] = np.frombuffer(source_text.encode("utf-8"), dtype=np.uint8)
+
+        vocabulary = []
+        if segment_index is not None:
+            vocabulary = [None] * len(segment_index.vocabulary)
+            for word, col in segment_index.vocabulary.items():
+                vocabulary[col] = word
+            sections["token_indptr"] = segment_index.indptr
+            sections["token_indices"] = segment_index.indices
+
+        doc_tasks = []
+        if doc_context is not None and SPACY_AVAILABLE:
+            stored = doc_context.export([t for t in (source_text, text) if t])
+            if stored:
+                docbin = DocBin(store_user_data=False)
+                for doc, tasks in stored:
+                    docbin.add(doc)
+                    doc_tasks.append(sorted(tasks))
+                sections["docbin"] = np.frombuffer(docbin.to_bytes(), dtype=np.uint8)
+
+        resume_data = resume_data or {}
+        header = {
+            "version": ARTIFACT_VERSION,
+            "content_hash": key,
+            "embedder": signature,
+            "created_at": datetime.utcnow().isoformat(),
+            "text_length": len(text),
+            "meta": {k: resume_data.get(k) for k in ("name", "email", "phone", "extraction_method")
+                     if resume_data.get(k) is not None},
+            "technical_skills": list(resume_data.get("technical_skills") or []),
+            "entities": resume_data.get("entities") or {},
+            "vocabulary": vocabulary,
+            "doc_tasks": doc_tasks,
+            "enrichment": enrichment,
+        }
+        path = artifact_path(key)
+        write_artifact(path, header, sections)
+        logger.info(f"✅ Saved resume artifact {key[:12]} ({len(chunks)} chunks, {len(segments)} segments)")
+        return path
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to save resume artifact: {e}")
+        return None
@@ -12,8 +12,10 @@ except ImportError:
     pdfplumber = None
     PDFPLUMBER_AVAILABLE = False
     
-from modules.text_processing import parse_contacts, chunk_text, build_index
-from modules.text_processing import extract_structured_entities, extract_technical_skills, semantic_chunk_text
+from modules.text_processing import parse_contacts, chunk_text, token_chunk_text, ChunkIndex
+from modules.text_processing import extract_structured_entities, extract_technical_skills
+from modules.text_processing import semantic_chunk_with_embeddings, RESUME_CHUNK_MAX_CHARS
+from modules.nlp_context import DocumentContext
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -100,11 +102,13 @@ def extract_text_from_pdf(file_obj):
     
     return "", "failed"
 
-def parse_resume_pdf(file_obj, nlp, embedder):
+def parse_resume_pdf(file_obj, nlp, embedder, doc_context=None):
     """
     Enhanced multi-strategy resume parser with advanced NLP extraction.
     Uses pdfplumber + PyMuPDF for robust text extraction.
     ENTERPRISE-GRADE: Input validation, size limits, timeout protection.
+    OPTIMIZATION: the resume text is parsed by spaCy once and shared across
+    name detection, entities, chunking and skills via a DocumentContext.
     """
     try:
         logger.info("Parsing PDF resume with multi-strategy approach")
@@ -133,6 +137,13 @@ def parse_resume_pdf(file_obj, nlp, embedder):
         if len(text) > MAX_TEXT_LENGTH:
             logger.warning(f"Text too long ({len(text)} chars), truncating to {MAX_TEXT_LENGTH}")
             text = text[:MAX_TEXT_LENGTH]
+        # The text sanitize_resume_data keeps, so the caller's DocumentContext reuses this parse
+        text = text.strip()
+
+        if nlp and doc_context is None:
+            doc_context = DocumentContext(nlp)
+        if doc_context is not None:
+            doc_context.prepare(text, ("sents", "ents", "noun_chunks"))
 
         # Advanced name extraction
         first_line = (text.splitlines() or [""])[0][:120]
@@ -143,8 +154,8 @@ def parse_resume_pdf(file_obj, nlp, embedder):
             name = first_line
         if not name and nlp:
             try:
-                dn = nlp(text[:600])
-                cand = [e.text for e in dn.ents if e.label_=="PERSON" and len(e.text) <= 60 and '@' not in e.text]
+                ents = doc_context.ents(text, limit=600)
+                cand = [e.text for e in ents if e.label_=="PERSON" and len(e.text) <= 60 and '@' not in e.text]
                 name = cand[0] if cand else "Unknown"
             except Exception as e:
                 logger.warning(f"Name extraction failed: {e}")
@@ -161,38 +172,36 @@ def parse_resume_pdf(file_obj, nlp, embedder):
         structured_entities = {}
         if nlp:
             try:
-                structured_entities = extract_structured_entities(text, nlp)
+                structured_entities = extract_structured_entities(text, nlp, doc_context=doc_context)
                 logger.info(f"✅ Extracted {len(structured_entities)} entity types")
             except Exception as e:
                 logger.warning(f"Entity extraction failed: {e}")
         
-        # Advanced semantic chunking
+        # Advanced semantic chunking (sentences embedded once, chunk vectors pooled)
         chunks = []
+        semantic = {}
         if nlp and embedder:
             try:
-                chunks = semantic_chunk_text(text, nlp, embedder, max_chars=800, overlap=200)
+                semantic = semantic_chunk_with_embeddings(text, nlp, embedder, doc_context=doc_context)
+                chunks = semantic["chunks"]
                 logger.info(f"✅ Created {len(chunks)} semantic chunks")
             except Exception as e:
                 logger.warning(f"Semantic chunking failed: {e}")
         
         if not chunks:
-            chunks = chunk_text(text, max_chars=800, nlp=nlp)
+            semantic = {}
+            chunks = token_chunk_text(text, embedder) if embedder else \
+                chunk_text(text, max_chars=RESUME_CHUNK_MAX_CHARS, nlp=nlp)
             logger.info(f"✅ Created {len(chunks)} basic chunks")
         
-        # Build vector index
-        idx, embs = None, None
-        if embedder and chunks:
-            try:
-                idx, embs = build_index(embedder, chunks)
-                logger.info("✅ Vector index built successfully")
-            except Exception as e:
-                logger.warning(f"Index building failed: {e}")
+        # Chunk vectors (reused from semantic chunking); FAISS index is built on first search
+        chunk_index = ChunkIndex(chunks, embedder, semantic.get("chunk_embeddings")) if embedder and chunks else None
         
         # Advanced technical skills extraction
         technical_skills = []
         if nlp:
             try:
-                technical_skills = extract_technical_skills(text, nlp)
+                technical_skills = extract_technical_skills(text, nlp, doc_context=doc_context)
                 logger.info(f"✅ Extracted {len(technical_skills)} technical skills")
             except Exception as e:
                 logger.warning(f"Technical skills extraction failed: {e}")
@@ -203,8 +212,9 @@ def parse_resume_pdf(file_obj, nlp, embedder):
             "phone": phone,
             "text": text,
             "chunks": chunks,
-            "faiss": idx,
-            "embs": embs,
+            "chunk_index": chunk_index,
+            "sentences": semantic.get("sentences", []),
+            "sentence_embeddings": semantic.get("sentence_embeddings"),
             "entities": structured_entities,
             "technical_skills": technical_skills,
             "extraction_method": method
@@ -224,7 +234,7 @@ def parse_resume_pdf(file_obj, nlp, embedder):
         return None
 
 
-def parse_resume_text(text_content, nlp, embedder):
+def parse_resume_text(text_content, nlp, embedder, doc_context=None):
     """
     Parse plain text resume with same enhancements as PDF parser.
     """
@@ -236,6 +246,10 @@ def parse_resume_text(text_content, nlp, embedder):
             logger.error("Text content too short")
             return None
         
+        if doc_context is None:
+            doc_context = DocumentContext(nlp)
+        doc_context.prepare(text, ("sents", "ents", "noun_chunks"))
+        
         # Extract name (first line heuristic)
         first_line = (text.splitlines() or [""])[0][:120]
         first_line = re.sub(r'\S+@\S+','', first_line)
@@ -245,8 +259,8 @@ def parse_resume_text(text_content, nlp, embedder):
             name = first_line
         if not name:
             try:
-                dn = nlp(text[:600])
-                cand = [e.text for e in dn.ents if e.label_=="PERSON" and len(e.text) <= 60 and '@' not in e.text]
+                ents = doc_context.ents(text, limit=600)
+                cand = [e.text for e in ents if e.label_=="PERSON" and len(e.text) <= 60 and '@' not in e.text]
                 name = cand[0] if cand else "Unknown"
             except:
                 name = "Unknown"
@@ -257,25 +271,25 @@ def parse_resume_text(text_content, nlp, embedder):
         
         # Extract entities
         try:
-            structured_entities = extract_structured_entities(text, nlp)
+            structured_entities = extract_structured_entities(text, nlp, doc_context=doc_context)
         except:
             structured_entities = {}
         
         # Chunk text
         try:
-            chunks = semantic_chunk_text(text, nlp, embedder, max_chars=800, overlap=200)
+            semantic = semantic_chunk_with_embeddings(text, nlp, embedder, doc_context=doc_context)
+            chunks = semantic["chunks"]
         except:
-            chunks = chunk_text(text, max_chars=800, nlp=nlp)
+            semantic = {}
+            chunks = token_chunk_text(text, embedder) if embedder else \
+                chunk_text(text, max_chars=RESUME_CHUNK_MAX_CHARS, nlp=nlp)
         
-        # Build index
-        try:
-            idx, embs = build_index(embedder, chunks)
-        except:
-            idx, embs = None, None
+        # Chunk vectors (reused from semantic chunking); FAISS index is built on first search
+        chunk_index = ChunkIndex(chunks, embedder, semantic.get("chunk_embeddings")) if embedder and chunks else None
         
         # Extract skills
         try:
-            technical_skills = extract_technical_skills(text, nlp)
+            technical_skills = extract_technical_skills(text, nlp, doc_context=doc_context)
         except:
             technical_skills = []
         
@@ -285,8 +299,9 @@ def parse_resume_text(text_content, nlp, embedder):
             "phone": phone,
             "text": text,
             "chunks": chunks,
-            "faiss": idx,
-            "embs": embs,
+            "chunk_index": chunk_index,
+            "sentences": semantic.get("sentences", []),
+            "sentence_embeddings": semantic.get("sentence_embeddings"),
             "entities": structured_entities,
             "technical_skills": technical_skills
         }
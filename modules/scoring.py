@@ -6,18 +6,30 @@ import numpy as np
 import re
 import json
 import logging
-from difflib import SequenceMatcher
 from modules.llm_operations import llm_verify_requirements_clean, llm_json
-from modules.text_processing import retrieve_relevant_context, token_set, contains_atom, normalize_text
+from modules.text_processing import retrieve_relevant_contexts, find_atoms, normalize_text
+from modules.text_processing import pool_embeddings, embed_document, DOCUMENT_EMBEDDING_MODE
+from modules.embedding_cascade import EmbeddingCascade
+from modules.fuzzy_matching import SegmentFuzzyIndex
+from modules.segment_index import SegmentIndex, tokenize_requirement
+from modules.hybrid_retrieval import HybridRetriever
+
+# Evidence segmentation (part of the resume artifact signature)
+MAX_EVIDENCE_SEGMENTS = 400
+MIN_SEGMENT_CHARS = 18
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def compute_global_semantic(jd_text, resume_text, embedder):
+def compute_global_semantic(jd_text, resume_text, embedder, resume_embeddings=None):
     """
     IMPROVED global semantic similarity: fair to good candidates.
     Uses top-k averaging without over-penalizing well-matched resumes.
     ENTERPRISE-GRADE: Input validation, dimension checking, error handling.
+    OPTIMIZATION: when the resume's sentence/chunk vectors are already available
+    (resume_embeddings), the resume vector is pooled from them instead of re-encoding.
+    In "pooled" DOCUMENT_EMBEDDING_MODE, long texts are embedded as token windows and
+    pooled, so nothing past the model's max_seq_length is silently dropped.
     """
     # ROBUSTNESS: Validate inputs
     if embedder is None:
@@ -31,13 +43,20 @@ def compute_global_semantic(jd_text, resume_text, embedder):
         return 0.0
     
     try:
-        # ROBUSTNESS: Limit text length (prevent memory issues)
-        jd_text_truncated = jd_text[:5000]  # Max 5000 chars for embedding
-        resume_text_truncated = resume_text[:10000]  # Max 10000 chars
-        
-        # Encode both texts
-        jd_emb = embedder.encode(jd_text_truncated, convert_to_numpy=True, normalize_embeddings=True)
-        resume_emb = embedder.encode(resume_text_truncated, convert_to_numpy=True, normalize_embeddings=True)
+        resume_emb = pool_embeddings(resume_embeddings)
+        if DOCUMENT_EMBEDDING_MODE == "pooled":
+            jd_emb = embed_document(jd_text, embedder)
+            if resume_emb is None:
+                resume_emb = embed_document(resume_text, embedder)
+        else:
+            # ROBUSTNESS: Limit text length (prevent memory issues)
+            jd_text_truncated = jd_text[:5000]  # Max 5000 chars for embedding
+            resume_text_truncated = resume_text[:10000]  # Max 10000 chars
+            
+            # Encode both texts
+            jd_emb = embedder.encode(jd_text_truncated, convert_to_numpy=True, normalize_embeddings=True)
+            if resume_emb is None:
+                resume_emb = embedder.encode(resume_text_truncated, convert_to_numpy=True, normalize_embeddings=True)
         
         if jd_emb.ndim > 1: 
             jd_emb = jd_emb[0]
@@ -58,8 +77,52 @@ def compute_global_semantic(jd_text, resume_text, embedder):
         logger.error(f"Semantic similarity computation failed: {e}")
         return 0.0
 
+def segment_resume(text, chunks, spacy_model, doc_context=None):
+    """
+    Robust segmentation: sentences + bullet lines + provided chunks,
+    whitespace-normalized, deduplicated and capped at 400 evidence segments.
+    """
+    segments = []
+    if spacy_model:
+        try:
+            if doc_context is not None:
+                segments.extend(doc_context.sents(text))
+            else:
+                doc = spacy_model(text)
+                segments.extend([sent.text.strip() for sent in doc.sents if sent.text.strip()])
+        except Exception:
+            pass
+    if not segments:
+        # Fallback simple sentence split
+        parts = re.split(r"(?<=[.!?])\s+", text)
+        segments.extend([p.strip() for p in parts if p.strip()])
+
+    # Append bullet style lines for richer evidence
+    for line in text.splitlines():
+        cleaned = line.strip().lstrip("-•▹•●")
+        if cleaned and cleaned not in segments and len(cleaned.split()) >= 3:
+            segments.append(cleaned)
+
+    if chunks:
+        segments.extend([c.strip() for c in chunks if isinstance(c, str) and c.strip()])
+
+    # Deduplicate while preserving order
+    seen = set()
+    ordered = []
+    for seg in segments:
+        normalized = " ".join(seg.split())
+        if len(normalized) < MIN_SEGMENT_CHARS:
+            continue
+        if normalized.lower() in seen:
+            continue
+        seen.add(normalized.lower())
+        ordered.append(normalized)
+    return ordered[:MAX_EVIDENCE_SEGMENTS]
+
 def evaluate_requirement_coverage(atomic_reqs, resume_text, resume_chunks, embedder, model=None,
-                                   faiss_index=None, nlp=None, jd_text=""):
+                                   faiss_index=None, nlp=None, jd_text="", doc_context=None,
+                                   segment_vectors=None, fast_embedder=None, segment_index=None,
+                                   requirement_vectors=None, nice_reqs=None):
     """
     Clean, accurate requirement coverage analysis with VERY STRICT thresholds.
     
@@ -69,123 +132,105 @@ def evaluate_requirement_coverage(atomic_reqs, resume_text, resume_chunks, embed
     - resume_chunks: list of resume text chunks
     - embedder: sentence transformer model
     - model: Gemini model for LLM verification (optional)
-    - faiss_index: FAISS index for semantic search (optional)
+    - faiss_index: FAISS index or ChunkIndex (built on first search) for semantic search (optional)
     - nlp: spaCy model (optional)
     - jd_text: job description text (optional)
+    - doc_context: request-scoped DocumentContext to reuse parsed Docs (optional)
+    - segment_vectors: text -> embedding lookup from chunking; only misses are encoded (optional)
+    - fast_embedder: small stage-one model for the embedding cascade (optional)
+    - segment_index: prebuilt SegmentIndex over the resume evidence segments (optional)
+    - requirement_vectors: precomputed term -> embedding lookup, e.g. the embedding bank (optional)
+    - nice_reqs: nice-to-have requirement strings, scored separately from atomic_reqs (optional)
     
     Returns: (overall_score, coverage_details)
     """
     # Split requirements into must-have and nice-to-have if not already done
     must_atoms = atomic_reqs if isinstance(atomic_reqs, list) else []
-    nice_atoms = []  # For now, treat all as must-have
+    must_set = set(must_atoms)
+    nice_atoms = [a for a in nice_reqs or [] if a not in must_set]  # without nice_reqs all are must-have
     
     strict_threshold = 0.85
     partial_threshold = 0.70
 
-    # Robust segmentation: sentences + bullet lines + provided chunks
-    def _segment_resume(text, chunks, spacy_model):
-        segments = []
-        if spacy_model:
-            try:
-                doc = spacy_model(text)
-                segments.extend([sent.text.strip() for sent in doc.sents if sent.text.strip()])
-            except Exception:
-                pass
-        if not segments:
-            # Fallback simple sentence split
-            parts = re.split(r"(?<=[.!?])\s+", text)
-            segments.extend([p.strip() for p in parts if p.strip()])
-
-        # Append bullet style lines for richer evidence
-        for line in text.splitlines():
-            cleaned = line.strip().lstrip("-•▹•●")
-            if cleaned and cleaned not in segments and len(cleaned.split()) >= 3:
-                segments.append(cleaned)
-
-        if chunks:
-            segments.extend([c.strip() for c in chunks if isinstance(c, str) and c.strip()])
-
-        # Deduplicate while preserving order
-        seen = set()
-        ordered = []
-        for seg in segments:
-            normalized = " ".join(seg.split())
-            if len(normalized) < 18:
-                continue
-            if normalized.lower() in seen:
-                continue
-            seen.add(normalized.lower())
-            ordered.append(normalized)
-        return ordered[:400]
-
-    resume_segments = _segment_resume(resume_text, resume_chunks, nlp)
-
-    segment_embeddings = None
-    if embedder and resume_segments:
+    # OPTIMIZATION: one token index per resume; keyword overlap for all requirements is one sparse product.
+    # A stored resume artifact supplies both the segments and the index.
+    if segment_index is None:
+        segment_index = SegmentIndex(segment_resume(resume_text, resume_chunks, nlp, doc_context), resume_text)
+    resume_segments = segment_index.segments
+    all_atoms = list(dict.fromkeys(a for a in must_atoms + nice_atoms if isinstance(a, str) and a))
+    atom_rows = {atom: row for row, atom in enumerate(all_atoms)}
+    keyword_matrix = segment_index.keyword_overlap([tokenize_requirement(a) for a in all_atoms])
+
+    # Requirement x segment similarities, computed once (optionally through the fast/full cascade)
+    similarity_matrix = None
+    cascade_metrics = None
+    if embedder and resume_segments and all_atoms:
         try:
-            segment_embeddings = embedder.encode(resume_segments, convert_to_numpy=True, normalize_embeddings=True)
-            if segment_embeddings.ndim == 1:
-                segment_embeddings = segment_embeddings.reshape(1, -1)
+            cascade = EmbeddingCascade(fast_embedder, embedder)
+            if fast_embedder is not None:
+                similarity_matrix, cascade_metrics = cascade.similarity_matrix(all_atoms, resume_segments,
+                                                                               segment_vectors, requirement_vectors)
+            else:
+                similarity_matrix = cascade.full_similarity(all_atoms, resume_segments, segment_vectors,
+                                                            requirement_vectors)
         except Exception as e:
             logger.error(f"Failed to embed resume segments: {e}")
-            segment_embeddings = None
+            similarity_matrix = None
 
-    def _tokenize_requirement(req):
-        words = re.findall(r"[a-zA-Z0-9+#]+", req.lower())
-        return [w for w in words if len(w) > 2]
-
-    def _keyword_presence(req_tokens, segment_text):
-        if not req_tokens:
-            return 0.0
-        seg_words = set(re.findall(r"[a-zA-Z0-9+#]+", segment_text.lower()))
-        if not seg_words:
-            return 0.0
-        matches = sum(1 for w in req_tokens if w in seg_words)
-        return matches / max(len(req_tokens), 1)
-
-    def _fuzzy_match(req, segment_text):
-        if not req or not segment_text:
-            return 0.0
-        ratio = SequenceMatcher(None, req.lower(), segment_text.lower()).ratio()
-        return float(ratio)
+    # OPTIMIZATION: per-segment difflib matchers built once per resume (b2j reused across requirements)
+    fuzzy_index = SegmentFuzzyIndex(resume_segments)
+    # OPTIMIZATION: BM25 + dense rank fusion picks the segments scored first per requirement
+    hybrid = HybridRetriever(resume_segments)
 
     def get_best_resume_evidence(requirement, top_k=5):
-        """Semantic + keyword evidence using sentence-level parsing (no FAISS dependency)."""
+        """
+        Semantic + keyword evidence, ranked by the combined score. Hybrid (BM25 + dense)
+        candidates and strong keyword hits are scored first; any other segment whose
+        upper bound could still reach the top_k or raise max_sim is scored too, so the
+        result equals a scan of every segment.
+        """
         if not requirement:
             return [], 0.0
 
-        if not resume_segments or segment_embeddings is None:
+        row = atom_rows.get(requirement)
+        if not resume_segments or similarity_matrix is None or row is None:
             return [], 0.0
 
-        req_tokens = _tokenize_requirement(requirement)
-        try:
-            req_emb = embedder.encode(requirement, convert_to_numpy=True, normalize_embeddings=True)
-            if req_emb.ndim > 1:
-                req_emb = req_emb[0]
-        except Exception:
-            req_emb = None
+        keyword_scores = keyword_matrix[row]
+        # The dense row is a slice of the batched requirement x segment matrix (no per-segment work)
+        sim_scores = similarity_matrix[row]
+        candidates = {idx for idx, _ in hybrid.retrieve(requirement, sim_scores)}
+        candidates.update(np.flatnonzero(keyword_scores >= 0.5).tolist())
 
         scored_segments = []
-        for idx, segment in enumerate(resume_segments):
-            sim_score = 0.0
-            if req_emb is not None:
-                sim_score = float(np.dot(segment_embeddings[idx], req_emb))
-                sim_score = float(np.clip(sim_score, 0.0, 1.0))
-
-            keyword_score = _keyword_presence(req_tokens, segment)
-            fuzzy_score = _fuzzy_match(requirement, segment)
 
-            combined = (0.6 * sim_score) + (0.3 * keyword_score) + (0.1 * fuzzy_score)
-
-            if combined >= 0.35 or keyword_score >= 0.5:
-                scored_segments.append((combined, sim_score, keyword_score, segment))
+        def score_segments(ids):
+            # Exact difflib ratios, computed only for these segments
+            fuzzy_scores = fuzzy_index.scores(requirement, ids)
+            for idx in ids:
+                sim_score = float(sim_scores[idx])
+                keyword_score = float(keyword_scores[idx])
+                combined = (0.6 * sim_score) + (0.3 * keyword_score) + (0.1 * fuzzy_scores[idx])
+                if combined >= 0.35 or keyword_score >= 0.5:
+                    scored_segments.append((combined, idx, sim_score, keyword_score, resume_segments[idx]))
+
+        score_segments(sorted(candidates))
+        # Segments outside the candidates have keyword overlap < 0.5, so they are accepted only
+        # with combined >= 0.35; the character-count bound on the fuzzy ratio caps combined
+        upper = (0.6 * np.asarray(sim_scores, dtype=np.float64) + 0.3 * np.asarray(keyword_scores, dtype=np.float64)
+                 + 0.1 * fuzzy_index.upper_bounds(requirement) + 1e-6)
+        kth_best = sorted(item[0] for item in scored_segments)[-top_k] if len(scored_segments) >= top_k else 0.0
+        max_sim = max((item[2] for item in scored_segments), default=-1.0)
+        reachable = (upper >= 0.35) & ((upper >= kth_best) | (sim_scores > max_sim))
+        score_segments([idx for idx in np.flatnonzero(reachable).tolist() if idx not in candidates])
 
         if not scored_segments:
             return [], 0.0
 
-        scored_segments.sort(key=lambda x: x[0], reverse=True)
+        # Combined score orders the evidence; ties keep segment order, as in a full scan
+        scored_segments.sort(key=lambda x: (-x[0], x[1]))
         evidence = []
-        for combined, sim_score, keyword_score, seg in scored_segments[:top_k]:
+        for combined, _, sim_score, keyword_score, seg in scored_segments[:top_k]:
             evidence.append({
                 "text": seg[:320],
                 "similarity": round(sim_score, 3),
@@ -193,11 +238,9 @@ def evaluate_requirement_coverage(atomic_reqs, resume_text, resume_chunks, embed
                 "combined_score": round(combined, 3)
             })
 
-        max_sim = max(item[1] for item in scored_segments)
+        max_sim = max(item[2] for item in scored_segments)
         return evidence, round(max_sim, 3)
 
-    resume_tokens = token_set(resume_text)
-
     def calculate_initial_score(max_similarity, keyword_overlap):
         """Initial deterministic signal using semantic + keyword evidence (BALANCED thresholds)."""
         score = 0.0
@@ -233,10 +276,7 @@ def evaluate_requirement_coverage(atomic_reqs, resume_text, resume_chunks, embed
         llm_queue = []
         
         for atom in atoms:
-            req_tokens = _tokenize_requirement(atom)
-            global_keyword_overlap = 0.0
-            if req_tokens:
-                global_keyword_overlap = sum(1 for tok in req_tokens if tok in resume_tokens) / len(req_tokens)
+            global_keyword_overlap = segment_index.global_overlap(tokenize_requirement(atom))
 
             evidence, max_sim = get_best_resume_evidence(atom)
 
@@ -374,7 +414,8 @@ def evaluate_requirement_coverage(atomic_reqs, resume_text, resume_chunks, embed
         "must": round(must_coverage, 3),
         "nice": round(nice_coverage, 3),
         "details": {"must": must_details, "nice": nice_details},
-        "competencies": {"scores": {}, "evidence": {}}  # Removed complex competency logic
+        "competencies": {"scores": {}, "evidence": {}},  # Removed complex competency logic
+        "cascade": cascade_metrics
     }
 
 # ---- LLM wrappers / prompts ----
@@ -452,12 +493,14 @@ def compute_cue_alignment(plan, parsed_resume, profile, embedder, faiss_index=No
         }
 
     try:
-        jd_embs = embedder.encode(jd_cues, convert_to_numpy=True, normalize_embeddings=True)
-        if jd_embs.ndim == 1:
-            jd_embs = jd_embs.reshape(1, -1)
-        resume_embs = embedder.encode(resume_cues, convert_to_numpy=True, normalize_embeddings=True)
-        if resume_embs.ndim == 1:
-            resume_embs = resume_embs.reshape(1, -1)
+        # OPTIMIZATION: JD and resume cues share one encode call; the resume cue vectors
+        # double as retrieval queries below, so no further encoding is needed
+        cue_embs = embedder.encode(jd_cues + resume_cues, batch_size=32, convert_to_numpy=True,
+                                   normalize_embeddings=True)
+        if cue_embs.ndim == 1:
+            cue_embs = cue_embs.reshape(1, -1)
+        jd_embs = cue_embs[:len(jd_cues)]
+        resume_embs = cue_embs[len(jd_cues):]
     except Exception:
         return {
             "jd_cues": jd_cues,
@@ -472,19 +515,27 @@ def compute_cue_alignment(plan, parsed_resume, profile, embedder, faiss_index=No
     strong, weak = [], []
     resume_chunks = parsed_resume.get("chunks") if isinstance(parsed_resume, dict) else None
 
+    sim_matrix = jd_embs @ resume_embs.T
+    best_indices = sim_matrix.argmax(axis=1)
+
+    # Batched retrieval: one search for every distinct best-matching resume cue
+    cue_contexts = {}
+    if faiss_index is not None and resume_chunks:
+        query_rows = sorted(set(best_indices.tolist()))
+        retrieved = retrieve_relevant_contexts([resume_cues[r] for r in query_rows], faiss_index, resume_chunks,
+                                               embedder, top_k=1, query_embeddings=resume_embs[query_rows])
+        cue_contexts = dict(zip(query_rows, retrieved))
+
     for idx, cue in enumerate(jd_cues):
-        cue_emb = jd_embs[idx]
-        sims = np.dot(resume_embs, cue_emb)
-        best_idx = int(np.argmax(sims)) if sims.size > 0 else -1
-        best_sim = float(np.clip(sims[best_idx], -1.0, 1.0)) if best_idx >= 0 else 0.0
-        best_resume_cue = resume_cues[best_idx] if best_idx >= 0 else ""
+        best_idx = int(best_indices[idx])
+        best_sim = float(np.clip(sim_matrix[idx, best_idx], -1.0, 1.0))
+        best_resume_cue = resume_cues[best_idx]
 
         resume_context = ""
-        if faiss_index is not None and resume_chunks and embedder and best_resume_cue:
-            contexts = retrieve_relevant_context(best_resume_cue, faiss_index, resume_chunks, embedder, top_k=1)
-            if contexts:
-                snippet = re.sub(r'\s+', ' ', contexts[0][0]).strip()
-                resume_context = snippet[:257].rstrip() + ("..." if len(snippet) > 260 else "")
+        contexts = cue_contexts.get(best_idx)
+        if contexts:
+            snippet = re.sub(r'\s+', ' ', contexts[0][0]).strip()
+            resume_context = snippet[:257].rstrip() + ("..." if len(snippet) > 260 else "")
 
         alignments.append({
             "jd_cue": cue,
@@ -577,28 +628,28 @@ def compute_competency_scores(resume_text, chunks, embedder, nlp, model=None, fa
     Returns (scores, evidence) where evidence has keys: frameworks_found, project_contexts, recent
     """
     catalog = build_competency_catalog()
-    tokens = token_set(resume_text)
+    tokens = SegmentIndex(chunks or [], resume_text)
     scores = {}
     evidences = {}
 
+    # OPTIMIZATION: RAG queries of every competency are encoded and searched in one batch
+    comp_queries = [(comp_id, q) for comp_id, spec in catalog.items() for q in spec["queries"][:2]]
+    comp_contexts = {comp_id: [] for comp_id in catalog}
+    if faiss_index and chunks and embedder:
+        retrieved = retrieve_relevant_contexts([q for _, q in comp_queries], faiss_index, chunks, embedder, top_k=2)
+        for (comp_id, _), ctxs in zip(comp_queries, retrieved):
+            comp_contexts[comp_id].extend(t for t, _ in ctxs)
+
     for comp_id, spec in catalog.items():
         core = spec["core"]
         frameworks = spec["frameworks"]
         verbs = spec["project_verbs"]
-        queries = spec["queries"]
 
         core_hits = _find_terms_in_text(core, tokens, resume_text)
         fw_hits = _find_terms_in_text(frameworks, tokens, resume_text)
 
-        # RAG contexts to check project verbs & recency
-        contexts = []
-        if faiss_index and chunks and embedder:
-            for q in queries[:2]:
-                ctxs = retrieve_relevant_context(q, faiss_index, chunks, embedder, top_k=2)
-                for t, s in ctxs:
-                    contexts.append(t)
-        # Deduplicate and trim
-        contexts = list(dict.fromkeys(contexts))[:5]
+        # RAG contexts to check project verbs & recency (deduplicated and trimmed)
+        contexts = list(dict.fromkeys(comp_contexts[comp_id]))[:5]
         ctx_text = "\n".join(contexts)
 
         # Project verb evidence if appears near core/framework contexts
@@ -674,11 +725,8 @@ def map_atoms_to_competencies(atoms, catalog):
     return atom_to_comp, atom_kind
 
 def _find_terms_in_text(terms, tokens, full_text):
-    hits = set()
-    for t in terms:
-        if contains_atom(t, tokens, full_text):
-            hits.add(normalize_text(t))
-    return hits
+    """Terms found in the resume; `tokens` may be a token set or a SegmentIndex."""
+    return find_atoms(terms, tokens, full_text)
 
 def _recent_years_present(text, window=4):
     try:
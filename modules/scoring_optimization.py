@@ -6,6 +6,8 @@ import numpy as np
 import logging
 from typing import Dict, List, Tuple, Any
 
+from modules.skill_taxonomy import get_taxonomy
+
 logger = logging.getLogger(__name__)
 
 
@@ -230,98 +232,18 @@ class SkillTaxonomy:
     """
     Skill taxonomy with synonyms, abbreviations, and related terms.
     Improves matching accuracy by recognizing equivalent skills.
+    Backed by the shared taxonomy snapshot, so a reload is picked up without rebuilding.
     """
     
-    def __init__(self):
-        self.taxonomy = {
-            # Programming Languages
-            'python': ['python', 'python3', 'python 3', 'py'],
-            'javascript': ['javascript', 'js', 'ecmascript', 'es6', 'es2015', 'es2020'],
-            'typescript': ['typescript', 'ts'],
-            'java': ['java', 'java 8', 'java 11', 'java 17', 'jdk'],
-            'c++': ['c++', 'cpp', 'c plus plus'],
-            'c#': ['c#', 'csharp', 'c sharp', '.net'],
-            'go': ['go', 'golang'],
-            'rust': ['rust', 'rust lang'],
-            'ruby': ['ruby', 'rb'],
-            'php': ['php', 'php 7', 'php 8'],
-            
-            # Frameworks (Backend)
-            'django': ['django', 'django rest framework', 'drf'],
-            'flask': ['flask', 'flask-restful'],
-            'fastapi': ['fastapi', 'fast api'],
-            'spring': ['spring', 'spring boot', 'spring framework', 'spring mvc', 'spring cloud'],
-            'express': ['express', 'express.js', 'expressjs'],
-            'nestjs': ['nestjs', 'nest.js', 'nest'],
-            
-            # Frameworks (Frontend)
-            'react': ['react', 'react.js', 'reactjs', 'react 18', 'react 19'],
-            'angular': ['angular', 'angular 2+', 'angularjs'],
-            'vue': ['vue', 'vue.js', 'vuejs', 'vue 3'],
-            'nextjs': ['nextjs', 'next.js', 'next'],
-            'svelte': ['svelte', 'sveltejs'],
-            
-            # Databases
-            'postgresql': ['postgresql', 'postgres', 'psql', 'pg'],
-            'mysql': ['mysql', 'my sql'],
-            'mongodb': ['mongodb', 'mongo', 'mongo db'],
-            'redis': ['redis', 'redis cache'],
-            'cassandra': ['cassandra', 'apache cassandra'],
-            'dynamodb': ['dynamodb', 'dynamo db'],
-            'elasticsearch': ['elasticsearch', 'elastic search', 'elastic'],
-            
-            # Cloud (AWS)
-            'aws': ['aws', 'amazon web services'],
-            'ec2': ['ec2', 'amazon ec2', 'elastic compute'],
-            's3': ['s3', 'amazon s3', 'simple storage service'],
-            'lambda': ['lambda', 'aws lambda', 'amazon lambda'],
-            'cloudformation': ['cloudformation', 'cloud formation', 'cfn'],
-            'dynamodb': ['dynamodb', 'dynamo'],
-            
-            # Cloud (Azure)
-            'azure': ['azure', 'microsoft azure', 'ms azure'],
-            
-            # Cloud (GCP)
-            'gcp': ['gcp', 'google cloud', 'google cloud platform'],
-            
-            # DevOps
-            'docker': ['docker', 'containerization', 'containers'],
-            'kubernetes': ['kubernetes', 'k8s', 'k8', 'kube'],
-            'jenkins': ['jenkins', 'jenkins ci', 'jenkins ci/cd'],
-            'terraform': ['terraform', 'tf', 'infrastructure as code', 'iac'],
-            'ansible': ['ansible', 'ansible playbook'],
-            'gitlab': ['gitlab', 'gitlab ci', 'gitlab ci/cd'],
-            'github actions': ['github actions', 'gh actions'],
-            
-            # Data Science / ML
-            'tensorflow': ['tensorflow', 'tf', 'tensor flow'],
-            'pytorch': ['pytorch', 'torch', 'py torch'],
-            'scikit-learn': ['scikit-learn', 'sklearn', 'scikit learn'],
-            'pandas': ['pandas', 'pd'],
-            'numpy': ['numpy', 'np'],
-            'keras': ['keras'],
-            
-            # CS Fundamentals
-            'operating system': ['operating system', 'operating systems', 'os'],
-            'dbms': ['dbms', 'database management system', 'database management'],
-            'computer network': ['computer network', 'computer networks', 'networking', 'cn'],
-            'data structure': ['data structure', 'data structures', 'ds', 'dsa'],
-            'algorithm': ['algorithm', 'algorithms', 'algo'],
-            'object oriented': ['oop', 'object oriented', 'object-oriented', 'object oriented programming'],
-            
-            # Other
-            'rest api': ['rest', 'rest api', 'restful', 'restful api'],
-            'graphql': ['graphql', 'graph ql', 'gql'],
-            'microservices': ['microservices', 'micro services', 'microservice architecture'],
-            'git': ['git', 'version control', 'source control'],
-            'agile': ['agile', 'scrum', 'agile methodology'],
-        }
-        
-        # Build reverse index (term -> canonical form)
-        self.reverse_index = {}
-        for canonical, variants in self.taxonomy.items():
-            for variant in variants:
-                self.reverse_index[variant.lower()] = canonical
+    @property
+    def taxonomy(self) -> Dict[str, List[str]]:
+        """Canonical id -> all of its forms (canonical first)."""
+        return {skill_id: list(skill.forms) for skill_id, skill in get_taxonomy().skills.items()}
+    
+    @property
+    def reverse_index(self):
+        """Form -> canonical id (read-only view of the current snapshot)."""
+        return get_taxonomy().term_class
     
     def get_canonical(self, term: str) -> str:
         """Get canonical form of a skill term"""
@@ -334,18 +256,34 @@ class SkillTaxonomy:
     
     def get_variants(self, term: str) -> List[str]:
         """Get all variants of a skill term"""
-        canonical = self.get_canonical(term)
-        return self.taxonomy.get(canonical, [term])
+        skill = get_taxonomy().skills.get(self.get_canonical(term))
+        return list(skill.forms) if skill else [term]
     
-    def normalize_skill_list(self, skills: List[str]) -> List[str]:
-        """Normalize skill list to canonical forms and remove duplicates"""
+    def get_related(self, term: str) -> List[str]:
+        """Related (not equivalent) terms of a skill, e.g. "containers" for docker"""
+        skill = get_taxonomy().skills.get(self.get_canonical(term))
+        return list(skill.related) if skill else []
+    
+    def normalize_skill_list(self, skills: List[str], nlp=None) -> List[str]:
+        """
+        Normalize skill list to canonical forms and remove duplicates.
+        Duplicates are detected on the shared batched atom canonicalizer; skills
+        outside the taxonomy keep their lowercase spelling.
+        """
+        from modules.text_processing import canonical_atoms
+        
+        skills = [s for s in skills if isinstance(s, str) and s.strip()]
+        skill_ids = get_taxonomy().skills
         seen = set()
         normalized = []
-        for skill in skills:
+        for skill, key in zip(skills, canonical_atoms(skills, nlp)):
             canonical = self.get_canonical(skill)
-            if canonical not in seen:
+            if canonical not in skill_ids and key in skill_ids:
+                canonical = key  # e.g. "Data Structures" lemmatizes onto a taxonomy id
+            key = key or canonical
+            if key not in seen and canonical not in seen:
                 normalized.append(canonical)
-                seen.add(canonical)
+                seen.update((key, canonical))
         return normalized
 
 
@@ -0,0 +1,147 @@
+"""
+Per-Resume Segment Index
+Vocabulary, segment x token incidence matrix (CSR) and postings, built once per resume
+"""
+import re
+import logging
+import numpy as np
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    sparse = None
+    SCIPY_AVAILABLE = False
+
+from modules.text_processing import normalize_text, token_set
+
+logger = logging.getLogger(__name__)
+
+_KEYWORD_PATTERN = re.compile(r"[a-zA-Z0-9+#]+")
+
+
+def tokenize_requirement(req):
+    """Requirement keywords used for overlap scoring (lowercased, longer than 2 chars)."""
+    if not req:
+        return []
+    words = _KEYWORD_PATTERN.findall(req.lower())
+    return [w for w in words if len(w) > 2]
+
+
+class SegmentIndex:
+    """
+    Token index over resume evidence segments.
+
+    - vocabulary: keyword -> column id
+    - indptr/indices: CSR layout of the binary segment x token incidence matrix
+    - postings: column id -> array of segment ids containing that keyword
+    - text_tokens / normalized_text: whole-resume view used by contains_atom()
+
+    Keyword overlap for a batch of requirements is a single sparse product
+    Q (R x V) @ M.T (V x S) instead of re-tokenizing every segment per requirement.
+    """
+
+    def __init__(self, segments, full_text=""):
+        self.segments = [s if isinstance(s, str) else "" for s in (segments or [])]
+        self.vocabulary = {}
+
+        indptr = [0]
+        indices = []
+        for seg in self.segments:
+            cols = {self.vocabulary.setdefault(w, len(self.vocabulary))
+                    for w in _KEYWORD_PATTERN.findall(seg.lower())}
+            indices.extend(sorted(cols))
+            indptr.append(len(indices))
+
+        self._finalize(np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32), full_text)
+
+    @classmethod
+    def from_csr(cls, segments, vocabulary, indptr, indices, full_text=""):
+        """
+        Rebuild an index from stored CSR arrays (e.g. a resume artifact) without
+        re-tokenizing segments. `vocabulary` lists keywords in column order.
+        """
+        index = cls.__new__(cls)
+        index.segments = list(segments or [])
+        index.vocabulary = {word: col for col, word in enumerate(vocabulary)}
+        index._finalize(np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32), full_text)
+        return index
+
+    def _finalize(self, indptr, indices, full_text):
+        self.indptr = indptr
+        self.indices = indices
+
+        # Postings: stable sort of column ids groups segment ids per keyword
+        segment_ids = np.repeat(np.arange(len(self.segments), dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        bounds = np.searchsorted(self.indices[order], np.arange(len(self.vocabulary) + 1))
+        sorted_segments = segment_ids[order]
+        self.postings = [sorted_segments[bounds[c]:bounds[c + 1]] for c in range(len(self.vocabulary))]
+
+        self.matrix = None
+        if SCIPY_AVAILABLE and self.segments:
+            self.matrix = sparse.csr_matrix(
+                (np.ones(len(self.indices), dtype=np.float32), self.indices, self.indptr),
+                shape=(len(self.segments), len(self.vocabulary))
+            )
+
+        self.normalized_text = normalize_text(full_text) if full_text else ""
+        self.text_tokens = frozenset(token_set(full_text)) if full_text else frozenset()
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __contains__(self, token):
+        return token in self.text_tokens
+
+    def segments_with(self, keyword):
+        """Segment ids whose text contains `keyword` (empty array when unknown)."""
+        col = self.vocabulary.get(keyword.lower() if keyword else keyword)
+        if col is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[col]
+
+    def global_overlap(self, req_tokens):
+        """Fraction of requirement tokens present anywhere in the resume."""
+        if not req_tokens:
+            return 0.0
+        return sum(1 for tok in req_tokens if tok in self.text_tokens) / len(req_tokens)
+
+    def keyword_overlap(self, requirement_tokens):
+        """
+        Keyword overlap of every requirement against every segment.
+        `requirement_tokens` is a list of token lists (duplicates count, as in the
+        original per-segment scan). Returns a dense (R, S) float32 array.
+        """
+        n_reqs = len(requirement_tokens)
+        n_segs = len(self.segments)
+        result = np.zeros((n_reqs, n_segs), dtype=np.float32)
+        if n_reqs == 0 or n_segs == 0:
+            return result
+
+        rows, cols, vals = [], [], []
+        lengths = np.ones(n_reqs, dtype=np.float32)
+        for r, tokens in enumerate(requirement_tokens):
+            if not tokens:
+                continue
+            lengths[r] = len(tokens)
+            for tok in tokens:
+                col = self.vocabulary.get(tok)
+                if col is not None:
+                    rows.append(r)
+                    cols.append(col)
+                    vals.append(1.0)
+
+        if not rows:
+            return result
+
+        if self.matrix is not None:
+            query = sparse.csr_matrix(
+                (np.asarray(vals, dtype=np.float32), (rows, cols)),
+                shape=(n_reqs, len(self.vocabulary))
+            )
+            result = np.asarray((query @ self.matrix.T).todense(), dtype=np.float32)
+        else:
+            for r, col in zip(rows, cols):
+                result[r, self.postings[col]] += 1.0
+
+        return result / lengths[:, None]
@@ -0,0 +1,280 @@
+"""
+Unified Skill Taxonomy
+Single data file of skills (canonical id, variants, abbreviations, related terms, category)
+compiled into an immutable snapshot that every matcher reads, with lock-free hot reload
+"""
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH",
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skill_taxonomy.json"))
+SKILL_TAXONOMY_WATCH_SECONDS = float(os.getenv("SKILL_TAXONOMY_WATCH_SECONDS", "0"))  # 0 disables the file watcher
+TAXONOMY_VERSION = 1
+
+
+def _form(term):
+    """Lookup form of a taxonomy term: lowercase, single-spaced, interned."""
+    return sys.intern(" ".join(str(term).lower().split()))
+
+
+class _UnionFind:
+    """Disjoint sets over strings (path halving, union by size)."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        self.add(a)
+        self.add(b)
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return ra
+
+
+class Skill:
+    """
+    One canonical skill of a snapshot (read-only). `forms` are exact aliases; `related`
+    terms ("containers" for docker, "scrum" for agile) are not part of the class.
+    """
+
+    __slots__ = ("id", "category", "variants", "abbreviations", "forms", "related")
+
+    def __init__(self, skill_id, category, variants, abbreviations, related=()):
+        for name, value in (("id", skill_id), ("category", category), ("variants", variants),
+                            ("abbreviations", abbreviations),
+                            ("forms", (skill_id, *variants, *abbreviations)), ("related", related)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Skill is immutable")
+
+    def __repr__(self):
+        return f"Skill({self.id!r}, category={self.category!r}, forms={len(self.forms)})"
+
+
+class TaxonomySnapshot:
+    """
+    Compiled, immutable view of the taxonomy file.
+
+      term_class    form -> canonical id (every id, variant and abbreviation, lowercase)
+      class_forms   canonical id -> frozenset of forms
+      skills        canonical id -> Skill, in file order
+      expansions    abbreviation token -> expansion words (contains_atom evidence)
+      categories    category -> tuple of canonical ids
+
+    Entries sharing a form are merged with union-find (the first entry's id wins), so
+    aliases are transitive. A skill's "related" terms stay on its Skill only: they are
+    never looked up, matched in text or used to merge duplicates. Strings are interned; a reload builds a new snapshot and
+    swaps the module reference, readers never see a half-built one.
+    """
+
+    __slots__ = ("term_class", "class_forms", "skills", "expansions", "categories", "source", "mtime", "loaded_at")
+
+    def __init__(self, term_class, class_forms, skills, expansions, categories, source="", mtime=None):
+        for name, value in (("term_class", MappingProxyType(term_class)),
+                            ("class_forms", MappingProxyType(class_forms)),
+                            ("skills", MappingProxyType(skills)),
+                            ("expansions", MappingProxyType(expansions)),
+                            ("categories", MappingProxyType(categories)),
+                            ("source", source), ("mtime", mtime), ("loaded_at", time.time())):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TaxonomySnapshot is immutable")
+
+    def __len__(self):
+        return len(self.skills)
+
+    def canonical(self, term, default=None):
+        """Canonical id of a term (exact form lookup), or `default`."""
+        if not isinstance(term, str):
+            return default
+        return self.term_class.get(" ".join(term.lower().split()), default)
+
+    def forms(self, term):
+        """Every form of the term's class (empty when the term is not in the taxonomy)."""
+        class_id = self.canonical(term)
+        return self.class_forms.get(class_id, frozenset()) if class_id else frozenset()
+
+    def category(self, term):
+        class_id = self.canonical(term)
+        skill = self.skills.get(class_id) if class_id else None
+        return skill.category if skill else None
+
+    def stats(self):
+        return {"skills": len(self.skills), "forms": len(self.term_class), "categories": len(self.categories),
+                "expansions": len(self.expansions), "source": self.source, "mtime": self.mtime,
+                "loaded_at": self.loaded_at}
+
+
+def compile_taxonomy(data, source="", mtime=None):
+    """Validate taxonomy file content and compile it into a TaxonomySnapshot (ValueError if malformed)."""
+    if not isinstance(data, dict) or data.get("version") != TAXONOMY_VERSION:
+        raise ValueError(f"expected a taxonomy object with version {TAXONOMY_VERSION}")
+    entries = data.get("skills")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("taxonomy has no skills")
+    # Mined suggestions (python -m modules.taxonomy_mining) take effect once a reviewer approves them
+    entries = entries + [s for s in data.get("suggestions") or () if isinstance(s, dict) and s.get("approved") is True]
+
+    uf = _UnionFind()
+    parsed = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("id"), str) or not entry["id"].strip():
+            raise ValueError(f"skill #{position} has no id")
+        skill_id = _form(entry["id"])
+        variants = tuple(dict.fromkeys(_form(v) for v in entry.get("variants") or () if str(v).strip()))
+        abbreviations = tuple(dict.fromkeys(_form(a) for a in entry.get("abbreviations") or () if str(a).strip()))
+        related = tuple(dict.fromkeys(_form(r) for r in entry.get("related") or () if str(r).strip()))
+        expansions = entry.get("expansions") or {}
+        if not isinstance(expansions, dict):
+            raise ValueError(f"skill '{skill_id}' has malformed expansions")
+        uf.add(skill_id)
+        for form in (*variants, *abbreviations):
+            uf.union(skill_id, form)
+        parsed.append((skill_id, sys.intern(str(entry.get("category") or "other")), variants, abbreviations,
+                       related, {_form(k): tuple(_form(w) for w in v) for k, v in expansions.items()}))
+
+    # First entry of each merged class names it
+    root_id = {}
+    for skill_id, *_ in parsed:
+        root_id.setdefault(uf.find(skill_id), skill_id)
+
+    term_class, members, skills, expansions, categories = {}, {}, {}, {}, {}
+    for form in uf.parent:
+        class_id = root_id[uf.find(form)]
+        term_class[form] = class_id
+        members.setdefault(class_id, set()).add(form)
+    for skill_id, category, variants, abbreviations, related, skill_expansions in parsed:
+        class_id = root_id[uf.find(skill_id)]
+        expansions.update(skill_expansions)
+        if class_id in skills:
+            if class_id != skill_id:
+                logger.warning(f"⚠️ Taxonomy skill '{skill_id}' shares a form with '{class_id}', merged")
+            continue
+        others = members[class_id] - {class_id}
+        skills[class_id] = Skill(class_id, category,
+                                 tuple(v for v in variants if v in others) +
+                                 tuple(sorted(others - set(variants) - set(abbreviations))),
+                                 tuple(a for a in abbreviations if a in others),
+                                 tuple(r for r in related if r not in members[class_id]))
+        categories.setdefault(category, []).append(class_id)
+
+    return TaxonomySnapshot(term_class, {k: frozenset(v) for k, v in members.items()}, skills, expansions,
+                            {k: tuple(v) for k, v in categories.items()}, source, mtime)
+
+
+def load_taxonomy(path=None):
+    """Read and compile the taxonomy file."""
+    path = path or SKILL_TAXONOMY_PATH
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return compile_taxonomy(data, source=path, mtime=mtime)
+
+
+def write_taxonomy(data, path=None):
+    """Atomically write taxonomy file content, one skill/suggestion per line (diff-friendly)."""
+    path = path or SKILL_TAXONOMY_PATH
+    compile_taxonomy(data)  # never publish a file the loader would reject
+    lines = ["{", f'  "version": {json.dumps(data["version"])},']
+    for key in [k for k in data if k != "version"]:
+        value = data[key]
+        if isinstance(value, list):
+            rows = ",\n".join("    " + json.dumps(item, ensure_ascii=False) for item in value)
+            lines.append(f'  {json.dumps(key)}: [\n{rows}\n  ],' if rows else f'  {json.dumps(key)}: [],')
+        else:
+            lines.append(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},')
+    lines[-1] = lines[-1].rstrip(",")
+    lines.append("}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+_snapshot = None
+_reload_lock = threading.Lock()  # serializes writers only; readers never take it
+_watcher = None
+
+
+def get_taxonomy():
+    """The current snapshot (a plain reference read, safe from any thread)."""
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = reload_taxonomy()[0]
+    return snapshot
+
+
+def reload_taxonomy(path=None):
+    """
+    Compile the taxonomy file and atomically publish it.
+    Returns (snapshot, error): on failure the previous snapshot stays active.
+    """
+    global _snapshot
+    with _reload_lock:
+        try:
+            snapshot = load_taxonomy(path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"❌ Failed to load skill taxonomy {path or SKILL_TAXONOMY_PATH}: {e}")
+            if _snapshot is None:
+                # ROBUSTNESS: never leave matchers without a taxonomy, fall back to an empty one
+                _snapshot = TaxonomySnapshot({}, {}, {}, {}, {}, source=path or SKILL_TAXONOMY_PATH)
+            return _snapshot, str(e)
+        _snapshot = snapshot
+    logger.info(f"✅ Skill taxonomy loaded: {len(snapshot)} skills, {len(snapshot.term_class)} forms")
+    return snapshot, None
+
+
+def _watch(interval):
+    seen = get_taxonomy().mtime
+    while True:
+        time.sleep(interval)
+        path = get_taxonomy().source or SKILL_TAXONOMY_PATH
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        if mtime != seen:
+            seen = mtime  # a broken edit is reported once, not on every poll
+            reload_taxonomy(path)
+
+
+def start_taxonomy_watcher(interval=None):
+    """Poll the taxonomy file's mtime and reload on change (daemon thread, one per process)."""
+    global _watcher
+    interval = SKILL_TAXONOMY_WATCH_SECONDS if interval is None else interval
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return _watcher
+    get_taxonomy()
+    _watcher = threading.Thread(target=_watch, args=(interval,), name="skill-taxonomy-watcher", daemon=True)
+    _watcher.start()
+    logger.info(f"✅ Watching skill taxonomy for changes every {interval:g}s")
+    return _watcher
@@ -0,0 +1,173 @@
+"""
+Offline Taxonomy Synonym Mining
+Embeds the skill taxonomy plus skills mined from stored resumes and clusters near-duplicates
+into suggested equivalence classes, written to the taxonomy file for review
+
+Run:  python -m modules.taxonomy_mining [--threshold 0.88] [--min-count 2] [--dry-run]
+"""
+import os
+import re
+import json
+import logging
+import argparse
+import numpy as np
+
+from modules.skill_taxonomy import SKILL_TAXONOMY_PATH, _UnionFind, _form, compile_taxonomy, write_taxonomy
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+TAXONOMY_MINING_THRESHOLD = float(os.getenv("TAXONOMY_MINING_THRESHOLD", "0.88"))  # cosine similarity
+TAXONOMY_MINING_MIN_COUNT = int(os.getenv("TAXONOMY_MINING_MIN_COUNT", "2"))  # resumes listing a mined skill
+TAXONOMY_MINING_MAX_TERMS = int(os.getenv("TAXONOMY_MINING_MAX_TERMS", "5000"))
+TAXONOMY_MINING_BLOCK = 1024
+
+
+def _is_candidate_skill(term):
+    """Mined strings worth clustering: short, skill-shaped phrases."""
+    return 2 <= len(term) <= 40 and len(term.split()) <= 4 and re.search(r"[a-z]", term) is not None
+
+
+def mining_vocabulary(snapshot, mined_counts=None, max_terms=TAXONOMY_MINING_MAX_TERMS):
+    """
+    Terms to cluster: every taxonomy form, then the most frequent mined skills not yet in it.
+    Returns (terms, counts) with counts aligned to terms (0 for taxonomy forms).
+    """
+    terms = list(snapshot.term_class)
+    known = set(terms)
+    mined = {}
+    for skill, count in (mined_counts or {}).items():
+        form = _form(skill)
+        if form not in known and _is_candidate_skill(form):
+            mined[form] = mined.get(form, 0) + int(count)
+    ranked = sorted(mined.items(), key=lambda item: (-item[1], item[0]))[:max(0, max_terms - len(terms))]
+    return terms + [term for term, _ in ranked], [0] * len(terms) + [count for _, count in ranked]
+
+
+def similar_pairs(vectors, threshold=TAXONOMY_MINING_THRESHOLD, block=TAXONOMY_MINING_BLOCK, keep=None):
+    """
+    (i, j, cosine) for every pair i < j of normalized rows at or above `threshold`,
+    computed in row blocks so memory stays O(block * n). `keep(i, j)` filters pairs.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    pairs = []
+    for start in range(0, len(vectors), block):
+        sims = vectors[start:start + block] @ vectors.T
+        rows, cols = np.nonzero(sims >= threshold)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            i = start + r
+            if c > i and (keep is None or keep(i, c)):
+                pairs.append((i, c, float(sims[r, c])))
+    pairs.sort(key=lambda pair: pair[2], reverse=True)
+    return pairs
+
+
+def cluster_terms(terms, counts, pairs, snapshot):
+    """
+    Single-linkage clusters over `pairs` (strongest first) with union-find. A merge that
+    would join two different existing taxonomy classes is refused, which also stops
+    chains from drifting between curated skills. Returns suggestion dicts, most supported first.
+    """
+    uf = _UnionFind()
+    anchor, weakest = {}, {}
+    for idx, term in enumerate(terms):
+        uf.add(idx)
+        anchor[idx] = snapshot.term_class.get(term)
+    conflicts = 0
+    for i, j, sim in pairs:
+        ri, rj = uf.find(i), uf.find(j)
+        if ri == rj:
+            continue
+        if anchor[ri] and anchor[rj] and anchor[ri] != anchor[rj]:
+            conflicts += 1
+            continue
+        root = uf.union(ri, rj)
+        anchor[root] = anchor[ri] or anchor[rj]
+        weakest[root] = min(sim, weakest.get(ri, 1.0), weakest.get(rj, 1.0))
+
+    members = {}
+    for idx in range(len(terms)):
+        members.setdefault(uf.find(idx), []).append(idx)
+
+    suggestions = []
+    for root, idxs in members.items():
+        new = sorted((i for i in idxs if terms[i] not in snapshot.term_class), key=lambda i: (-counts[i], terms[i]))
+        if not new or len(idxs) < 2:
+            continue
+        class_id = anchor[root]
+        if class_id:
+            skill_id, variants = class_id, [terms[i] for i in new]
+            category = snapshot.skills[class_id].category if class_id in snapshot.skills else "other"
+        else:
+            skill_id, variants, category = terms[new[0]], [terms[i] for i in new[1:]], "mined"
+        suggestions.append({"id": skill_id, "category": category, "variants": variants,
+                            "similarity": round(weakest.get(root, 1.0), 4),
+                            "support": sum(counts[i] for i in new), "extends": bool(class_id), "approved": False})
+    suggestions.sort(key=lambda s: (-s["support"], s["id"]))
+    logger.info(f"✅ {len(suggestions)} suggested classes from {len(pairs)} similar pairs "
+                f"({conflicts} cross-class merges refused)")
+    return suggestions
+
+
+def mine_suggestions(embedder, snapshot, mined_counts=None, threshold=TAXONOMY_MINING_THRESHOLD, lookup=None):
+    """Embed the vocabulary and cluster it. Pairs between two taxonomy forms are already curated and skipped."""
+    from modules.text_processing import encode_with_lookup
+
+    terms, counts = mining_vocabulary(snapshot, mined_counts)
+    if len(terms) == len(snapshot.term_class):
+        logger.info("No mined skills outside the taxonomy, nothing to suggest")
+        return []
+    vectors = encode_with_lookup(embedder, terms, lookup, batch_size=64)
+    known = len(snapshot.term_class)  # taxonomy forms come first in `terms`
+    pairs = similar_pairs(vectors, threshold, keep=lambda i, j: j >= known)
+    return cluster_terms(terms, counts, pairs, snapshot)
+
+
+def merge_suggestions(data, suggestions):
+    """Taxonomy file content with fresh suggestions; reviewed (approved) ones are kept as they are."""
+    approved = [s for s in data.get("suggestions") or () if isinstance(s, dict) and s.get("approved") is True]
+    return {**data, "suggestions": approved + suggestions}
+
+
+def main():
+    from modules.embedding_backends import load_embedder
+    from modules.embedding_bank import load_embedding_bank
+    from modules.resume_artifacts import embedder_signature
+    from modules.database import init_postgresql, get_technical_skill_counts
+
+    parser = argparse.ArgumentParser(description="Mine synonym suggestions for the skill taxonomy")
+    parser.add_argument("--taxonomy", default=SKILL_TAXONOMY_PATH)
+    parser.add_argument("--output", default=None, help="defaults to rewriting --taxonomy in place")
+    parser.add_argument("--threshold", type=float, default=TAXONOMY_MINING_THRESHOLD)
+    parser.add_argument("--min-count", type=int, default=TAXONOMY_MINING_MIN_COUNT)
+    parser.add_argument("--model", default=os.getenv("SENTENCE_MODEL_NAME", "all-mpnet-base-v2"))
+    parser.add_argument("--backend", default=None, help="overrides EMBEDDER_BACKEND")
+    parser.add_argument("--dry-run", action="store_true", help="print suggestions instead of writing them")
+    args = parser.parse_args()
+
+    with open(args.taxonomy, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    snapshot = compile_taxonomy(data, source=args.taxonomy)
+
+    conn, db_ok = init_postgresql()
+    mined_counts = get_technical_skill_counts(conn, db_ok, args.min_count)
+    if conn:
+        conn.close()
+    if not db_ok:
+        logger.warning("⚠️ Database unavailable, clustering the taxonomy vocabulary only")
+
+    embedder, backend_info = load_embedder(args.model, backend=args.backend, device="cpu")
+    lookup = load_embedding_bank(embedder_signature(backend_info, embedder))
+    suggestions = mine_suggestions(embedder, snapshot, mined_counts, args.threshold, lookup)
+
+    if args.dry_run:
+        print(json.dumps(suggestions, indent=2, ensure_ascii=False))
+        return
+    path = write_taxonomy(merge_suggestions(data, suggestions), args.output or args.taxonomy)
+    print(f"{len(suggestions)} suggestions from {len(mined_counts)} mined skills -> {path} "
+          f"(set \"approved\": true to adopt, then reload)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
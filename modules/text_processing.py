@@ -2,12 +2,18 @@
 Text Processing and NLP Utilities
 ENTERPRISE-GRADE: Input validation, security hardening, resource limits
 """
+import os
 import re
 import numpy as np
 import faiss
 import logging
+import threading
 from typing import Any
-from collections import Counter
+from functools import lru_cache
+from collections import Counter, OrderedDict
+
+from modules.skill_taxonomy import get_taxonomy
+from modules.nlp_context import pipeline_manager
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,12 +23,120 @@ MAX_TEXT_LENGTH = 100000  # 100KB max for NLP processing
 MAX_CHUNK_COUNT = 200  # Maximum number of chunks to generate
 MAX_REGEX_INPUT = 50000  # Max text length for regex operations (prevent ReDoS)
 
+# Semantic chunking: adjacent sentences below this cosine start a new chunk
+SEMANTIC_BOUNDARY_THRESHOLD = 0.30
+SEMANTIC_MIN_CHUNK_CHARS = 200  # Never split on topic shift before a chunk reaches this size
+RESUME_CHUNK_MAX_CHARS = 800
+RESUME_CHUNK_OVERLAP = 200
+
+# Token-aware chunking: windows sized to the embedder's max_seq_length
+TOKEN_CHUNK_OVERLAP = 64
+# "pooled": long documents are embedded as token windows and mean-pooled
+# "truncated": legacy single encode of a character-truncated prefix
+DOCUMENT_EMBEDDING_MODE = os.getenv("DOCUMENT_EMBEDDING_MODE", "pooled").strip().lower()
+
+# Bounded memo of atom -> canonical form shared by refine_atom_list, requirement dedupe and skill normalization
+CANONICAL_ATOM_CACHE_SIZE = int(os.getenv("CANONICAL_ATOM_CACHE_SIZE", "8192"))
+
 def normalize_text(s):
     s = s.lower().strip()
     s = re.sub(r'\s+', ' ', s)
     return s
 
 
+@lru_cache(maxsize=16)
+def _normalized_full_text(text):
+    """normalize_text() for whole documents checked against many atoms (normalized once per text)."""
+    return normalize_text(text)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class TermSet:
+    """
+    A phrase list compiled once for "which of these phrases occur in this text" queries.
+
+    - search(text): does any phrase occur? One alternation regex, a single C-level scan.
+    - finditer/find_all/matched(text): every occurrence, overlapping ones included
+      (e.g. "spring" inside "spring boot"). A character trie of the phrases is walked
+      from each position where some phrase can start, found by one compiled regex.
+
+    With word_boundaries=True a hit must satisfy the same rule as
+    re.search(r'\b' + re.escape(phrase) + r'\b', text); otherwise plain substring
+    semantics (phrase in text) apply. Phrases are matched as given (no normalization).
+    """
+
+    _END = object()
+
+    def __init__(self, terms, word_boundaries=False):
+        self.terms = frozenset(t for t in terms if isinstance(t, str) and t)
+        self.word_boundaries = word_boundaries
+        self._trie = {}
+        for term in self.terms:
+            node = self._trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[self._END] = term
+
+        self._any = None
+        self._starts = None
+        if self.terms:
+            alternation = "|".join(re.escape(t) for t in sorted(self.terms, key=len, reverse=True))
+            first_chars = re.escape("".join(sorted({t[0] for t in self.terms})))
+            if word_boundaries:
+                self._any = re.compile(r"\b(?:" + alternation + r")\b")
+                self._starts = re.compile(r"\b(?=[" + first_chars + r"])")
+            else:
+                self._any = re.compile(alternation)
+                self._starts = re.compile(r"(?=[" + first_chars + r"])")
+
+    def __len__(self):
+        return len(self.terms)
+
+    def search(self, text):
+        """True when at least one phrase occurs in `text`."""
+        return bool(text) and self._any is not None and self._any.search(text) is not None
+
+    def finditer(self, text):
+        """Yield (start, end, phrase) for every occurrence, in start order."""
+        if not text or self._starts is None:
+            return
+        n = len(text)
+        end_marker = self._END
+        check_end = self.word_boundaries
+        for match in self._starts.finditer(text):
+            i = match.start()
+            node = self._trie
+            j = i
+            while j < n:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                term = node.get(end_marker)
+                if term is None:
+                    continue
+                # Right word boundary: word-ness changes between text[j-1] and text[j] (end of text counts as non-word)
+                if check_end and _is_word_char(text[j - 1]) == (j < n and _is_word_char(text[j])):
+                    continue
+                yield i, j, term
+
+    def find_all(self, text):
+        return list(self.finditer(text))
+
+    def matched(self, text):
+        """Distinct phrases present in `text`."""
+        return {term for _, _, term in self.finditer(text)}
+
+
+@lru_cache(maxsize=128)
+def compile_terms(terms, word_boundaries=False):
+    """Cached TermSet for a tuple of phrases (static vocabularies such as competency terms)."""
+    return TermSet(terms, word_boundaries)
+
+
 def chunk_text(t, max_chars=1200, overlap=150, nlp=None):
     """
     Chunk text with ROBUSTNESS: input validation, size limits, error handling.
@@ -50,14 +164,8 @@ def chunk_text(t, max_chars=1200, overlap=150, nlp=None):
         return chunks[:MAX_CHUNK_COUNT]  # SECURITY: Limit chunk count
     
     try:
-        if "sentencizer" not in nlp.pipe_names:
-            try:
-                nlp.add_pipe("sentencizer")
-            except:
-                pass
-        
-        doc = nlp(t)
-        sents = [s.text.strip() for s in getattr(doc, "sents", []) if s.text.strip()]
+        # Sentence view of the shared pipeline (never add_pipe at request time: not thread-safe)
+        sents = pipeline_manager(nlp).sentences(t)
     except Exception as e:
         logger.error(f"NLP processing failed: {e}, falling back to basic chunking")
         # Fallback to simple chunking
@@ -121,8 +229,15 @@ def parse_contacts(txt):
     }
 
 
-def build_index(embedder, chunks):
-    embs = embedder.encode(chunks, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+def build_index(embedder, chunks, embeddings=None):
+    """
+    Build a FAISS inner-product index over chunk embeddings.
+    Pass precomputed `embeddings` (aligned with chunks) to skip re-encoding.
+    """
+    if embeddings is not None and len(embeddings) == len(chunks):
+        embs = np.asarray(embeddings, dtype=np.float32)
+    else:
+        embs = embedder.encode(chunks, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
     dim = embs.shape[1]
     idx = faiss.IndexFlatIP(dim)
     # Convert to float32 numpy array for FAISS (pyright signature is inaccurate)
@@ -132,13 +247,200 @@ def build_index(embedder, chunks):
     return idx, embs
 
 
-def extract_sections(text):
-    """Heuristic section splitter (no lexicons)."""
+class ChunkIndex:
+    """
+    A resume's chunks with their embeddings and a FAISS index, carried through
+    parsing, validation, sanitization and scoring.
+
+    Chunk embeddings are encoded at most once (or taken from chunking); the FAISS
+    index is only built on the first search(), so consumers that never retrieve
+    never pay for it. search() mirrors faiss.Index.search, so a ChunkIndex can be
+    passed wherever a faiss_index is accepted.
+    """
+
+    def __init__(self, chunks, embedder=None, embeddings=None):
+        self.chunks = list(chunks or [])
+        self.embedder = embedder
+        self._embeddings = embeddings
+        self._index = None
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @property
+    def embeddings(self):
+        """(n_chunks, dim) normalized embeddings, encoded on first access if not supplied."""
+        if self._embeddings is None or len(self._embeddings) != len(self.chunks):
+            if self.embedder is None or not self.chunks:
+                return None
+            embs = self.embedder.encode(self.chunks, batch_size=32, convert_to_numpy=True,
+                                        normalize_embeddings=True)
+            self._embeddings = embs.reshape(1, -1) if embs.ndim == 1 else embs
+        return self._embeddings
+
+    @property
+    def is_built(self):
+        return self._index is not None
+
+    @property
+    def index(self):
+        """FAISS index over the chunk embeddings (built lazily, None without embeddings)."""
+        if self._index is None:
+            embs = self.embeddings
+            if embs is None:
+                return None
+            self._index, _ = build_index(self.embedder, self.chunks, embeddings=embs)
+        return self._index
+
+    def search(self, query_embeddings, k):
+        index = self.index
+        if index is None:
+            raise ValueError("ChunkIndex has no embeddings to search")
+        return index.search(query_embeddings, k)
+
+
+def pool_embeddings(embeddings, weights=None):
+    """Mean-pool row vectors (optionally weighted) and re-normalize to unit length (None if empty)."""
+    if embeddings is None:
+        return None
+    arr = np.asarray(embeddings, dtype=np.float32)
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    if arr.shape[0] == 0:
+        return None
+    if weights is not None and len(weights) == arr.shape[0] and float(np.sum(weights)) > 0:
+        pooled = np.average(arr, axis=0, weights=np.asarray(weights, dtype=np.float32))
+    else:
+        pooled = arr.mean(axis=0)
+    norm = float(np.linalg.norm(pooled))
+    return pooled / norm if norm > 0 else pooled
+
+
+def embedder_token_window(embedder, max_tokens=None):
+    """
+    (tokenizer, window) for an embedder: window is the usable tokens per input,
+    i.e. max_seq_length minus the two special tokens. tokenizer is None when unavailable.
+    """
+    tokenizer = getattr(embedder, "tokenizer", None)
+    limit = getattr(embedder, "max_seq_length", None)
+    model_max = getattr(tokenizer, "model_max_length", None)
+    if isinstance(model_max, int) and model_max < 100000:
+        limit = min(limit, model_max) if limit else model_max
+    limit = int(limit or 512)
+    if max_tokens:
+        limit = min(limit, int(max_tokens))
+    return tokenizer, max(16, limit - 2)
+
+
+def token_spans(text, embedder, max_tokens=None, overlap_tokens=TOKEN_CHUNK_OVERLAP):
+    """
+    Character spans of token windows that fit the embedder's sequence length,
+    with `overlap_tokens` shared between consecutive windows.
+    Returns [(start_char, end_char, n_tokens)], or None without a fast tokenizer.
+    """
+    tokenizer, window = embedder_token_window(embedder, max_tokens)
+    if tokenizer is None or not text:
+        return None
+    try:
+        encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                            truncation=False, verbose=False)
+        offsets = encoded["offset_mapping"]
+    except (NotImplementedError, TypeError, ValueError, KeyError) as e:
+        logger.debug(f"Tokenizer offsets unavailable: {e}")
+        return None
+    if not offsets:
+        return []
+
+    overlap_tokens = max(0, min(int(overlap_tokens or 0), window // 2))
+    step = max(1, window - overlap_tokens)
+    spans = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1], end - start))
+        if end == len(offsets) or len(spans) >= MAX_CHUNK_COUNT:
+            break
+    return spans
+
+
+def token_chunk_text(text, embedder, max_tokens=None, overlap_tokens=TOKEN_CHUNK_OVERLAP):
+    """
+    Chunk text into windows sized by the embedder's tokenizer, so no chunk is
+    silently truncated by the model. Falls back to chunk_text() without a tokenizer.
+    """
+    if not text or not isinstance(text, str):
+        return []
+    text = text[:MAX_TEXT_LENGTH]
+    spans = token_spans(text, embedder, max_tokens, overlap_tokens)
+    if spans is None:
+        return chunk_text(text)
+    return [text[a:b].strip() for a, b, _ in spans if text[a:b].strip()]
+
+
+def embed_document(text, embedder, max_tokens=None, overlap_tokens=TOKEN_CHUNK_OVERLAP, batch_size=16):
+    """
+    Document embedding for long texts: encode every token window once (single batch)
+    and pool them weighted by token count. The whole document contributes instead of
+    the prefix that fits max_seq_length.
+    """
+    if not text or not text.strip():
+        return None
+    text = text[:MAX_TEXT_LENGTH]
+    spans = token_spans(text, embedder, max_tokens, overlap_tokens)
+    if not spans:
+        emb = embedder.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        return emb[0] if emb.ndim > 1 else emb
+    windows = [text[a:b] for a, b, _ in spans]
+    vecs = embedder.encode(windows, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    return pool_embeddings(vecs, weights=[n for _, _, n in spans])
+
+
+def build_embedding_lookup(texts, embeddings):
+    """Map whitespace-normalized text -> embedding row, for reuse by later consumers."""
+    lookup = {}
+    if embeddings is None or texts is None:
+        return lookup
+    for text, vec in zip(texts, embeddings):
+        if isinstance(text, str) and text.strip():
+            lookup.setdefault(" ".join(text.split()), vec)
+    return lookup
+
+
+def encode_with_lookup(embedder, texts, lookup=None, batch_size=32):
+    """
+    Embed `texts`, taking vectors from `lookup` where available and encoding only the
+    misses in a single batch. Returns an (n, dim) float32 array aligned with texts.
+    """
+    lookup = lookup or {}
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    keys = [" ".join(t.split()) for t in texts]
+    missing = [i for i, k in enumerate(keys) if k not in lookup]
+    encoded = None
+    if missing:
+        encoded = embedder.encode([texts[i] for i in missing], batch_size=batch_size,
+                                  convert_to_numpy=True, normalize_embeddings=True)
+        if encoded.ndim == 1:
+            encoded = encoded.reshape(1, -1)
+    if encoded is not None and len(missing) == len(texts):
+        return np.asarray(encoded, dtype=np.float32)
+
+    dim = encoded.shape[1] if encoded is not None else len(next(iter(lookup.values())))
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, k in enumerate(keys):
+        if k in lookup:
+            out[i] = lookup[k]
+    if encoded is not None:
+        out[missing] = encoded
+    return out
+
+
+def extract_sections(text, keep_empty=False):
+    """Heuristic section splitter (no lexicons). keep_empty also returns headers with no body lines."""
     lines = [l.strip() for l in text.splitlines()]
     blocks, cur, cur_title = [], [], "header"
     for l in lines:
         if re.match(r'^[A-Z][A-Za-z ]{1,40}:$|^[A-Z][A-Za-z &/]{1,50}$', l) and len(l.split())<=8:
-            if cur:
+            if cur or (keep_empty and cur_title != "header"):
                 blocks.append((cur_title, "\n".join(cur).strip()))
                 cur = []
             cur_title = l.strip(':').lower()
@@ -163,15 +465,21 @@ def contains_atom(atom, text_tokens, full_text=""):
     2. All tokens present (subset matching)
     3. Fuzzy match for compound terms (60% threshold)
     4. Common abbreviations and variations
+
+    `text_tokens` may be a plain token set or a SegmentIndex, in which case its
+    precomputed normalized text and vocabulary are used.
     """
     a = normalize_text(atom)
     if len(a) < 2: return False
-    
+
+    normalized_full = getattr(text_tokens, "normalized_text", None)
+    text_tokens = getattr(text_tokens, "text_tokens", text_tokens)
+    if not normalized_full and full_text:
+        normalized_full = _normalized_full_text(full_text)
+
     # Strategy 1: Exact substring match in full text
-    if full_text:
-        normalized_full = normalize_text(full_text)
-        if a in normalized_full:
-            return True
+    if normalized_full and a in normalized_full:
+        return True
     
     # Strategy 2: Extract requirement tokens
     a_tok = set(re.findall(r'[a-z0-9][a-z0-9+.#-]*', a))
@@ -188,41 +496,46 @@ def contains_atom(atom, text_tokens, full_text=""):
         if match_ratio >= 0.6:  # 60% threshold
             return True
     
-    # Strategy 5: Common tech abbreviations and variations
+    # Strategy 5: Common tech abbreviations and variations (taxonomy expansions)
     # e.g., "ai" matches "artificial intelligence", "ml" matches "machine learning"
-    tech_expansions = {
-        'ai': ['artificial', 'intelligence'],
-        'ml': ['machine', 'learning'],
-        'dl': ['deep', 'learning'],
-        'nlp': ['natural', 'language', 'processing'],
-        'cv': ['computer', 'vision'],
-        'db': ['database'],
-        'api': ['application', 'programming', 'interface'],
-        'ci': ['continuous', 'integration'],
-        'cd': ['continuous', 'deployment'],
-        'devops': ['development', 'operations'],
-        'aws': ['amazon', 'web', 'services'],
-        'gcp': ['google', 'cloud', 'platform'],
-        'k8s': ['kubernetes'],
-    }
-    
+    expansions = get_taxonomy().expansions
     for token in a_tok:
-        if token in tech_expansions:
-            expansion_words = tech_expansions[token]
+        if token in expansions:
+            expansion_words = expansions[token]
             if any(word in text_tokens for word in expansion_words):
                 return True
     
     return False
 
 
+def find_atoms(atoms, text_tokens, full_text=""):
+    """
+    Batch contains_atom(): the normalized atoms detected in the text.
+    Exact phrase hits for every atom come from one TermSet scan of the normalized
+    text; only the remaining atoms go through the token-based strategies.
+    """
+    normalized = [normalize_text(a) for a in atoms if isinstance(a, str)]
+    normalized = [a for a in dict.fromkeys(normalized) if len(a) >= 2]
+    if not normalized:
+        return set()
+
+    normalized_full = getattr(text_tokens, "normalized_text", None)
+    if not normalized_full and full_text:
+        normalized_full = _normalized_full_text(full_text)
+    hits = compile_terms(tuple(normalized)).matched(normalized_full) if normalized_full else set()
+    for a in normalized:
+        if a not in hits and contains_atom(a, text_tokens, full_text):
+            hits.add(a)
+    return hits
+
+
 def extract_atoms_from_text(text, nlp, max_atoms=60):
     """Dynamic atom candidates from JD (no lexicons): noun-chunks + list parsing + compact phrases."""
     text = text.strip()
-    doc = nlp(text)
     cands = []
     
     # Extract noun chunks (parser is required and verified at startup)
-    for nc in doc.noun_chunks:
+    for nc in pipeline_manager(nlp).noun_chunks(text):
         s = normalize_text(nc.text)
         if 2 <= len(s) <= 50: cands.append(s)
 
@@ -241,13 +554,12 @@ def extract_atoms_from_text(text, nlp, max_atoms=60):
 
     # STRICT filtering: Remove all useless/generic words and phrases
     generic = ATOM_GENERIC_TOKENS
-    blocked_phrases = ATOM_BLOCK_PHRASES
 
     filtered = []
     for c in cands:
         if not c:
             continue
-        if any(phrase in c for phrase in blocked_phrases):
+        if ATOM_BLOCK_TERMS.search(c):
             continue
         tokens = c.split()
         meaningful = [t for t in tokens if t not in generic]
@@ -361,6 +673,9 @@ ATOM_BLOCK_PHRASES = {
     "important role","critical role","essential role","important function"
 }
 
+# OPTIMIZATION: block phrases compiled once; one regex scan per candidate instead of a loop over phrases
+ATOM_BLOCK_TERMS = TermSet(ATOM_BLOCK_PHRASES)
+
 ATOM_WEAK_SINGLE = {
     # EXPANDED - ALL single weak tokens
     "foundation","foundations","knowledge","understanding","experience","skill","skills","skillset",
@@ -441,7 +756,7 @@ def _is_valid_atom(atom: str):
         return False
     if _detect_gibberish(s):
         return False
-    if any(phrase in s for phrase in ATOM_BLOCK_PHRASES):
+    if ATOM_BLOCK_TERMS.search(s):
         return False
     
     tokens = _tokenize_atom(s)
@@ -548,100 +863,117 @@ def _is_valid_atom(atom: str):
     return True  # Default to accepting if passed all filters above
 
 
+class _CanonicalMemo:
+    """
+    LRU memo of normalized atom -> canonical form, one slot per (atom, lemmatized?) pair.
+    Entries are tied to the taxonomy snapshot they were resolved against and dropped
+    when it is reloaded.
+    """
+
+    def __init__(self, maxsize=CANONICAL_ATOM_CACHE_SIZE):
+        self.maxsize = max(0, maxsize)
+        self._entries = OrderedDict()
+        self._taxonomy = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, keys, taxonomy):
+        """Cached canonicals for `keys` ({key: canonical}); misses are absent."""
+        found = {}
+        with self._lock:
+            if self._taxonomy is not taxonomy:
+                self._entries.clear()
+                self._taxonomy = taxonomy
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+                self.hits += 1
+        return found
+
+    def store(self, resolved, taxonomy):
+        if not self.maxsize:
+            return
+        with self._lock:
+            if self._taxonomy is not taxonomy:
+                return
+            self._entries.update(resolved)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self):
+        total = self.hits + self.misses
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+_canonical_memo = _CanonicalMemo()
+
+
+def canonical_cache_info():
+    return _canonical_memo.info()
+
+
+def _lemmatize_atoms(texts, nlp):
+    """Lemma strings for `texts` in one nlp.pipe pass (lemmas view: parser/NER skipped). None if lemmatization fails."""
+    try:
+        return [" ".join(lemma for lemma in (t.lemma_.lower() for t in doc)
+                         if re.match(r"[a-z0-9][a-z0-9+.#-]*", lemma))
+                for doc in pipeline_manager(nlp).pipe(texts, ("lemmas",), batch_size=64)]
+    except Exception as e:
+        logger.warning(f"⚠️ Batched lemmatization failed, using token canonicals: {e}")
+        return None
+
+
+def canonical_atoms(atoms, nlp=None):
+    """
+    Canonical forms for a batch of atoms, aligned with the input (see _canonical_atom).
+    Memo hits and direct taxonomy hits are resolved without spaCy; the remaining
+    atoms are lemmatized together in a single nlp.pipe call.
+    """
+    taxonomy = get_taxonomy()
+    lemmatize = nlp is not None
+    normalized = [normalize_text(a) if isinstance(a, str) else "" for a in atoms]
+    keys = {(s, lemmatize) for s in normalized if s}
+    resolved = _canonical_memo.lookup(keys, taxonomy)
+
+    pending = []
+    for key in keys:
+        if key in resolved:
+            continue
+        s = key[0]
+        if s in taxonomy.term_class:
+            resolved[key] = taxonomy.term_class[s]
+        else:
+            pending.append(s)
+
+    if pending:
+        fresh = {}
+        lemmas = _lemmatize_atoms(pending, nlp) if lemmatize else None
+        for idx, s in enumerate(pending):
+            canned = lemmas[idx] if lemmas is not None else ""
+            if canned:
+                fresh[(s, lemmatize)] = taxonomy.term_class.get(canned, canned)
+                continue
+            # Token fallback (no nlp, or lemmatization produced nothing)
+            canonical = " ".join(_tokenize_atom(s))
+            fresh[(s, lemmatize)] = taxonomy.term_class.get(canonical, canonical)
+        _canonical_memo.store(fresh, taxonomy)
+        resolved.update(fresh)
+
+    return [resolved[(s, lemmatize)] if s else "" for s in normalized]
+
+
 def _canonical_atom(atom: str, nlp=None):
     """
     Create canonical form for deduplication, merging abbreviations with full forms.
     Examples: 'OS' and 'Operating Systems' → same canonical
     """
-    s = normalize_text(atom)
-    if not s:
-        return ""
-    
-    # Common tech abbreviation mappings (for deduplication)
-    abbreviation_map = {
-        # CS Fundamentals
-        'os': 'operating system',
-        'operating systems': 'operating system',
-        'dbms': 'database management system',
-        'database management systems': 'database management system',
-        'cn': 'computer network',
-        'computer networks': 'computer network',
-        'ds': 'data structure',
-        'data structures': 'data structure',
-        'algo': 'algorithm',
-        'algorithms': 'algorithm',
-        'oop': 'object oriented programming',
-        'oops': 'object oriented programming',
-        'object oriented': 'object oriented programming',
-        
-        # Cloud & DevOps
-        'aws': 'amazon web services',
-        'amazon web services': 'amazon web services',
-        'gcp': 'google cloud platform',
-        'google cloud': 'google cloud platform',
-        'k8s': 'kubernetes',
-        'ci cd': 'continuous integration',
-        'ci/cd': 'continuous integration',
-        
-        # Databases
-        'postgres': 'postgresql',
-        'postgresql': 'postgresql',
-        'mongo': 'mongodb',
-        'mongodb': 'mongodb',
-        
-        # Languages
-        'js': 'javascript',
-        'javascript': 'javascript',
-        'ts': 'typescript',
-        'typescript': 'typescript',
-        'py': 'python',
-        
-        # Frameworks
-        'reactjs': 'react',
-        'react.js': 'react',
-        'nodejs': 'node',
-        'node.js': 'node',
-        'vuejs': 'vue',
-        'vue.js': 'vue',
-        
-        # APIs
-        'rest api': 'rest',
-        'restful': 'rest',
-        'rest apis': 'rest',
-        'graphql api': 'graphql',
-        
-        # ML/AI
-        'ml': 'machine learning',
-        'ai': 'artificial intelligence',
-        'nlp': 'natural language processing',
-        'cv': 'computer vision',
-    }
-    
-    # Check if atom maps to a canonical form
-    if s in abbreviation_map:
-        return abbreviation_map[s]
-    
-    # Use NLP lemmatization for other terms
-    if nlp is not None:
-        try:
-            doc = nlp(s)
-            lemmas = [t.lemma_.lower() for t in doc if re.match(r"[a-z0-9][a-z0-9+.#-]*", t.lemma_.lower())]
-            canned = " ".join(lemmas)
-            if canned and canned in abbreviation_map:
-                return abbreviation_map[canned]
-            if canned:
-                return canned
-        except Exception:
-            pass
-    
-    tokens = _tokenize_atom(s)
-    canonical = " ".join(tokens)
-    
-    # Final check if tokenized form maps to canonical
-    if canonical in abbreviation_map:
-        return abbreviation_map[canonical]
-    
-    return canonical
+    return canonical_atoms([atom], nlp)[0]
 
 
 def refine_atom_list(atoms, nlp=None, reserved_canonicals=None, limit=50):
@@ -652,13 +984,11 @@ def refine_atom_list(atoms, nlp=None, reserved_canonicals=None, limit=50):
     reserved = set(reserved_canonicals or [])
     best = {}
     order = []
-    for idx, atom in enumerate(atoms):
-        if not isinstance(atom, str):
-            continue
-        atom = normalize_text(atom)
-        if not _is_valid_atom(atom):
-            continue
-        canonical = _canonical_atom(atom, nlp)
+    # OPTIMIZATION: canonicalize every valid atom in one batch (memo + single nlp.pipe)
+    valid = [(idx, normalize_text(atom)) for idx, atom in enumerate(atoms) if isinstance(atom, str)]
+    valid = [(idx, atom) for idx, atom in valid if _is_valid_atom(atom)]
+    canonicals = canonical_atoms([atom for _, atom in valid], nlp)
+    for (idx, atom), canonical in zip(valid, canonicals):
         if not canonical or canonical in reserved:
             continue
         current = best.get(canonical)
@@ -672,12 +1002,16 @@ def refine_atom_list(atoms, nlp=None, reserved_canonicals=None, limit=50):
     return refined, reserved
 
 
-def extract_structured_entities(text, nlp):
+def extract_structured_entities(text, nlp, doc_context=None):
     """
     Extract structured entities from resume using spaCy NER and custom patterns.
+    With a DocumentContext, entities come from the shared request Doc instead of a re-parse.
     Returns: dict with organizations, dates, skills, education, certifications
     """
-    doc = nlp(text[:5000])  # Limit to first 5000 chars for efficiency
+    if doc_context is not None:
+        doc_ents = doc_context.ents(text, limit=5000)
+    else:
+        doc_ents = pipeline_manager(nlp).entities(text[:5000])  # Limit to first 5000 chars for efficiency
     
     entities = {
         "organizations": [],
@@ -689,7 +1023,7 @@ def extract_structured_entities(text, nlp):
     }
     
     # Extract named entities
-    for ent in doc.ents:
+    for ent in doc_ents:
         if ent.label_ == "ORG":
             org = ent.text.strip()
             if len(org) > 2 and org not in entities["organizations"]:
@@ -742,10 +1076,90 @@ def extract_structured_entities(text, nlp):
     return entities
 
 
-def extract_technical_skills(text, nlp):
+# Known technology terms matched by extract_technical_skills (also embedded by the embedding bank)
+TECHNICAL_KEYWORDS = frozenset({
+    # Programming Languages (EXHAUSTIVE)
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'ruby', 'go', 'golang',
+    'rust', 'kotlin', 'swift', 'scala', 'php', 'perl', 'r', 'matlab', 'julia',
+    'c', 'objective-c', 'dart', 'elixir', 'haskell', 'lua', 'groovy', 'shell', 'bash',
+    
+    # Frontend Frameworks & Libraries
+    'react', 'reactjs', 'react.js', 'angular', 'vue', 'vuejs', 'vue.js', 'svelte',
+    'ember', 'backbone', 'jquery', 'bootstrap', 'tailwind', 'material-ui', 'mui',
+    'next', 'nextjs', 'next.js', 'nuxt', 'gatsby', 'redux', 'mobx', 'recoil',
+    'webpack', 'vite', 'parcel', 'rollup', 'babel', 'sass', 'scss', 'less',
+    
+    # Backend Frameworks
+    'django', 'flask', 'fastapi', 'express', 'expressjs', 'nest', 'nestjs',
+    'spring', 'spring boot', 'struts', 'hibernate', 'laravel', 'symfony',
+    'rails', 'ruby on rails', 'sinatra', 'asp.net', '.net', 'dotnet',
+    
+    # Databases
+    'sql', 'mysql', 'postgresql', 'postgres', 'mongodb', 'mongo', 'redis',
+    'cassandra', 'dynamodb', 'elasticsearch', 'oracle', 'sql server', 'mssql',
+    'sqlite', 'mariadb', 'couchdb', 'neo4j', 'influxdb', 'firebase', 'firestore',
+    
+    # Cloud Platforms & Services
+    'aws', 'amazon web services', 'azure', 'microsoft azure', 'gcp', 'google cloud',
+    'google cloud platform', 'ec2', 's3', 'lambda', 'cloudfront', 'rds', 'dynamodb',
+    'ecs', 'eks', 'fargate', 'sagemaker', 'cloudwatch', 'iam',
+    'azure functions', 'azure devops', 'app service', 'blob storage',
+    'compute engine', 'app engine', 'cloud functions', 'bigquery', 'pub/sub',
+    'heroku', 'digitalocean', 'linode', 'vercel', 'netlify', 'cloudflare',
+    
+    # DevOps & Tools
+    'docker', 'kubernetes', 'k8s', 'jenkins', 'gitlab', 'github', 'bitbucket',
+    'travis', 'circleci', 'terraform', 'ansible', 'puppet', 'chef', 'vagrant',
+    'helm', 'prometheus', 'grafana', 'datadog', 'new relic', 'splunk',
+    'ci/cd', 'cicd', 'git', 'svn', 'mercurial', 'jira', 'confluence',
+    
+    # Data Science & ML
+    'machine learning', 'deep learning', 'neural networks', 'nlp', 
+    'natural language processing', 'computer vision', 'ai', 'artificial intelligence',
+    'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'sklearn', 'pandas', 'numpy',
+    'scipy', 'matplotlib', 'seaborn', 'plotly', 'jupyter', 'opencv',
+    'xgboost', 'lightgbm', 'catboost', 'hugging face', 'transformers',
+    'spark', 'pyspark', 'hadoop', 'hive', 'kafka', 'airflow', 'mlflow',
+    
+    # Mobile Development
+    'android', 'ios', 'react native', 'flutter', 'kotlin', 'swift', 'xamarin',
+    'ionic', 'cordova', 'phonegap',
+    
+    # Testing & Quality
+    'jest', 'mocha', 'chai', 'jasmine', 'pytest', 'unittest', 'junit', 'testng',
+    'selenium', 'cypress', 'playwright', 'puppeteer', 'postman', 'insomnia',
+    
+    # Architecture & Patterns
+    'microservices', 'serverless', 'rest', 'restful', 'rest api', 'graphql',
+    'grpc', 'websocket', 'soap', 'mvc', 'mvvm', 'event-driven', 'message queue',
+    'rabbitmq', 'activemq', 'zeromq',
+    
+    # Computer Science Fundamentals
+    'data structures', 'algorithms', 'oop', 'object oriented programming',
+    'functional programming', 'design patterns', 'system design',
+    'operating systems', 'os', 'dbms', 'database management systems',
+    'computer networks', 'cn', 'networking',
+    
+    # Other Technologies
+    'linux', 'unix', 'windows', 'macos', 'nginx', 'apache', 'tomcat',
+    'elasticsearch', 'solr', 'memcached', 'varnish', 'cdn',
+    'oauth', 'jwt', 'saml', 'openid', 'ldap', 'active directory',
+})
+
+
+TECHNICAL_KEYWORD_MATCHER = TermSet(TECHNICAL_KEYWORDS, word_boundaries=True)
+
+
+def find_technical_keywords(text):
+    """Technical keyword hits in `text` as (start, end, keyword) offsets into its lowercased form."""
+    return TECHNICAL_KEYWORD_MATCHER.find_all(text.lower()) if text else []
+
+
+def extract_technical_skills(text, nlp, doc_context=None):
     """
     ROBUST technical skills extraction using multi-strategy approach.
     Extracts programming languages, frameworks, tools, databases, cloud platforms, etc.
+    Noun chunks come from the shared request Doc when a DocumentContext is given.
     Returns: list of unique technical skills
     """
     if not text:
@@ -757,81 +1171,10 @@ def extract_technical_skills(text, nlp):
     # ===== STRATEGY 1: COMPREHENSIVE KEYWORD MATCHING =====
     # This is the most reliable method - match known technical keywords
     
-    technical_keywords = {
-        # Programming Languages (EXHAUSTIVE)
-        'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'ruby', 'go', 'golang',
-        'rust', 'kotlin', 'swift', 'scala', 'php', 'perl', 'r', 'matlab', 'julia',
-        'c', 'objective-c', 'dart', 'elixir', 'haskell', 'lua', 'groovy', 'shell', 'bash',
-        
-        # Frontend Frameworks & Libraries
-        'react', 'reactjs', 'react.js', 'angular', 'vue', 'vuejs', 'vue.js', 'svelte',
-        'ember', 'backbone', 'jquery', 'bootstrap', 'tailwind', 'material-ui', 'mui',
-        'next', 'nextjs', 'next.js', 'nuxt', 'gatsby', 'redux', 'mobx', 'recoil',
-        'webpack', 'vite', 'parcel', 'rollup', 'babel', 'sass', 'scss', 'less',
-        
-        # Backend Frameworks
-        'django', 'flask', 'fastapi', 'express', 'expressjs', 'nest', 'nestjs',
-        'spring', 'spring boot', 'struts', 'hibernate', 'laravel', 'symfony',
-        'rails', 'ruby on rails', 'sinatra', 'asp.net', '.net', 'dotnet',
-        
-        # Databases
-        'sql', 'mysql', 'postgresql', 'postgres', 'mongodb', 'mongo', 'redis',
-        'cassandra', 'dynamodb', 'elasticsearch', 'oracle', 'sql server', 'mssql',
-        'sqlite', 'mariadb', 'couchdb', 'neo4j', 'influxdb', 'firebase', 'firestore',
-        
-        # Cloud Platforms & Services
-        'aws', 'amazon web services', 'azure', 'microsoft azure', 'gcp', 'google cloud',
-        'google cloud platform', 'ec2', 's3', 'lambda', 'cloudfront', 'rds', 'dynamodb',
-        'ecs', 'eks', 'fargate', 'sagemaker', 'cloudwatch', 'iam',
-        'azure functions', 'azure devops', 'app service', 'blob storage',
-        'compute engine', 'app engine', 'cloud functions', 'bigquery', 'pub/sub',
-        'heroku', 'digitalocean', 'linode', 'vercel', 'netlify', 'cloudflare',
-        
-        # DevOps & Tools
-        'docker', 'kubernetes', 'k8s', 'jenkins', 'gitlab', 'github', 'bitbucket',
-        'travis', 'circleci', 'terraform', 'ansible', 'puppet', 'chef', 'vagrant',
-        'helm', 'prometheus', 'grafana', 'datadog', 'new relic', 'splunk',
-        'ci/cd', 'cicd', 'git', 'svn', 'mercurial', 'jira', 'confluence',
-        
-        # Data Science & ML
-        'machine learning', 'deep learning', 'neural networks', 'nlp', 
-        'natural language processing', 'computer vision', 'ai', 'artificial intelligence',
-        'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'sklearn', 'pandas', 'numpy',
-        'scipy', 'matplotlib', 'seaborn', 'plotly', 'jupyter', 'opencv',
-        'xgboost', 'lightgbm', 'catboost', 'hugging face', 'transformers',
-        'spark', 'pyspark', 'hadoop', 'hive', 'kafka', 'airflow', 'mlflow',
-        
-        # Mobile Development
-        'android', 'ios', 'react native', 'flutter', 'kotlin', 'swift', 'xamarin',
-        'ionic', 'cordova', 'phonegap',
-        
-        # Testing & Quality
-        'jest', 'mocha', 'chai', 'jasmine', 'pytest', 'unittest', 'junit', 'testng',
-        'selenium', 'cypress', 'playwright', 'puppeteer', 'postman', 'insomnia',
-        
-        # Architecture & Patterns
-        'microservices', 'serverless', 'rest', 'restful', 'rest api', 'graphql',
-        'grpc', 'websocket', 'soap', 'mvc', 'mvvm', 'event-driven', 'message queue',
-        'rabbitmq', 'activemq', 'zeromq',
-        
-        # Computer Science Fundamentals
-        'data structures', 'algorithms', 'oop', 'object oriented programming',
-        'functional programming', 'design patterns', 'system design',
-        'operating systems', 'os', 'dbms', 'database management systems',
-        'computer networks', 'cn', 'networking',
-        
-        # Other Technologies
-        'linux', 'unix', 'windows', 'macos', 'nginx', 'apache', 'tomcat',
-        'elasticsearch', 'solr', 'memcached', 'varnish', 'cdn',
-        'oauth', 'jwt', 'saml', 'openid', 'ldap', 'active directory',
-    }
+    technical_keywords = TECHNICAL_KEYWORDS
     
-    # Match technical keywords in text (with word boundaries)
-    for keyword in technical_keywords:
-        # Use regex with word boundaries for accurate matching
-        pattern = r'\b' + re.escape(keyword) + r'\b'
-        if re.search(pattern, text_lower, re.IGNORECASE):
-            skills.add(keyword)
+    # OPTIMIZATION: all keywords matched (with word boundaries) in one pass of the compiled matcher
+    skills.update(TECHNICAL_KEYWORD_MATCHER.matched(text_lower))
     
     # ===== STRATEGY 2: VERSION-SPECIFIC PATTERNS =====
     # Match "Python 3.x", "Java 11", "React 18", etc.
@@ -877,9 +1220,12 @@ def extract_technical_skills(text, nlp):
     # Use spaCy to extract technical-looking noun chunks
     if nlp:
         try:
-            doc = nlp(text[:6000])  # Limit for performance
+            if doc_context is not None:
+                noun_chunks = doc_context.noun_chunks(text, limit=6000)
+            else:
+                noun_chunks = pipeline_manager(nlp).noun_chunks(text[:6000])  # Limit for performance
             
-            for chunk in doc.noun_chunks:
+            for chunk in noun_chunks:
                 chunk_text = chunk.text.lower().strip()
                 
                 # Filter for technical indicators
@@ -935,95 +1281,163 @@ def extract_technical_skills(text, nlp):
     return unique_skills[:80]  # Return top 80 skills
 
 
-def semantic_chunk_text(text, nlp, embedder, max_chars=800, overlap=200):
+def semantic_chunk_with_embeddings(text, nlp, embedder, max_chars=RESUME_CHUNK_MAX_CHARS,
+                                   overlap=RESUME_CHUNK_OVERLAP, doc_context=None,
+                                   boundary_threshold=SEMANTIC_BOUNDARY_THRESHOLD):
     """
-    Advanced semantic chunking: splits text intelligently using sentence boundaries
-    and semantic coherence for better RAG retrieval.
+    Semantic chunking that embeds every sentence exactly once.
+    Chunk boundaries fall where adjacent sentences diverge (cosine below
+    boundary_threshold) or when max_chars or the embedder's token window is
+    reached; only length splits carry sentence overlap. Chunk vectors are mean-pooled from their sentences, so
+    downstream consumers (index, segment scoring, global similarity) never re-encode.
+
+    Returns: dict with chunks, sentences, sentence_embeddings, chunk_embeddings,
+    chunk_spans (sentence index ranges, end exclusive). Embeddings are None when
+    no embedder is available.
     """
+    raw_text = text
     # First pass: sentence-based splitting
     text = re.sub(r'\n{3,}', '\n\n', text).strip()
     
-    # Ensure sentencizer is available
-    if "sentencizer" not in nlp.pipe_names:
-        try:
-            nlp.add_pipe("sentencizer")
-        except:
-            pass
-    
-    doc = nlp(text)
-    sentences = [s.text.strip() for s in getattr(doc, "sents", []) if s.text.strip()]
+    if doc_context is not None:
+        sentences = doc_context.sents(raw_text)
+    else:
+        sentences = pipeline_manager(nlp).sentences(text)
     
     if not sentences:
         # Fallback: split by paragraphs
         sentences = [p.strip() for p in text.split('\n\n') if p.strip()]
     
-    # Build chunks with semantic awareness
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for sent in sentences:
-        sent_length = len(sent)
-        
-        # If adding this sentence exceeds max_chars, finalize current chunk
-        if current_length + sent_length > max_chars and current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append(chunk_text)
-            
-            # Keep last few sentences for overlap (semantic continuity)
-            if overlap > 0:
-                overlap_sents = []
-                overlap_len = 0
-                for s in reversed(current_chunk):
-                    if overlap_len + len(s) <= overlap:
-                        overlap_sents.insert(0, s)
-                        overlap_len += len(s)
-                    else:
-                        break
-                current_chunk = overlap_sents
-                current_length = overlap_len
-            else:
-                current_chunk = []
-                current_length = 0
-        
-        current_chunk.append(sent)
-        current_length += sent_length
-    
-    # Add final chunk
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+    # Embed each sentence once
+    sentence_embeddings = None
+    if embedder is not None and sentences:
+        try:
+            sentence_embeddings = embedder.encode(sentences, batch_size=32, convert_to_numpy=True,
+                                                  normalize_embeddings=True)
+            if sentence_embeddings.ndim == 1:
+                sentence_embeddings = sentence_embeddings.reshape(1, -1)
+            sentence_embeddings = np.asarray(sentence_embeddings, dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Sentence embedding failed, chunking by length only: {e}")
+            sentence_embeddings = None
+    
+    # Token budget so no chunk exceeds the embedder's max_seq_length
+    sentence_tokens, token_window = None, None
+    if embedder is not None and sentences:
+        tokenizer, token_window = embedder_token_window(embedder)
+        if tokenizer is not None:
+            try:
+                encoded = tokenizer(sentences, add_special_tokens=False, verbose=False)
+                sentence_tokens = [len(ids) for ids in encoded["input_ids"]]
+            except Exception as e:
+                logger.debug(f"Sentence token counting failed: {e}")
+                sentence_tokens = None
+    
+    # Cosine between each sentence and the next (normalized vectors)
+    adjacent_sims = None
+    if sentence_embeddings is not None and len(sentences) > 1:
+        adjacent_sims = np.einsum('ij,ij->i', sentence_embeddings[:-1], sentence_embeddings[1:])
+    
+    # Build chunk spans over sentence indices
+    spans = []
+    start, current_length, current_tokens = 0, 0, 0
+    for i, sent in enumerate(sentences):
+        if i > start:
+            too_long = current_length + len(sent) > max_chars
+            if sentence_tokens is not None and current_tokens + sentence_tokens[i] > token_window:
+                too_long = True
+            topic_shift = (adjacent_sims is not None
+                           and adjacent_sims[i - 1] < boundary_threshold
+                           and current_length >= SEMANTIC_MIN_CHUNK_CHARS)
+            if too_long or topic_shift:
+                spans.append((start, i))
+                if len(spans) >= MAX_CHUNK_COUNT:
+                    logger.warning(f"Reached maximum chunk limit ({MAX_CHUNK_COUNT})")
+                    start = len(sentences)
+                    break
+                new_start = i
+                # Keep last few sentences for overlap (semantic continuity across length splits)
+                if too_long and overlap > 0:
+                    overlap_len = 0
+                    while new_start - 1 > start and overlap_len + len(sentences[new_start - 1]) <= overlap:
+                        new_start -= 1
+                        overlap_len += len(sentences[new_start])
+                start = new_start
+                current_length = sum(len(s) for s in sentences[start:i])
+                if sentence_tokens is not None:
+                    current_tokens = sum(sentence_tokens[start:i])
+        current_length += len(sent)
+        if sentence_tokens is not None:
+            current_tokens += sentence_tokens[i]
+    if start < len(sentences):
+        spans.append((start, len(sentences)))
+    
+    chunks = [' '.join(sentences[a:b]) for a, b in spans]
+    chunk_embeddings = None
+    if sentence_embeddings is not None and spans:
+        chunk_embeddings = np.vstack([pool_embeddings(sentence_embeddings[a:b]) for a, b in spans])
     
     # If no chunks created, return whole text
     if not chunks:
         chunks = [text]
+        spans = [(0, len(sentences))]
+        pooled = pool_embeddings(sentence_embeddings)
+        chunk_embeddings = pooled.reshape(1, -1) if pooled is not None else None
     
-    return chunks
+    return {
+        "chunks": chunks,
+        "sentences": sentences,
+        "sentence_embeddings": sentence_embeddings,
+        "chunk_embeddings": chunk_embeddings,
+        "chunk_spans": spans,
+    }
+
+
+def semantic_chunk_text(text, nlp, embedder, max_chars=RESUME_CHUNK_MAX_CHARS, overlap=RESUME_CHUNK_OVERLAP,
+                        doc_context=None):
+    """
+    Advanced semantic chunking: splits text intelligently using sentence boundaries
+    and semantic coherence for better RAG retrieval.
+    Use semantic_chunk_with_embeddings() to also get the sentence/chunk vectors.
+    """
+    return semantic_chunk_with_embeddings(text, nlp, embedder, max_chars=max_chars, overlap=overlap,
+                                          doc_context=doc_context)["chunks"]
 
 
 def retrieve_relevant_context(query, faiss_index, chunks, embedder, top_k=3):
     """
     RAG: Retrieve most relevant resume chunks for a given query using FAISS.
+    `faiss_index` may be a faiss index or a ChunkIndex (index built on first search).
     Returns: list of (chunk_text, similarity_score) tuples
     """
-    if not chunks or faiss_index is None:
-        return []
-    
+    return retrieve_relevant_contexts([query], faiss_index, chunks, embedder, top_k=top_k)[0]
+
+
+def retrieve_relevant_contexts(queries, faiss_index, chunks, embedder, top_k=3, query_embeddings=None):
+    """
+    Batched RAG retrieval: encode all queries in one call (or take precomputed,
+    normalized `query_embeddings` aligned with queries) and run one multi-row search.
+    Returns one list of (chunk_text, similarity_score) tuples per query.
+    """
+    empty = [[] for _ in queries]
+    if not queries or not chunks or faiss_index is None:
+        return empty
+
     try:
-        # Encode query
-        query_emb = embedder.encode(query, convert_to_numpy=True, normalize_embeddings=True)
-        if query_emb.ndim > 1:
-            query_emb = query_emb[0]
-        
-        # Search FAISS index
-        query_emb = query_emb.reshape(1, -1).astype(np.float32)
-        similarities, indices = faiss_index.search(query_emb, min(top_k, len(chunks)))
-        
-        # Build results
+        if query_embeddings is None:
+            query_embeddings = embedder.encode(list(queries), batch_size=32, convert_to_numpy=True,
+                                               normalize_embeddings=True)
+        query_embs = np.ascontiguousarray(np.asarray(query_embeddings, dtype=np.float32))
+        if query_embs.ndim == 1:
+            query_embs = query_embs.reshape(1, -1)
+        if len(query_embs) != len(queries):
+            return empty
+
+        similarities, indices = faiss_index.search(query_embs, min(top_k, len(chunks)))
+
         results = []
-        for sim, idx in zip(similarities[0], indices[0]):
-            if 0 <= idx < len(chunks):
-                results.append((chunks[idx], float(sim)))
-        
+        for sims, idxs in zip(similarities, indices):
+            results.append([(chunks[idx], float(sim)) for sim, idx in zip(sims, idxs) if 0 <= idx < len(chunks)])
         return results
     except Exception:
-        return []
+        return empty
@@ -144,9 +144,9 @@ def validate_resume_data(resume_doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
         issues.append("Name contains no letters")
     
     # 6. EMBEDDING/INDEX VALIDATION
-    faiss_index = resume_doc.get('faiss')
-    if faiss_index is None:
-        issues.append("FAISS index not built (embedding failed)")
+    chunk_index = resume_doc.get('chunk_index', resume_doc.get('faiss'))
+    if chunk_index is None:
+        issues.append("Chunk index not available (no embedder or no chunks)")
     
     # 7. EXPERIENCE VALIDATION
     experience = resume_doc.get('experience', [])
@@ -167,7 +167,7 @@ def validate_resume_data(resume_doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
         "Text too short",
         "gibberish",
         "No text chunks created",
-        "FAISS index not built"
+        "Chunk index not available"
     ]
     
     has_critical_issue = any(
@@ -376,11 +376,8 @@ def sanitize_resume_data(resume_doc: Dict[str, Any]) -> Dict[str, Any]:
     else:
         sanitized['education'] = []
     
-    # Keep FAISS index as-is (complex object)
-    sanitized['faiss'] = resume_doc.get('faiss')
-    
-    # Keep embeddings as-is
-    sanitized['embeddings'] = resume_doc.get('embeddings')
+    # Keep chunk index (chunk embeddings + lazily built FAISS index) as-is (complex object)
+    sanitized['chunk_index'] = resume_doc.get('chunk_index')
     
     # Entities - keep but limit
     entities = resume_doc.get('entities', {})
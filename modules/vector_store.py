@@ -0,0 +1,345 @@
+"""
+Memory-Mapped Quantized Vector Store
+int8 vectors in read-only memory maps shared by all workers, with an append log,
+tombstones, periodic compaction and a metadata sidecar (vector id -> resume id, chunk offsets)
+"""
+import os
+import json
+import glob
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# CONFIGURATION
+STORE_VERSION = 1
+VECTOR_STORE_COMPACT_LOG_ROWS = int(os.getenv("VECTOR_STORE_COMPACT_LOG_ROWS", "50000"))
+VECTOR_STORE_COMPACT_DEAD_FRACTION = float(os.getenv("VECTOR_STORE_COMPACT_DEAD_FRACTION", "0.20"))
+
+# Metadata sidecar row: owning resume, chunk position in resumes.chunks, char offsets in resumes.text (-1 if unknown)
+META_DTYPE = np.dtype([("resume_id", "<i8"), ("chunk_no", "<i4"), ("start", "<i4"), ("end", "<i4")])
+
+
+def quantize_int8(vectors):
+    """Symmetric per-row int8 quantization. Returns (codes (n, d) int8, scales (n,) float32)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _log_dtype(dim):
+    return np.dtype([("meta", META_DTYPE), ("scale", "<f4"), ("codes", "i1", (dim,))])
+
+
+class VectorStore:
+    """
+    On-disk vector store for one tenant's resume corpus.
+
+    Files in `directory` (one generation at a time, swapped atomically via the manifest):
+      manifest.json              version, dim, signature, generation
+      base-<gen>.codes.npy       (N, dim) int8 vectors           } written only by compaction,
+      base-<gen>.scales.npy      (N,) float32 dequantization     } opened with mmap_mode="r"
+      base-<gen>.meta.npy        (N,) META_DTYPE sidecar         } and shared by every worker
+      append-<gen>.log           fixed-size records (meta, scale, codes) appended after the base
+      tombstones-<gen>.log       int64 resume ids deleted since the generation was written
+
+    Vector id = row in the base followed by the append log; ids are stable until compaction,
+    which drops tombstoned rows, folds the log into a new base and bumps the generation.
+    Appends, deletes and compaction take an inter-process file lock; readers only remap.
+    """
+
+    def __init__(self, directory, dim, signature=""):
+        self.directory = directory
+        self.dim = int(dim)
+        self.signature = signature
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._log_dtype = _log_dtype(self.dim)
+        self.generation = None
+        self._meta_key = None  # (generation, log rows) the cached meta / resume ids were built for
+        os.makedirs(directory, exist_ok=True)
+        with self._file_lock():
+            manifest = self._read_manifest()
+            if manifest is None or manifest.get("version") != STORE_VERSION \
+                    or manifest.get("dim") != self.dim or manifest.get("signature") != signature:
+                if manifest is not None:
+                    logger.info(f"Vector store {directory} built for {manifest.get('signature')}, resetting")
+                self._write_generation(0, np.zeros((0, self.dim), np.int8), np.zeros(0, np.float32),
+                                       np.zeros(0, META_DTYPE))
+        self.refresh()
+
+    @classmethod
+    def open_existing(cls, directory, signature=""):
+        """Open a store whose manifest matches `signature` (None when absent or stale)."""
+        try:
+            with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != STORE_VERSION or manifest.get("signature") != signature:
+            return None
+        return cls(directory, manifest["dim"], signature)
+
+    # ---- files ----------------------------------------------------------------
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            if not FCNTL_AVAILABLE or self._lock_depth:
+                # Nested use by the thread already holding it (flock is not re-entrant across handles)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self._path(".lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @contextmanager
+    def locked(self):
+        """Inter-process store lock, for sidecar files kept in the store directory by its users."""
+        with self._file_lock():
+            yield self
+
+    def _read_manifest(self):
+        try:
+            with open(self._path("manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_generation(self, generation, codes, scales, meta):
+        """Write base files for `generation` and publish them via the manifest (caller holds the lock)."""
+        for name, arr in (("codes", codes), ("scales", scales), ("meta", meta)):
+            tmp_path = self._path(f"base-{generation}.{name}.tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(arr))
+            os.replace(tmp_path, self._path(f"base-{generation}.{name}.npy"))
+        for name in (f"append-{generation}.log", f"tombstones-{generation}.log"):
+            open(self._path(name), "wb").close()
+        manifest = {"version": STORE_VERSION, "dim": self.dim, "signature": self.signature,
+                    "generation": generation}
+        with open(self._path("manifest.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(self._path("manifest.json.tmp"), self._path("manifest.json"))
+        # Older generations stay readable by workers that still map them (POSIX unlink semantics)
+        for path in glob.glob(self._path("base-*.npy")) + glob.glob(self._path("*-*.log")):
+            name = os.path.basename(path)
+            if f"-{generation}." not in name:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _load_base(self, generation, name):
+        path = self._path(f"base-{generation}.{name}.npy")
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            return np.load(path)  # empty arrays cannot be memory-mapped on every platform
+
+    def refresh(self):
+        """Pick up a new generation (after compaction) and rows/tombstones appended by other workers."""
+        with self._lock:
+            manifest = self._read_manifest() or {}
+            generation = manifest.get("generation", 0)
+            if generation != self.generation:
+                self.codes = self._load_base(generation, "codes")
+                self.scales = self._load_base(generation, "scales")
+                self.base_meta = self._load_base(generation, "meta")
+                self.generation = generation
+                self._log = None
+                self._log_rows = 0
+                self._tomb_bytes = 0
+                self.tombstones = set()
+
+            log_path = self._path(f"append-{generation}.log")
+            log_rows = os.path.getsize(log_path) // self._log_dtype.itemsize if os.path.exists(log_path) else 0
+            if log_rows != self._log_rows:
+                self._log = np.memmap(log_path, dtype=self._log_dtype, mode="r", shape=(log_rows,)) \
+                    if log_rows else None
+                self._log_rows = log_rows
+
+            tomb_path = self._path(f"tombstones-{generation}.log")
+            tomb_bytes = (os.path.getsize(tomb_path) // 8) * 8 if os.path.exists(tomb_path) else 0
+            if tomb_bytes > self._tomb_bytes:
+                with open(tomb_path, "rb") as f:
+                    f.seek(self._tomb_bytes)
+                    self.tombstones.update(int(x) for x in np.frombuffer(f.read(tomb_bytes - self._tomb_bytes),
+                                                                          dtype="<i8"))
+                self._tomb_bytes = tomb_bytes
+        return self
+
+    # ---- reads ----------------------------------------------------------------
+
+    @property
+    def base_rows(self):
+        return len(self.base_meta)
+
+    def __len__(self):
+        return self.base_rows + self._log_rows
+
+    def _cached_meta(self):
+        """(meta, resume ids), rebuilt only when the generation or log size changed, not per query."""
+        with self._lock:
+            key = (self.generation, self._log_rows)
+            if self._meta_key != key:
+                if self._log is None:
+                    meta = self.base_meta
+                elif self._meta_key is not None and self._meta_key[0] == key[0] and self._meta_key[1] < key[1]:
+                    meta = np.concatenate([self._meta, self._log["meta"][self._meta_key[1]:]])
+                else:
+                    meta = np.concatenate([self.base_meta, self._log["meta"]])
+                self._meta = meta
+                self._resume_ids = frozenset(np.unique(meta["resume_id"]).tolist())
+                self._meta_key = key
+            return self._meta, self._resume_ids
+
+    @property
+    def meta(self):
+        """Metadata of every row (base + log), in vector-id order."""
+        return self._cached_meta()[0]
+
+    @property
+    def resume_ids(self):
+        """Resume ids with rows in this generation (tombstoned ones included)."""
+        return self._cached_meta()[1]
+
+    def live_mask(self):
+        meta = self.meta
+        if not self.tombstones or len(meta) == 0:
+            return np.ones(len(meta), dtype=bool)
+        return ~np.isin(meta["resume_id"], np.fromiter(self.tombstones, dtype=np.int64))
+
+    def vectors(self, rows=None):
+        """Dequantized float32 vectors for `rows` (all rows when None)."""
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        in_base = rows < self.base_rows
+        if in_base.any():
+            base_rows = rows[in_base]
+            out[in_base] = self.codes[base_rows].astype(np.float32) * self.scales[base_rows][:, None]
+        if (~in_base).any():
+            log_rows = self._log[rows[~in_base] - self.base_rows]
+            out[~in_base] = log_rows["codes"].astype(np.float32) * log_rows["scale"][:, None]
+        return out
+
+    def similarities(self, queries, rows):
+        """
+        Inner products (len(queries), len(rows)) of float32 queries with stored rows, computed
+        on the int8 codes (scaled after the product) without dequantizing the whole store.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(queries), len(rows)), dtype=np.float32)
+        in_base = rows < self.base_rows
+        if in_base.any():
+            base_rows = rows[in_base]
+            out[:, in_base] = (queries @ self.codes[base_rows].T.astype(np.float32)) * self.scales[base_rows]
+        if (~in_base).any():
+            log_rows = self._log[rows[~in_base] - self.base_rows]
+            out[:, ~in_base] = (queries @ log_rows["codes"].T.astype(np.float32)) * log_rows["scale"]
+        return out
+
+    def resume_rows(self, resume_id):
+        return np.flatnonzero(self.meta["resume_id"] == resume_id)
+
+    def stats(self):
+        live = int(self.live_mask().sum())
+        return {"generation": self.generation, "rows": len(self), "base_rows": self.base_rows,
+                "log_rows": self._log_rows, "live_rows": live, "tombstoned_resumes": len(self.tombstones),
+                "bytes_per_vector": self.dim + 4 + META_DTYPE.itemsize}
+
+    # ---- writes ---------------------------------------------------------------
+
+    def append(self, resume_id, vectors, spans=None):
+        """
+        Quantize and append one resume's chunk vectors. `spans` are optional
+        (start, end) char offsets per chunk. Returns the new rows' vector ids.
+        """
+        codes, scales = quantize_int8(vectors)
+        records = np.zeros(len(codes), dtype=self._log_dtype)
+        records["meta"]["resume_id"] = resume_id
+        records["meta"]["chunk_no"] = np.arange(len(codes))
+        records["meta"]["start"] = -1
+        records["meta"]["end"] = -1
+        if spans is not None and len(spans) == len(codes):
+            spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+            records["meta"]["start"] = spans[:, 0]
+            records["meta"]["end"] = spans[:, 1]
+        records["scale"] = scales
+        records["codes"] = codes
+
+        with self._file_lock():
+            self.refresh()
+            first = len(self)
+            log_path = self._path(f"append-{self.generation}.log")
+            with open(log_path, "r+b" if os.path.exists(log_path) else "wb") as f:
+                # ROBUSTNESS: drop a partial record left by a crashed writer
+                f.truncate(self._log_rows * self._log_dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+            self.refresh()
+        return np.arange(first, first + len(codes))
+
+    def delete(self, resume_ids):
+        """Tombstone every row of the given resumes (applied physically at the next compaction)."""
+        with self._file_lock():
+            # ROBUSTNESS: pick up a compaction by another worker first, or the tombstones
+            # would land in the previous generation's log and never apply
+            self.refresh()
+            ids = [int(r) for r in resume_ids if int(r) in self.resume_ids and int(r) not in self.tombstones]
+            if not ids:
+                return 0
+            with open(self._path(f"tombstones-{self.generation}.log"), "ab") as f:
+                f.write(np.asarray(ids, dtype="<i8").tobytes())
+            self.refresh()
+        return len(ids)
+
+    def needs_compaction(self):
+        rows = len(self)
+        if rows == 0:
+            return False
+        dead = rows - int(self.live_mask().sum())
+        return self._log_rows >= VECTOR_STORE_COMPACT_LOG_ROWS or dead / rows > VECTOR_STORE_COMPACT_DEAD_FRACTION
+
+    def compact(self, force=False):
+        """Fold the append log into a new base without tombstoned rows. Returns True if compacted."""
+        with self._file_lock():
+            self.refresh()
+            if not force and not self.needs_compaction():
+                return False
+            live = np.flatnonzero(self.live_mask())
+            in_base = live[live < self.base_rows]
+            in_log = live[live >= self.base_rows] - self.base_rows
+            codes = np.concatenate([self.codes[in_base], self._log["codes"][in_log]]) \
+                if self._log is not None else np.asarray(self.codes[in_base])
+            scales = np.concatenate([self.scales[in_base], self._log["scale"][in_log]]) \
+                if self._log is not None else np.asarray(self.scales[in_base])
+            meta = np.concatenate([self.base_meta[in_base], self._log["meta"][in_log]]) \
+                if self._log is not None else np.asarray(self.base_meta[in_base])
+            generation = self.generation + 1
+            self._write_generation(generation, codes, scales, meta)
+            self.refresh()
+        logger.info(f"✅ Compacted vector store {self.directory} (generation {generation}, {len(live)} rows)")
+        return True